@@ -0,0 +1,32 @@
+"""
+Scalar vs batch engine throughput over snapshot totals (what a rescore shard scores), with a
+differential check. Exits 1 on a mismatch or if the batch engine isn't faster.
+Run from backend/: python -m benchmarks.batch_engine [users]
+"""
+import sys, time
+from services.financial_engine import calculate_from_totals, aggregate_totals
+from services.batch_engine import calculate_from_totals_batch, diff_against_scalar
+from benchmarks.synthetic import make_rows
+
+def best(fn, rounds=3):
+    """Fastest of a few runs (seconds) and the last result: rescore throughput, not scheduler noise."""
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        out = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), out
+
+def main(n=5000):
+    rows = [(p, aggregate_totals(e, a, l), l, g) for p, e, a, l, g in make_rows(n)]
+
+    scalar, _ = best(lambda: [calculate_from_totals(*r) for r in rows])
+    batch, results = best(lambda: calculate_from_totals_batch(rows))
+
+    mismatches = diff_against_scalar(rows, results)
+    print(f"users={n} scalar={n / scalar:,.0f}/s batch={n / batch:,.0f}/s speedup={scalar / batch:.2f}x mismatches={len(mismatches)}")
+    # The rescore job runs on the batch engine: it has to be right and faster
+    return 1 if mismatches or batch >= scalar else 0
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
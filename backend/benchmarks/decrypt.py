@@ -0,0 +1,38 @@
+"""
+Chat history decryption throughput: per-message Fernet vs batched + cached pipeline.
+Run from backend/: python -m benchmarks.decrypt [messages]
+"""
+import os, sys, time
+from cryptography.fernet import Fernet
+
+os.environ["ENCRYPTION_KEYS"] = ",".join([Fernet.generate_key().decode(), Fernet.generate_key().decode()])
+os.environ.pop("ENCRYPTION_KEY", None)
+
+from utils import security
+
+def rate(n, seconds):
+    return f"{n / seconds:,.0f} msg/s"
+
+def main(n=5000):
+    old = Fernet(os.environ["ENCRYPTION_KEYS"].split(",")[1].encode())
+    texts = [security.encrypt_text(f"message {i} " * 8) for i in range(n // 2)]
+    texts += [old.encrypt(f"legacy {i} ".encode() * 8).decode() for i in range(n - n // 2)] # pre-rotation ciphertexts
+
+    t0 = time.perf_counter()
+    baseline = [security.cipher.decrypt(t.encode()).decode() for t in texts]
+    single = time.perf_counter() - t0
+
+    security._cache.clear()
+    t0 = time.perf_counter()
+    cold = security.decrypt_many(texts)
+    batch_cold = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    warm = security.decrypt_many(texts)
+    batch_warm = time.perf_counter() - t0
+
+    assert baseline == cold == warm
+    print(f"messages={n} per-message={rate(n, single)} batch-cold={rate(n, batch_cold)} batch-warm={rate(n, batch_warm)}")
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
@@ -0,0 +1,66 @@
+"""
+Mongo document -> engine record conversion: legacy Pydantic models vs slotted records.
+Run from backend/: python -m benchmarks.engine_models [holdings] [snapshots]
+"""
+import random, sys, time, tracemalloc
+from typing import Optional
+from pydantic import BaseModel
+from models import Money
+from services.financial_engine import EngineProfile, EngineAsset, EngineLiability, EngineGoal, calculate_financial_health
+from benchmarks.synthetic import asset_docs, liability_docs, goal_docs, money
+
+# The models the engine used before slotted records (money fields now paise), kept as the baseline
+class PydAsset(BaseModel):
+    name: str; type: str; value: Money; liquidity_score: int
+
+class PydLiability(BaseModel):
+    name: str; type: str; outstanding_amount: Money; interest_rate: float; monthly_payment: Money
+
+class PydGoal(BaseModel):
+    name: str; target_amount: Money; target_date: str; priority: str; id: Optional[str] = None
+
+class PydProfile(BaseModel):
+    salary: Money; rent: Money; current_savings: Money
+
+def pydantic_inputs(doc):
+    return (PydProfile(**doc["profile"]), [PydAsset(**a) for a in doc["assets"]],
+            [PydLiability(**l) for l in doc["liabilities"]], [PydGoal(**g) for g in doc["goals"]])
+
+def slotted_inputs(doc):
+    return (EngineProfile.from_doc(doc["profile"]), [EngineAsset.from_doc(a) for a in doc["assets"]],
+            [EngineLiability.from_doc(l) for l in doc["liabilities"]], [EngineGoal.from_doc(g) for g in doc["goals"]])
+
+def make_docs(n, holdings, seed=0):
+    rng = random.Random(seed)
+    return [{"profile": {"salary": money(rng, 20000, 300000), "rent": money(rng, 0, 60000), "current_savings": money(rng, 0, 500000)},
+             "assets": asset_docs(rng, holdings), "liabilities": liability_docs(rng, max(1, holdings // 20)),
+             "goals": goal_docs(rng, max(1, holdings // 20))} for _ in range(n)]
+
+def measure(convert, docs):
+    t0 = time.perf_counter()
+    for d in docs: convert(d)
+    seconds = time.perf_counter() - t0
+
+    tracemalloc.start()
+    kept = convert(docs[0]) # peak for one snapshot's records
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds / len(docs), peak, kept
+
+def main(holdings=300, n=200):
+    docs = make_docs(n, holdings)
+    pyd_t, pyd_mem, pyd = measure(pydantic_inputs, docs)
+    slot_t, slot_mem, slot = measure(slotted_inputs, docs)
+
+    # Same engine output from either representation (goal dicts included)
+    a = calculate_financial_health(pyd[0], [], *pyd[1:])
+    b = calculate_financial_health(slot[0], [], *slot[1:])
+    assert a == b, "engine output differs between representations"
+
+    print(f"holdings={holdings} snapshots={n}")
+    print(f"pydantic: {pyd_t * 1e3:.3f} ms/snapshot peak={pyd_mem / 1024:,.0f} KiB")
+    print(f"slotted:  {slot_t * 1e3:.3f} ms/snapshot peak={slot_mem / 1024:,.0f} KiB")
+    print(f"speedup={pyd_t / slot_t:.2f}x memory={pyd_mem / slot_mem:.2f}x less")
+
+if __name__ == "__main__":
+    main(*(int(x) for x in sys.argv[1:3]))
@@ -0,0 +1,105 @@
+"""
+In-memory stand-in for the async driver, for benchmarks and tests: the app's collections are
+served by mongomock behind an AsyncMongoClient-shaped wrapper. Needs `pip install mongomock`.
+Call install() before anything imports `database`.
+"""
+import pymongo
+
+class Cursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, n):
+        self.cursor = self.cursor.limit(n)
+        return self
+
+    def skip(self, n):
+        self.cursor = self.cursor.skip(n)
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.cursor)
+
+    def __aiter__(self):
+        self.it = iter(self.cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+class Collection:
+    def __init__(self, coll):
+        self.sync = coll
+
+    def find(self, *args, **kwargs):
+        return Cursor(self.sync.find(*args, **kwargs))
+
+    async def aggregate(self, *args, **kwargs):
+        return Cursor(self.sync.aggregate(*args, **kwargs))
+
+    async def create_index(self, keys, **kwargs):
+        # mongomock enforces unique indexes with a collection scan per insert (seeding a heavy
+        # user would be quadratic) and can't build partial ones over existing documents.
+        # Partial indexes only guard bulk-import dedup, which the suite doesn't exercise.
+        if "partialFilterExpression" in kwargs: return None
+        return self.sync.create_index(keys, **kwargs)
+
+    async def update_one(self, filter, update, **kwargs):
+        # mongomock's $push $sort orders by a single key; multi-key sorts (and the $slice after
+        # them) are applied here, on the pushed array, once the rest of the update has run
+        sorts = {}
+        if any(isinstance(v, dict) and isinstance(v.get("$sort"), dict) and len(v["$sort"]) > 1 for v in update.get("$push", {}).values()):
+            update = {**update, "$push": dict(update["$push"])}
+            for field, v in update["$push"].items():
+                if isinstance(v, dict) and isinstance(v.get("$sort"), dict) and len(v["$sort"]) > 1:
+                    v = update["$push"][field] = dict(v)
+                    sorts[field] = (v.pop("$sort"), v.pop("$slice", None))
+        res = self.sync.update_one(filter, update, **kwargs)
+        if sorts:
+            doc = self.sync.find_one({"_id": res.upserted_id} if res.upserted_id is not None else filter)
+            for field, (spec, n) in sorts.items():
+                rows = doc.get(field, [])
+                for key, direction in reversed(list(spec.items())): rows.sort(key=lambda r: r.get(key), reverse=direction < 0)
+                self.sync.update_one({"_id": doc["_id"]}, {"$set": {field: rows if n is None else rows[:n] if n >= 0 else rows[n:]}})
+        return res
+
+    def __getattr__(self, name):
+        attr = getattr(self.sync, name)
+        if not callable(attr): return attr
+        async def call(*args, **kwargs): return attr(*args, **kwargs)
+        return call
+
+class Database:
+    def __init__(self, db):
+        self.sync = db
+
+    def __getitem__(self, name):
+        return Collection(self.sync[name])
+
+class Client:
+    def __init__(self, *args, **kwargs):
+        import mongomock
+        self.sync = mongomock.MongoClient()
+
+    def __getitem__(self, name):
+        return Database(self.sync[name])
+
+    async def close(self):
+        pass
+
+def install():
+    """Imports `database` with its client swapped for mongomock; returns the module."""
+    real = pymongo.AsyncMongoClient
+    pymongo.AsyncMongoClient = Client
+    try:
+        import database
+    finally:
+        pymongo.AsyncMongoClient = real
+    return database
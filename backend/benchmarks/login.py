@@ -0,0 +1,58 @@
+"""
+Login burst: p50/p99 of POST /v1/auth/login under concurrency, and how much a burst slows
+dashboard requests served at the same time (hashing runs on its own bounded pool).
+Run from backend/: python -m benchmarks.login [logins] [concurrency]
+BCRYPT_ROUNDS / PASSWORD_HASH / HASH_WORKERS / HASH_MAX_PENDING apply as in the app.
+"""
+import sys, time, random, asyncio
+import httpx
+from benchmarks.suite import app, seed, run_load, percentile, create_token
+from database import users
+from utils.passwords import hash_password, hashing_stats
+
+PASSWORD = "correct horse battery staple"
+
+async def probe(client, headers, done):
+    """Dashboard latencies sampled back to back until `done` is set."""
+    latencies = []
+    while not done.is_set():
+        t0 = time.perf_counter()
+        await client.get("/v1/finance/data", headers=headers)
+        latencies.append(time.perf_counter() - t0)
+        await asyncio.sleep(0) # with mongomock a request never suspends; let the logins run
+    return latencies
+
+def summary(latencies):
+    return f"p50={percentile(latencies, 50) * 1e3:.1f} ms p99={percentile(latencies, 99) * 1e3:.1f} ms"
+
+async def main(n=200, concurrency=32):
+    async with app.router.lifespan_context(app):
+        hashed = await hash_password(PASSWORD) # one hash shared by every account: same verify cost
+        accounts = [f"login_{i}@bench.local" for i in range(50)]
+        await users.insert_many([{"username": u, "password": hashed, "salary": 1} for u in accounts])
+        dash_user = await seed("login_dashboard", "typical", random.Random(3))
+        dash = {"Authorization": f"Bearer {create_token({'sub': dash_user['username']})}"}
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120) as client:
+            done = asyncio.Event(); done.set()
+            await client.get("/v1/finance/data", headers=dash)
+            idle = []
+            for _ in range(50):
+                t0 = time.perf_counter(); await client.get("/v1/finance/data", headers=dash); idle.append(time.perf_counter() - t0)
+
+            logins = [("POST", "/v1/auth/login", None, {"username": accounts[i % len(accounts)], "password": PASSWORD}) for i in range(n)]
+            done = asyncio.Event()
+            probe_task = asyncio.create_task(probe(client, dash, done))
+            t0 = time.perf_counter()
+            result = await run_load(client, "login", logins, concurrency)
+            elapsed = time.perf_counter() - t0
+            done.set()
+            busy = await probe_task
+
+    r = {k.split(".")[-1]: v["value"] for k, v in result.items()}
+    print(f"logins={n} concurrency={concurrency} time={elapsed:.1f}s rate={r['rps']:,.1f}/s p50={r['p50']} ms p95={r['p95']} ms p99={r['p99']} ms non-200={r['errors']}")
+    print(f"dashboard idle: {summary(idle)}  during burst: {summary(busy)} ({len(busy)} requests)")
+    print(f"hashing: {hashing_stats()}")
+
+if __name__ == "__main__":
+    asyncio.run(main(*(int(x) for x in sys.argv[1:3])))
@@ -0,0 +1,32 @@
+"""
+Monte Carlo projection throughput (paths x months), with a reproducibility check.
+Run from backend/: python -m benchmarks.monte_carlo [paths] [years]
+Exits non-zero below MC_MIN_PATHS_PER_SEC (default 20000 ten-year paths/s).
+"""
+import os, sys, time
+import numpy as np
+from services.monte_carlo import simulate
+
+MIN_PATHS_PER_SEC = float(os.getenv("MC_MIN_PATHS_PER_SEC", "20000"))
+
+ALLOCATION = {"Bank": 150000, "Mutual Fund": 400000, "Stock": 250000, "Gold": 80000, "PF": 300000, "Crypto": 20000, "Cash": 50000}
+LOANS = [(1800000, 8.5, 22000), (250000, 14, 9000)]
+
+def main(paths=10000, years=10):
+    args = (ALLOCATION, 150000, 70000, LOANS)
+    simulate(*args, years=1, paths=100) # warm up
+
+    t0 = time.perf_counter()
+    a = simulate(*args, years=years, paths=paths, seed=7)
+    seconds = time.perf_counter() - t0
+    b = simulate(*args, years=years, paths=paths, seed=7)
+    assert np.array_equal(a["bands"], b["bands"]), "same seed must give the same bands"
+
+    rate = paths / seconds * years / 10
+    p5, p50, p95 = a["bands"][-1][[0, 2, 4]]
+    print(f"paths={paths} years={years} time={seconds * 1e3:.0f} ms rate={rate:,.0f} ten-year paths/s")
+    print(f"year {years}: p5={p5:,.0f} p50={p50:,.0f} p95={p95:,.0f} P(net worth > 0)={a['prob_positive']:.3f}")
+    return 0 if rate >= MIN_PATHS_PER_SEC else 1
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(x) for x in sys.argv[1:3])))
@@ -0,0 +1,66 @@
+"""
+What-if scenarios: a full engine run per scenario (expense aggregation and every stage, what
+re-adding the data and reloading the dashboard cost) vs changes applied to the cached base
+inputs with only the affected stages rerun.
+Run from backend/: python -m benchmarks.scenarios [rounds]
+"""
+import os, sys, time, random
+from types import SimpleNamespace
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("DB_NAME", "finai_bench") # never connects
+
+from services.financial_engine import aggregate_totals
+from services.debt_planner import plan_debts
+from services.scenario_service import Inputs, evaluate, apply
+from utils.responses import dumps
+from benchmarks.synthetic import SIZES, make_row
+
+def change(type, **fields):
+    return SimpleNamespace(type=type, **fields)
+
+def scenarios(assets):
+    """The usual questions, alone and combined (amounts in paise)."""
+    sale = [change("asset_sale", asset_id="0", price=None)] if assets else []
+    goal = change("goal", name="car", target_amount=80_000_000, target_date="2029-01-01", priority="High")
+    return [
+        [change("salary", amount=1_500_000)], [change("salary", amount=-2_000_000)],
+        [change("rent", amount=500_000)], [change("extra_payment", amount=1_000_000)],
+        [goal], sale, [change("rent", amount=500_000), goal], [*sale, change("extra_payment", amount=1_000_000)],
+    ]
+
+def full(profile, expenses, assets, liabilities, goals, changes):
+    base = Inputs(profile, aggregate_totals(expenses, assets, liabilities), liabilities, goals, dict(zip(map(str, range(len(assets))), assets)))
+    return evaluate(apply(base, changes))[0]
+
+def main(rounds=50):
+    rng = random.Random(0)
+    for size, n in SIZES.items():
+        profile, e, a, l, g = make_row(rng, **n)
+        cases = scenarios(a)
+        inputs = Inputs(profile, aggregate_totals(e, a, l), l, g, dict(zip(map(str, range(len(a))), a)))
+        t0 = time.perf_counter()
+        _, keys, results, _ = evaluate(inputs)
+        base_t = time.perf_counter() - t0
+        base = SimpleNamespace(keys=keys, results=results)
+
+        timings = {"full": 0.0, "partial": 0.0}
+        for _ in range(rounds):
+            plan_debts.cache_clear()
+            t0 = time.perf_counter()
+            a_out = [full(profile, e, a, l, g, c) for c in cases]
+            t1 = time.perf_counter()
+            plan_debts.cache_clear()
+            b_out = [evaluate(apply(inputs, c), base)[0] for c in cases]
+            t2 = time.perf_counter()
+            timings["full"] += t1 - t0
+            timings["partial"] += t2 - t1
+        assert dumps(a_out) == dumps(b_out), f"{size}: partial rerun differs from a full run"
+
+        per = {k: v / (rounds * len(cases)) * 1e3 for k, v in timings.items()}
+        print(f"{size:<8} base {base_t * 1e3:.3f} ms | per scenario: full {per['full']:.3f} ms "
+              f"partial {per['partial']:.3f} ms ({per['full'] / per['partial']:.1f}x)")
+
+if __name__ == "__main__":
+    main(*(int(x) for x in sys.argv[1:2]))
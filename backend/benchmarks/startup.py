@@ -0,0 +1,42 @@
+"""
+Cold-start import cost: `python -X importtime -c "import main"` in fresh processes (median of
+RUNS), the slowest imports under main, and a check that the lazily imported dependencies stay
+out of startup. Exits non-zero when importing main takes longer than the budget or a lazy
+module is loaded at import.
+Run from backend/: python -m benchmarks.startup [budget_ms]
+"""
+import os, re, sys, statistics, subprocess
+
+# -X importtime inflates the total (it times every import); measured ~900 ms on 1 CPU
+BUDGET_MS = 1200
+RUNS = 5
+# Loaded on first use: projections, LLM calls, Google sign-in, argon2 hashes, rescore jobs
+LAZY = ("numpy", "httpx", "argon2", "multiprocessing")
+ENV = {"DB_NAME": "finai_bench", "SECRET_KEY": "bench", "ALGORITHM": "HS256"}
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$", re.M)
+
+def run():
+    """({module: cumulative ms} for main and its direct imports, lazy modules that got loaded)."""
+    probe = f"import sys, main; print(','.join(m for m in {LAZY!r} if m in sys.modules))"
+    env = {**ENV, **os.environ}
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, env=env, check=True)
+    # Nested imports are printed before their parent, indented two spaces per level
+    times = {name: int(cum) / 1e3 for _, cum, indent, name in LINE.findall(out.stderr) if len(indent) <= 2}
+    return times, [m for m in out.stdout.strip().split(",") if m]
+
+def main(budget=BUDGET_MS):
+    runs = [run() for _ in range(RUNS)]
+    total = statistics.median(t["main"] for t, _ in runs)
+    times, leaked = runs[-1]
+    slowest = sorted(((ms, m) for m, ms in times.items() if m != "main"), reverse=True)[:10]
+
+    print(f"import main: {total:,.0f} ms (median of {RUNS}, budget {budget:,} ms)")
+    for ms, m in slowest: print(f"  {m:<32} {ms:8,.1f} ms")
+    failures = []
+    if total > budget: failures.append(f"import time {total:,.0f} ms is over the {budget:,} ms budget")
+    if leaked: failures.append(f"imported at startup but meant to be lazy: {', '.join(leaked)}")
+    for f in failures: print("FAIL:", f)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(*(int(x) for x in sys.argv[1:2])))
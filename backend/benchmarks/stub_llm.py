@@ -0,0 +1,44 @@
+"""
+OpenRouter-compatible stub for load tests and tests: answers every chat completion after a fixed
+delay (STUB_LLM_LATENCY_MS, default 50), streamed or not, without leaving the machine. Set `status`
+to answer with an upstream error instead.
+Standalone: python -m benchmarks.stub_llm [port], then point OPENROUTER_BASE_URL at http://127.0.0.1:<port>/api/v1
+"""
+import os, sys, json, asyncio
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse, JSONResponse
+
+LATENCY = float(os.getenv("STUB_LLM_LATENCY_MS", "50")) / 1000
+WORDS = ["Build ", "an ", "emergency ", "fund ", "before ", "investing."]
+
+app = FastAPI()
+calls = {"complete": 0, "stream": 0}
+status = 200
+
+@app.post("/api/v1/chat/completions")
+async def completions(req: Request):
+    body = await req.json()
+    calls["stream" if body.get("stream") else "complete"] += 1
+    if status != 200:
+        return JSONResponse({"error": {"code": status, "message": "Upstream error"}}, status_code=status)
+    if body.get("stream"):
+        async def chunks():
+            yield ": OPENROUTER PROCESSING\n\n"
+            for w in WORDS:
+                await asyncio.sleep(LATENCY / len(WORDS))
+                yield "data: " + json.dumps({"choices": [{"delta": {"content": w}}]}) + "\n\n"
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+    await asyncio.sleep(LATENCY)
+    return {"choices": [{"message": {"role": "assistant", "content": "".join(WORDS)}}]}
+
+def install():
+    """Routes ai_service's pooled client to this app in-process (no sockets)."""
+    from services import ai_service
+    os.environ.setdefault("OPENROUTER_API_KEY", "bench")
+    ai_service._http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://stub-llm/api/v1")
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
@@ -0,0 +1,227 @@
+"""
+Benchmark suite with stored baselines.
+
+micro -- calculate_financial_health, rebuild_snapshot, fetch_user_snapshot, serialize and
+         dashboard encoding for tiny / typical / heavy synthetic users (ms per call, best
+         of REPEAT rounds: slower rounds are scheduler noise, not the code)
+load  -- concurrent GET /v1/finance/data (plain and conditional) and POST /v1/ai/advisor
+         through the full app (auth, middleware, snapshot, engine) against mongomock and the
+         stub LLM
+
+mongomock never waits on I/O, so its load latencies are per-request CPU time and its snapshot
+timings are dominated by mongomock itself. Set BENCH_MONGO_URI to run against a local mongod
+instead (the BENCH_DB_NAME database is dropped first) and save baselines for that setup. Results are compared with benchmarks/baselines.json and the run exits
+non-zero when a metric is worse than its baseline by more than the metric's threshold.
+
+Run from backend/: python -m benchmarks.suite [micro|load] [--save]
+"""
+import os, sys, json, time, random, asyncio, platform
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ["DB_NAME"] = os.getenv("BENCH_DB_NAME", "finai_bench")
+os.environ["AI_TIERS"] = "bench:0" # load users are uncapped
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmarks import fake_mongo, stub_llm
+if os.getenv("BENCH_MONGO_URI"):
+    os.environ["MONGO_URI"] = os.environ["BENCH_MONGO_URI"]
+    import database
+else:
+    database = fake_mongo.install()
+
+import httpx
+from main import app
+from routes.auth import create_token
+from services.financial_engine import calculate_financial_health
+from services.snapshot_service import rebuild_snapshot, refresh_snapshot
+from services.data_service import fetch_user_snapshot, serialize
+from utils.responses import dumps
+from benchmarks.synthetic import SIZES, make_row, user_docs
+
+BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+REPEAT = int(os.getenv("BENCH_REPEAT", "5"))
+MIN_TIME = float(os.getenv("BENCH_MIN_TIME", "0.2")) # seconds per round
+LOAD_USERS = int(os.getenv("BENCH_LOAD_USERS", "20"))
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", "16"))
+LOAD_REQUESTS = int(os.getenv("BENCH_LOAD_REQUESTS", "400"))
+THRESHOLDS = {"micro": 0.25, "load": 0.35} # allowed slowdown per suite when a baseline has none
+CONFIRM = int(os.getenv("BENCH_CONFIRM", "3")) # re-measures of a micro metric over its limit before it counts
+
+# --- TIMING ---
+def measure(fn, setup=None):
+    """Best seconds per call over REPEAT rounds. `setup` makes fresh arguments per call, outside the timing."""
+    args = setup() if setup else ()
+    t0 = time.perf_counter(); fn(*args); first = time.perf_counter() - t0
+    number = max(1, int(MIN_TIME / max(first, 1e-7)))
+    per_call = []
+    for _ in range(REPEAT):
+        batch = [setup() if setup else () for _ in range(number)]
+        t0 = time.perf_counter()
+        for a in batch: fn(*a)
+        per_call.append((time.perf_counter() - t0) / number)
+    return min(per_call)
+
+async def ameasure(fn):
+    t0 = time.perf_counter(); await fn(); first = time.perf_counter() - t0
+    number = max(1, int(MIN_TIME / max(first, 1e-7)))
+    per_call = []
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        for _ in range(number): await fn()
+        per_call.append((time.perf_counter() - t0) / number)
+    return min(per_call)
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+# --- DATA ---
+async def seed(username, size, rng, **user):
+    docs = user_docs(rng, username, size, **user)
+    for coll, rows in docs.items():
+        if rows: await database.db[coll].insert_many(rows)
+    user = docs["users"][0]
+    await refresh_snapshot(user)
+    return user
+
+# --- SUITES ---
+async def reset():
+    """Empties what the suites seeded, so a rerun measures the same data (mongomock scans whole collections)."""
+    for coll in ("users", "expenses", "assets", "liabilities", "goals", "snapshots"): await database.db[coll].delete_many({})
+
+async def micro():
+    rng = random.Random(0)
+    results = {}
+    for size, n in SIZES.items():
+        row = make_row(random.Random(1), **n)
+        results[f"micro.engine.{size}"] = measure(lambda: calculate_financial_health(*row))
+
+        user = await seed(f"micro_{size}", size, rng)
+        results[f"micro.rebuild_snapshot.{size}"] = await ameasure(lambda: rebuild_snapshot(user))
+        results[f"micro.fetch_user_snapshot.{size}"] = await ameasure(lambda: fetch_user_snapshot(user))
+        data = await fetch_user_snapshot(user)
+        results[f"micro.encode_dashboard.{size}"] = measure(lambda: dumps(data))
+
+        rows = await database.expenses.find({"username": user["username"]}).to_list()
+        results[f"micro.serialize.{size}"] = measure(serialize, lambda: ([dict(r) for r in rows],))
+    return {k: {"value": round(v * 1e3, 4), "unit": "ms", "better": "lower"} for k, v in results.items()}
+
+async def run_load(client, name, requests, concurrency=CONCURRENCY):
+    """Fires `requests` (method, path, headers, json) with `concurrency` in flight."""
+    latencies, errors = [], 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        for method, path, headers, body in queue:
+            t0 = time.perf_counter()
+            res = await client.request(method, path, headers=headers, json=body)
+            latencies.append(time.perf_counter() - t0)
+            if res.status_code not in (200, 304): errors += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    return {
+        f"load.{name}.rps": {"value": round(len(latencies) / elapsed, 1), "unit": "req/s", "better": "higher"},
+        **{f"load.{name}.p{p}": {"value": round(percentile(latencies, p) * 1e3, 2), "unit": "ms", "better": "lower"} for p in (50, 95, 99)},
+        f"load.{name}.errors": {"value": errors, "unit": "count", "better": "lower", "threshold": 0},
+    }
+
+async def load():
+    rng = random.Random(2)
+    users = [await seed(f"load_{i}", "typical", rng, tier="bench") for i in range(LOAD_USERS)]
+    tokens = [{"Authorization": f"Bearer {create_token({'sub': u['username']})}"} for u in users]
+    stub_llm.install()
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        data = [("GET", "/v1/finance/data", tokens[i % LOAD_USERS], None) for i in range(LOAD_REQUESTS)]
+        # Distinct questions, so every call misses the response cache and reaches the LLM
+        advisor = [("POST", "/v1/ai/advisor", tokens[i % LOAD_USERS], {"query": f"Should I prepay loan {i}?"}) for i in range(LOAD_REQUESTS // 2)]
+        await run_load(client, "warmup", data[:CONCURRENCY * 2])
+        results.update(await run_load(client, "finance_data", data))
+        etags = [(await client.get("/v1/finance/data", headers=t)).headers["etag"] for t in tokens]
+        conditional = [(m, p, {**h, "If-None-Match": etags[i % LOAD_USERS]}, b) for i, (m, p, h, b) in enumerate(data)]
+        results.update(await run_load(client, "finance_data_304", conditional))
+        results.update(await run_load(client, "advisor", advisor))
+    return results
+
+# --- BASELINES ---
+def limit_for(name, base):
+    return base.get("threshold", THRESHOLDS[name.split(".")[0]])
+
+def is_worse(name, r, base):
+    if not base: return False
+    limit, value, ref = limit_for(name, base), r["value"], base["value"]
+    return value > ref * (1 + limit) if r["better"] == "lower" else value < ref * (1 - limit)
+
+def best(a, b):
+    return min(a, b, key=lambda r: r["value"]) if a["better"] == "lower" else max(a, b, key=lambda r: r["value"])
+
+def compare(results, baselines):
+    """Prints one line per metric; returns the names that regressed past their threshold."""
+    regressions = []
+    for name, r in sorted(results.items()):
+        base = baselines.get(name)
+        line = f"{name:<40} {r['value']:>12,.4g} {r['unit']:<6}"
+        if base:
+            limit, value, ref = limit_for(name, base), r["value"], base["value"]
+            worse = is_worse(name, r, base)
+            change = f"{(value - ref) / ref:+.0%}" if ref else "n/a"
+            line += f" baseline={ref:,.4g} ({change}, limit {limit:.0%}){'  REGRESSION' if worse else ''}"
+            if worse: regressions.append(name)
+        print(line)
+    return regressions
+
+def save(results, baselines):
+    for name, r in results.items():
+        kept = {"threshold": baselines[name]["threshold"]} if "threshold" in baselines.get(name, {}) else {}
+        baselines[name] = {**r, **kept}
+    doc = {"machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                       "mongo": "mongod" if os.getenv("BENCH_MONGO_URI") else "mongomock"},
+           "metrics": dict(sorted(baselines.items()))}
+    with open(BASELINES, "w") as f: json.dump(doc, f, indent=2)
+    print(f"saved {len(results)} metrics to {BASELINES}")
+
+async def main(suites, write):
+    if os.getenv("BENCH_MONGO_URI"): await database.client.drop_database(os.environ["DB_NAME"])
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES) as f: baselines = json.load(f)["metrics"]
+
+    results = {}
+    async with app.router.lifespan_context(app): # indexes, quota flusher; closes clients at the end
+        if "micro" in suites:
+            micro_results = await micro()
+            if write:
+                # Baselines are the median of 1 + CONFIRM runs, a typical value rather than one lucky run
+                runs = [micro_results]
+                for _ in range(CONFIRM):
+                    await reset()
+                    runs.append(await micro())
+                micro_results = {k: sorted((r[k] for r in runs), key=lambda r: r["value"])[len(runs) // 2] for k in micro_results}
+            else:
+                # One slow round on a busy machine isn't a regression: while a metric is over its
+                # limit the suite runs again and each metric keeps its best value
+                for _ in range(CONFIRM):
+                    if not any(is_worse(k, r, baselines.get(k)) for k, r in micro_results.items()): break
+                    await reset()
+                    micro_results = {k: best(r, micro_results[k]) for k, r in (await micro()).items()}
+            results.update(micro_results)
+            await reset()
+        if "load" in suites: results.update(await load())
+    results = {k: v for k, v in results.items() if not k.startswith("load.warmup.")}
+
+    regressions = compare(results, baselines)
+    if write: save(results, baselines)
+    elif regressions: print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+    return 1 if regressions and not write else 0
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    suites = [a for a in args if a in ("micro", "load")] or ["micro", "load"]
+    sys.exit(asyncio.run(main(suites, "--save" in args)))
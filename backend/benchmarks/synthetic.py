@@ -0,0 +1,61 @@
+import random
+from services.financial_engine import EngineProfile, EngineAsset, EngineLiability, EngineGoal
+
+ASSET_TYPES = [("Bank", 5), ("Mutual Fund", 4), ("Stock", 4), ("Gold", 3), ("Real Estate", 1), ("PF", 1), ("Crypto", 3)]
+CATEGORIES = ["Food", "Travel", "Shopping", "Bills", "Health", "General"]
+
+# Users at several sizes: list lengths per collection
+SIZES = {
+    "tiny": {"expenses": 5, "assets": 1, "liabilities": 0, "goals": 1},
+    "typical": {"expenses": 200, "assets": 8, "liabilities": 2, "goals": 3},
+    "heavy": {"expenses": 10000, "assets": 40, "liabilities": 50, "goals": 20},
+}
+
+def money(rng, lo, hi):
+    return round(rng.uniform(lo, hi), 2)
+
+def profile_doc(rng):
+    return {"salary": money(rng, 20000, 300000), "rent": money(rng, 0, 60000), "current_savings": money(rng, 0, 500000)}
+
+def expense_docs(rng, n):
+    return [{"title": f"e{i}", "amount": money(rng, 50, 5000), "category": rng.choice(CATEGORIES),
+             "date": f"{rng.randint(2025, 2026)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"} for i in range(n)]
+
+def asset_docs(rng, n):
+    docs = []
+    for i in range(n):
+        t, liq = rng.choice(ASSET_TYPES)
+        docs.append({"name": f"a{i}", "type": t, "value": money(rng, 1000, 2000000), "liquidity_score": liq})
+    return docs
+
+def liability_docs(rng, n):
+    return [{"name": f"l{i}", "type": "Loan", "outstanding_amount": money(rng, 10000, 3000000),
+             "interest_rate": round(rng.uniform(6, 36), 2), "monthly_payment": money(rng, 1000, 60000)} for i in range(n)]
+
+def goal_docs(rng, n):
+    return [{"name": f"g{i}", "target_amount": money(rng, 10000, 5000000), "target_date": f"{rng.randint(2026, 2040)}-{rng.randint(1, 12):02d}-01",
+             "priority": rng.choice(["High", "Medium", "Low"]), "id": str(i)} for i in range(n)]
+
+def make_row(rng, expenses=50, assets=5, liabilities=2, goals=2):
+    """One engine input tuple (profile, expenses, assets, liabilities, goals) with realistic INR ranges."""
+    profile = EngineProfile.from_doc(profile_doc(rng))
+    e = expense_docs(rng, expenses)
+    a = [EngineAsset.from_doc(d) for d in asset_docs(rng, assets)]
+    l = [EngineLiability.from_doc(d) for d in liability_docs(rng, liabilities)]
+    g = [EngineGoal.from_doc(d) for d in goal_docs(rng, goals)]
+    return profile, e, a, l, g
+
+def make_rows(n, seed=0, **sizes):
+    rng = random.Random(seed)
+    return [make_row(rng, **sizes) for _ in range(n)]
+
+def user_docs(rng, username, size="typical", **user):
+    """Mongo documents for one user of a named size: {collection: [docs]}, the user doc included."""
+    n = SIZES[size]
+    docs = {"users": [{"username": username, **profile_doc(rng), **user}],
+            "expenses": expense_docs(rng, n["expenses"]), "assets": asset_docs(rng, n["assets"]),
+            "liabilities": liability_docs(rng, n["liabilities"]), "goals": goal_docs(rng, n["goals"])}
+    for d in docs["goals"]: del d["id"] # assigned from _id when stored
+    for rows in docs.values():
+        for d in rows: d["username"] = username
+    return docs
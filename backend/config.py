@@ -0,0 +1,13 @@
+import os
+from dotenv import load_dotenv
+
+# 🚀 UPGRADE: .env is read once, here, before any module reads its settings (modules read
+# os.environ at import, so this is imported first). Real environment variables win over .env.
+load_dotenv()
+
+REQUIRED = ("SECRET_KEY", "ALGORITHM") # read per request, so checked at startup
+
+def check():
+    """Fails startup naming every missing setting, instead of on the first request that needs one."""
+    missing = [k for k in REQUIRED if not os.getenv(k)]
+    if missing: raise RuntimeError(f"Missing settings: {', '.join(missing)}")
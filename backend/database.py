@@ -1,10 +1,16 @@
 import os
-from pymongo import MongoClient
-from dotenv import load_dotenv
+import config  # noqa: F401 -- loads .env before utils.metrics reads its settings
+from pymongo import AsyncMongoClient
+from pymongo.errors import OperationFailure
+from utils.metrics import mongo_listeners
 
-load_dotenv()
-
-client = MongoClient(os.getenv("MONGO_URI"))
+# 🚀 UPGRADE: Async driver; one pooled client per worker, shared by every request
+client = AsyncMongoClient(
+    os.getenv("MONGO_URI"),
+    maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+    minPoolSize=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+    event_listeners=mongo_listeners(), # Per-collection command timings for /metrics
+)
 db = client[os.getenv("DB_NAME")]
 
 users = db["users"]
@@ -12,11 +18,35 @@ expenses = db["expenses"]
 assets = db["assets"]
 liabilities = db["liabilities"]
 goals = db["goals"]
-chats = db["chats"]
+chats = db["chats"] # Legacy single-document chat logs (migrated into chat_pages on first access)
+chat_pages = db["chat_pages"]
 ai_usage = db["ai_usage"]
 token_blacklist = db["token_blacklist"] # NEW: Logout support
+snapshots = db["snapshots"] # Materialized dashboard totals, one per user
 
-# Indexes
-ai_usage.create_index([("username", 1), ("created_at", 1)])
-ai_usage.create_index("created_at", expireAfterSeconds=86400)
-token_blacklist.create_index("createdAt", expireAfterSeconds=3600) # Auto-clear expired tokens
\ No newline at end of file
+# Indexes (run once at app startup)
+async def ensure_indexes():
+    await users.create_index("username", unique=True) # Login lookups; makes first-login upserts race-safe
+    # Expense history pages walk (date, _id) newest first; the same index serves the recent list
+    # and the monthly aggregation, the category one serves filtered history
+    await expenses.create_index([("username", 1), ("date", -1), ("_id", -1)])
+    await expenses.create_index([("username", 1), ("category", 1), ("date", -1), ("_id", -1)])
+    try:
+        await expenses.drop_index("username_1_date_-1") # Superseded by the (username, date, _id) index
+    except OperationFailure:
+        pass
+    for coll in (expenses, assets, liabilities, goals): # Bulk import dedup; rows added one at a time have no key
+        await coll.create_index([("username", 1), ("import_key", 1)], unique=True, partialFilterExpression={"import_key": {"$exists": True}})
+    # One quota counter per user per UTC day. FIX: partial, because legacy per-call docs have no `day`
+    # and a user with two of them would make the build fail (and startup with it)
+    try:
+        await ai_usage.drop_index("username_1_day_1") # The non-partial version
+    except OperationFailure:
+        pass
+    await ai_usage.create_index([("username", 1), ("day", 1)], unique=True, partialFilterExpression={"day": {"$exists": True}},
+                                name="username_1_day_1_counters")
+    await ai_usage.create_index("expires_at", expireAfterSeconds=0)
+    await ai_usage.create_index("created_at", expireAfterSeconds=86400) # Legacy per-call usage docs
+    await token_blacklist.create_index("createdAt", expireAfterSeconds=3600) # Auto-clear expired tokens
+    await snapshots.create_index("username", unique=True)
+    await chat_pages.create_index([("username", 1), ("seq", -1)], unique=True)
@@ -1,27 +1,61 @@
 from fastapi import Header, HTTPException
 import jwt
 import os
+import hmac
+import time
 from database import users, token_blacklist
+from utils import auth_cache
 
-def get_current_user(authorization: str = Header(None)):
+# Usernames allowed to run bulk jobs and read metrics: ADMIN_USERS=alice,bob
+ADMIN_USERS = {u.strip() for u in os.getenv("ADMIN_USERS", "").split(",") if u.strip()}
+# Optional shared secret for scrapers: "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+async def get_current_user(authorization: str = Header(None)):
     if not authorization: raise HTTPException(401, "No Token")
     try:
         token = authorization.split(" ")[1]
         
-        # 1. Decode FIRST to get JTI
-        payload = jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=[os.getenv("ALGORITHM")])
+        # 1. Decode FIRST to get JTI (cached per token; expiry is still enforced)
+        payload = auth_cache.payloads.get(token)
+        if payload is None:
+            payload = jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=[os.getenv("ALGORITHM")])
+            auth_cache.payloads.set(token, payload)
+        elif payload.get("exp", 0) <= time.time():
+            auth_cache.payloads.pop(token)
+            raise jwt.ExpiredSignatureError()
         jti = payload.get("jti")
 
-        # 2. Check Blacklist using JTI (Faster & Cleaner)
-        if token_blacklist.find_one({"jti": jti}):
+        # 2. Check Blacklist using JTI (cached both ways, so steady state skips Mongo)
+        if auth_cache.revoked.get(jti):
             raise HTTPException(401, "Session Revoked (Logged Out)")
+        if not auth_cache.not_revoked.get(jti):
+            if await token_blacklist.find_one({"jti": jti}):
+                auth_cache.revoked.set(jti, True)
+                raise HTTPException(401, "Session Revoked (Logged Out)")
+            auth_cache.not_revoked.set(jti, True)
 
         # 3. Get User
-        user = users.find_one({"username": payload.get("sub")})
-        if not user: raise HTTPException(401, "User Not Found")
+        username = payload.get("sub")
+        user = auth_cache.users.get(username)
+        if user is None:
+            user = await users.find_one({"username": username})
+            if not user: raise HTTPException(401, "User Not Found")
+            auth_cache.users.set(username, user)
         
         return {"user": user, "jti": jti, "token": token}
 
+    except HTTPException: raise
     except jwt.ExpiredSignatureError: raise HTTPException(401, "Token Expired")
     except jwt.InvalidTokenError: raise HTTPException(401, "Invalid Token")
-    except Exception: raise HTTPException(401, "Auth Failed")
\ No newline at end of file
+    except Exception: raise HTTPException(401, "Auth Failed")
+
+async def get_admin(authorization: str = Header(None)):
+    auth = await get_current_user(authorization)
+    if auth["user"]["username"] not in ADMIN_USERS: raise HTTPException(403, "Forbidden")
+    return auth
+
+async def metrics_access(authorization: str = Header(None)):
+    """/metrics, profiles and the X-Profile sampler: the METRICS_TOKEN bearer or an admin's session."""
+    if METRICS_TOKEN and hmac.compare_digest((authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode()): return
+    await get_admin(authorization)
@@ -1,8 +1,37 @@
+import os
+import logging
+import config # Loads .env once, before any module reads its settings
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import auth, finance, ai 
+from fastapi.responses import ORJSONResponse
 
-app = FastAPI()
+from database import client, ensure_indexes
+from dependencies import metrics_access
+from services.ai_service import close_http_client
+from services import rate_limiter, jobs
+from utils import google_auth
+from routes import auth, finance, ai, metrics as metrics_routes, jobs as jobs_routes
+from utils import metrics
+
+# Leveled logging; LOG_LEVEL=DEBUG brings back the per-request engine traces
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logging.getLogger("httpx").setLevel(logging.WARNING) # one INFO line per provider call otherwise
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    config.check()
+    await ensure_indexes() # Also opens the Mongo connection pool before the first request
+    rate_limiter.start()
+    jobs.start() # Background engine recomputes
+    yield
+    await jobs.stop()
+    await rate_limiter.stop() # Final flush of in-memory AI usage counts
+    await close_http_client()
+    await google_auth.close()
+    await client.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,7 +44,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 🚀 UPGRADE: Per-route latency histograms + opt-in request profiler (served on /metrics)
+app.add_middleware(metrics.MetricsMiddleware, authorize=metrics_access)
+
 # 🚀 UPGRADE: Versioning
 app.include_router(auth.router, prefix="/v1/auth")
 app.include_router(finance.router, prefix="/v1/finance")
 app.include_router(ai.router, prefix="/v1/ai")
+app.include_router(jobs_routes.router, prefix="/v1/jobs")
+app.include_router(metrics_routes.router)
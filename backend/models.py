@@ -1,9 +1,15 @@
-from pydantic import BaseModel, Field, validator
-from typing import Literal, Optional
+from pydantic import BaseModel, Field, validator, BeforeValidator, PlainSerializer, WithJsonSchema
+from typing import Annotated, Literal, Optional, Union, List
 from datetime import datetime
+from utils.money import paise, rupees
+
+# 🚀 UPGRADE: Amounts validate straight to exact int paise (same result as the old round(x, 2),
+# without a str() round trip); .dict() and JSON give rupees back, so stored rows keep their shape
+Money = Annotated[int, BeforeValidator(paise), PlainSerializer(rupees, return_type=float), WithJsonSchema({"type": "number"})]
 
 class BaseMoneyModel(BaseModel):
-    @validator('*', pre=True)
+    # Non-money floats (interest rate); runs after coercion so numeric strings are rounded too
+    @validator('*')
     def round_floats(cls, v):
         if isinstance(v, float): return round(v, 2)
         return v
@@ -17,35 +23,67 @@ class GoogleLoginRequest(BaseModel):
 
 class OnboardingModel(BaseMoneyModel):
     age: int
-    salary: float
-    rent: float
-    current_savings: float
+    salary: Money
+    rent: Money
+    current_savings: Money
     saving_goal: str
 
 class AssetModel(BaseMoneyModel):
     name: str
     type: str 
-    value: float
+    value: Money
     liquidity_score: int = Field(ge=1, le=5)
 
 class LiabilityModel(BaseMoneyModel):
     name: str
     type: str 
-    outstanding_amount: float
+    outstanding_amount: Money
     interest_rate: float
-    monthly_payment: float
+    monthly_payment: Money
 
 class GoalModel(BaseMoneyModel):
     name: str
-    target_amount: float
+    target_amount: Money
     target_date: str
     priority: Literal['High', 'Medium', 'Low']
 
 class ExpenseModel(BaseMoneyModel):
     title: str
-    amount: float
+    amount: Money
     category: str = "General"
-    date: str = datetime.now().strftime("%Y-%m-%d")
+    date: str = Field(default_factory=lambda: datetime.now().strftime("%Y-%m-%d"))
 
 class AdvisorRequest(BaseModel):
-    query: str
\ No newline at end of file
+    query: str
+
+# --- WHAT-IF SCENARIOS ---
+# Amounts are monthly changes; nothing is saved
+class SalaryChange(BaseMoneyModel):
+    type: Literal['salary']
+    amount: Money # +/- per month
+
+class RentChange(BaseMoneyModel):
+    type: Literal['rent']
+    amount: Money # +/- per month
+
+class ExtraPayment(BaseMoneyModel):
+    type: Literal['extra_payment']
+    amount: Money = Field(gt=0) # Paid towards debt every month, on top of the recommended extra
+
+class NewGoal(GoalModel):
+    type: Literal['goal']
+
+class AssetSale(BaseMoneyModel):
+    type: Literal['asset_sale']
+    asset_id: str
+    price: Optional[Money] = Field(None, ge=0) # Proceeds go to savings; defaults to the asset's value
+
+ScenarioChange = Annotated[Union[SalaryChange, RentChange, ExtraPayment, NewGoal, AssetSale], Field(discriminator='type')]
+
+class Scenario(BaseModel):
+    name: str
+    changes: List[ScenarioChange] = Field(max_length=20)
+
+class ScenarioRequest(BaseModel):
+    scenarios: List[Scenario] = Field(min_length=1, max_length=20)
+
@@ -1,36 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from models import AdvisorRequest
 from services.data_service import fetch_user_snapshot
 # Import updated service functions
-from services.ai_service import check_rate_limit, log_ai_usage, get_ai_context, get_chat_history, call_llm, save_chat
+from services.ai_service import get_ai_context, get_chat_history, get_chat_page, call_llm, stream_llm, save_chat, chat_stats, is_llm_error, PAGE_SIZE
+from services import response_cache, rate_limiter
 # Import Shared Auth
-from dependencies import get_current_user
+from dependencies import get_current_user, metrics_access
 
 router = APIRouter()
 
+LIMIT_MESSAGE = "You have reached your daily limit. Please come back tomorrow!"
+
 @router.get("/advisor/history")
-def get_history_route(auth: dict = Depends(get_current_user)):
-    return get_chat_history(auth["user"]["username"], limit=50)
+async def get_history_route(limit: int = Query(50, ge=1, le=PAGE_SIZE), before: str = None, auth: dict = Depends(get_current_user)):
+    # Cursor pagination: pass back `next_cursor` as `before` to load older messages
+    cursor = None
+    if before:
+        try:
+            seq, idx = (int(x) for x in before.split("."))
+            if seq < 0 or idx < 0: raise ValueError
+            cursor = (seq, idx)
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    return await get_chat_page(auth["user"]["username"], limit=limit, before=cursor)
+
+@router.get("/advisor/cache-stats", dependencies=[Depends(metrics_access)])
+async def cache_stats_route():
+    return {**response_cache.cache_stats(), "rate_limiter": rate_limiter.limiter_stats(), "chat_store": chat_stats()}
+
+@router.get("/advisor/quota")
+async def quota_route(response: Response, auth: dict = Depends(get_current_user)):
+    q = await rate_limiter.peek(auth["user"])
+    response.headers.update(rate_limiter.headers(q))
+    return q._asdict()
 
 # 🚀 UPGRADE: Now an `async` route
 @router.post("/advisor")
-async def advisor(req: AdvisorRequest, auth: dict = Depends(get_current_user)):
+async def advisor(req: AdvisorRequest, response: Response, auth: dict = Depends(get_current_user)):
     user = auth["user"]
     if len(req.query) > 1000: raise HTTPException(400, "Query too long")
 
-    if not check_rate_limit(user["username"]):
-        return {"role": "ai", "content": "You have reached your daily limit. Please come back tomorrow!"}
+    # Fetch Data (snapshot + chat history in parallel)
+    data, history = await asyncio.gather(fetch_user_snapshot(user), get_chat_history(user["username"]))
+
+    # 🚀 UPGRADE: Repeat questions are answered from cache (free, not counted against the limit)
+    cached = response_cache.lookup(user["username"], data, req.query)
+    if cached:
+        response.headers.update(rate_limiter.headers(await rate_limiter.peek(user)))
+        await save_chat(user["username"], req.query, cached, health_score=data["health"]["score"])
+        return {"role": "ai", "content": cached, "cached": True}
 
-    # Fetch Data
-    data = fetch_user_snapshot(user)
-    context = get_ai_context(data)
-    history = get_chat_history(user["username"])
+    # 🚀 UPGRADE: In-memory quota (checked and counted in one step, no DB round trip)
+    quota = await rate_limiter.acquire(user)
+    response.headers.update(rate_limiter.headers(quota))
+    if not quota.allowed:
+        return {"role": "ai", "content": LIMIT_MESSAGE}
 
     # Async AI Call
-    ai_response = await call_llm(context, req.query, history)
+    ai_response = await call_llm(get_ai_context(data), req.query, history)
+    if not is_llm_error(ai_response): response_cache.store(user["username"], data, req.query, ai_response)
 
     # Save with Metadata
-    save_chat(user["username"], req.query, ai_response, health_score=data["health"]["score"])
-    log_ai_usage(user["username"])
+    await save_chat(user["username"], req.query, ai_response, health_score=data["health"]["score"])
+
+    return {"role": "ai", "content": ai_response}
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# 🚀 UPGRADE: Server-Sent Events; tokens are forwarded as the provider produces them
+@router.post("/advisor/stream")
+async def advisor_stream(req: AdvisorRequest, auth: dict = Depends(get_current_user)):
+    user = auth["user"]
+    if len(req.query) > 1000: raise HTTPException(400, "Query too long")
+
+    data, history = await asyncio.gather(fetch_user_snapshot(user), get_chat_history(user["username"]))
+    cached = response_cache.lookup(user["username"], data, req.query)
+    # The provider call is billed as soon as it starts, so it is counted up front
+    quota = await (rate_limiter.peek(user) if cached else rate_limiter.acquire(user))
+
+    async def events():
+        if cached:
+            await save_chat(user["username"], req.query, cached, health_score=data["health"]["score"])
+            yield sse("token", {"content": cached})
+            yield sse("done", {"role": "ai", "cached": True})
+            return
+
+        if not quota.allowed:
+            yield sse("token", {"content": LIMIT_MESSAGE})
+            yield sse("done", {"role": "ai"})
+            return
+
+        parts = []
+        async for delta in stream_llm(get_ai_context(data), req.query, history):
+            parts.append(delta)
+            yield sse("token", {"content": delta})
+
+        ai_response = "".join(parts)
+        if not is_llm_error(ai_response): response_cache.store(user["username"], data, req.query, ai_response)
+        await save_chat(user["username"], req.query, ai_response, health_score=data["health"]["score"])
+        yield sse("done", {"role": "ai"})
 
-    return {"role": "ai", "content": ai_response}
\ No newline at end of file
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **rate_limiter.headers(quota)})
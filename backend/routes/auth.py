@@ -1,17 +1,18 @@
 import os, jwt, uuid
 from datetime import datetime, timedelta
 from fastapi import APIRouter, HTTPException, Depends
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-from passlib.context import CryptContext
-from dotenv import load_dotenv
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from database import users, token_blacklist
 from models import UserAuth, GoogleLoginRequest
-from dependencies import get_current_user
+from dependencies import get_current_user, metrics_access
+from utils import auth_cache, google_auth
+from utils.passwords import hash_password, verify_password, hashing_stats, HashingBusy
 
-load_dotenv()
 router = APIRouter()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def busy():
+    return HTTPException(503, "Too many sign-ins right now, please retry", headers={"Retry-After": "1"})
 
 def create_token(data: dict):
     data.update({
@@ -23,44 +24,67 @@ def create_token(data: dict):
     return jwt.encode(data, os.getenv("SECRET_KEY"), algorithm=os.getenv("ALGORITHM"))
 
 @router.post("/register")
-def register(user: UserAuth):
-    if users.find_one({"username": user.username}): raise HTTPException(400, "User exists")
-    users.insert_one({
-        "username": user.username, 
-        "password": pwd_context.hash(user.password), 
-        "salary": 0, 
-        "rent": 0,
-        "current_savings": 0,
-        "created_at": datetime.utcnow(),
-        "auth_method": "email"
-    })
+async def register(user: UserAuth):
+    if await users.find_one({"username": user.username}): raise HTTPException(400, "User exists")
+    # Hashing is CPU-bound; it runs on the dedicated hashing pool
+    try:
+        hashed = await hash_password(user.password)
+    except HashingBusy:
+        raise busy()
+    try:
+        await users.insert_one({
+            "username": user.username, 
+            "password": hashed, 
+            "salary": 0, 
+            "rent": 0,
+            "current_savings": 0,
+            "created_at": datetime.utcnow(),
+            "auth_method": "email"
+        })
+    except DuplicateKeyError: # Registered concurrently
+        raise HTTPException(400, "User exists")
     return {"message": "Created"}
 
 @router.post("/login")
-def login(user: UserAuth):
-    u = users.find_one({"username": user.username})
-    if not u or not u.get("password") or not pwd_context.verify(user.password, u["password"]): 
-        raise HTTPException(401, "Invalid Credentials")
+async def login(user: UserAuth):
+    u = await users.find_one({"username": user.username})
+    if not u or not u.get("password"): raise HTTPException(401, "Invalid Credentials")
+    try:
+        ok, new_hash = await verify_password(user.password, u["password"])
+    except HashingBusy:
+        raise busy()
+    if not ok: raise HTTPException(401, "Invalid Credentials")
+    if new_hash:
+        # Outdated scheme/cost: swap in the new hash (only if nobody changed it meanwhile)
+        await users.update_one({"username": user.username, "password": u["password"]}, {"$set": {"password": new_hash}})
     return {"access_token": create_token({"sub": user.username}), "has_onboarded": u.get("salary", 0) > 0}
 
 @router.post("/google-login")
-def google_login(req: GoogleLoginRequest):
+async def google_login(req: GoogleLoginRequest):
+    try:
+        # Verified locally against cached Google keys (no per-login network fetch)
+        id_info = await google_auth.verify_google_token(req.token, os.getenv("GOOGLE_CLIENT_ID"))
+        email = id_info["email"]
+    except google_auth.CertsUnavailable:
+        raise HTTPException(503, "Google sign-in is unavailable, please retry")
+    except (jwt.InvalidTokenError, KeyError):
+        raise HTTPException(400, "Invalid Google Token")
+
+    # 🚀 UPGRADE: One atomic upsert-and-return instead of find / insert / find
+    new_user = {"auth_method": "google", "salary": 0, "rent": 0, "current_savings": 0, "created_at": datetime.utcnow()}
     try:
-        id_info = id_token.verify_oauth2_token(req.token, google_requests.Request(), os.getenv("GOOGLE_CLIENT_ID"))
-        email = id_info['email']
-        user = users.find_one({"username": email})
-        if not user:
-            users.insert_one({"username": email, "auth_method": "google", "salary": 0, "rent": 0, "current_savings": 0, "created_at": datetime.utcnow()})
-            user = users.find_one({"username": email})
-        return {"access_token": create_token({"sub": email}), "has_onboarded": user.get("salary", 0) > 0}
-    except Exception: raise HTTPException(400, "Invalid Google Token")
+        user = await users.find_one_and_update({"username": email}, {"$setOnInsert": new_user}, projection={"salary": 1},
+                                               upsert=True, return_document=ReturnDocument.AFTER)
+    except DuplicateKeyError: # Lost a first-login race; the other request created it
+        user = await users.find_one({"username": email}, {"salary": 1})
+    return {"access_token": create_token({"sub": email}), "has_onboarded": user.get("salary", 0) > 0}
 
 # 🚀 UPGRADE: Logout Endpoint
 @router.post("/logout")
-def logout(auth: dict = Depends(get_current_user)):
+async def logout(auth: dict = Depends(get_current_user)):
     # Upsert: If JTI exists, do nothing. If not, insert it.
     # Prevents "Duplicate Key" errors on double-clicks.
-    token_blacklist.update_one(
+    await token_blacklist.update_one(
         {"jti": auth["jti"]},
         {
             "$set": {
@@ -70,4 +94,9 @@ def logout(auth: dict = Depends(get_current_user)):
         },
         upsert=True
     )
-    return {"message": "Logged out successfully"}
\ No newline at end of file
+    auth_cache.revoke(auth["jti"], auth["token"])
+    return {"message": "Logged out successfully"}
+
+@router.get("/cache-stats", dependencies=[Depends(metrics_access)])
+async def cache_stats():
+    return {**auth_cache.stats(), "hashing": hashing_stats(), "google_certs": google_auth.cert_stats()}
\ No newline at end of file
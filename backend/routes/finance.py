@@ -1,66 +1,160 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
 from bson import ObjectId
 from database import users, expenses, assets, liabilities, goals
 from models import *
-from services.data_service import fetch_user_snapshot
+from services.data_service import current_etag, dashboard_body, projection_inputs
+from services.snapshot_service import record_insert, record_delete, record_profile, refresh_snapshot, snapshot_write, RECENT_EXPENSES
+from services.expense_service import list_expenses, BadQuery, MAX_PAGE
+from services.import_service import import_rows
+from services.scenario_service import evaluate_scenarios, scenario_stats, ScenarioError
+from services import jobs
 # FIX: Use the shared dependency
-from dependencies import get_current_user
+from dependencies import get_current_user, metrics_access
+from utils.auth_cache import invalidate_user
+from utils.responses import etag_matches, dumps
 
 router = APIRouter()
 
 @router.get("/data")
-def get_dashboard(auth: dict = Depends(get_current_user)):
+async def get_dashboard(request: Request, recent: int = Query(RECENT_EXPENSES, ge=0, le=RECENT_EXPENSES), auth: dict = Depends(get_current_user)):
     # Dependency returns {"user": ..., "jti": ..., "token": ...}
-    return fetch_user_snapshot(auth["user"])
+    # 🚀 UPGRADE: Conditional GET. An unchanged dashboard is a 304 after one small read;
+    # otherwise the pre-encoded body is sent as-is (no response model, no re-encoding).
+    # `recent` trims the embedded expense rows; older ones are paged from /expenses.
+    user = auth["user"]
+    etag = await current_etag(user, recent)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    etag, body = await dashboard_body(user, etag, recent)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"} if etag else None
+    return Response(body, media_type="application/json", headers=headers)
+
+@router.get("/projection")
+async def get_projection(years: int = 10, paths: int = 10000, seed: int = 0, auth: dict = Depends(get_current_user)):
+    # 🚀 UPGRADE: Monte Carlo range ("what's my 10-year range") on top of the snapshot totals
+    from services.monte_carlo import projection # numpy loads on the first projection, not at startup
+    inputs = await projection_inputs(auth["user"])
+    return await run_in_threadpool(projection, *inputs, years=years, paths=paths, seed=seed)
+
+@router.post("/scenarios")
+async def run_scenarios(req: ScenarioRequest, auth: dict = Depends(get_current_user)):
+    # 🚀 UPGRADE: "What if my rent goes up?" without saving anything. Up to 20 scenarios per
+    # request against the cached engine inputs of the current snapshot, side by side with the base
+    try:
+        result = await evaluate_scenarios(auth["user"], req.scenarios)
+    except ScenarioError as e:
+        raise HTTPException(400, str(e))
+    return Response(dumps(result), media_type="application/json")
+
+@router.get("/scenarios/cache-stats", dependencies=[Depends(metrics_access)])
+async def scenario_cache_stats():
+    return scenario_stats()
+
+@router.get("/expenses")
+async def get_expenses(
+    limit: int = Query(50, ge=1, le=MAX_PAGE),
+    before: str = None,
+    start: date = None,
+    end: date = None,
+    category: str = None,
+    fields: str = None,
+    auth: dict = Depends(get_current_user)
+):
+    # Expense history, newest first: pass `next_cursor` back as `before` for the next page.
+    # start/end (inclusive) and category filter; `fields=title,amount` trims each row.
+    try:
+        return await list_expenses(auth["user"]["username"], limit, before, start, end, category, fields)
+    except BadQuery as e:
+        raise HTTPException(400, str(e))
 
 # --- CRUD ROUTES ---
+# Each write also applies its delta to the user's materialized snapshot and schedules
+# a background recompute of the engine result
+
+async def _add(coll, kind, d, auth):
+    uname = auth["user"]["username"]
+    doc = {**d.dict(), "username": uname}
+    async with snapshot_write(uname):
+        await coll.insert_one(doc)
+        await record_insert(uname, kind, doc)
+    jobs.schedule(auth["user"])
+    return {"msg": "ok"}
+
+async def _delete(coll, kind, id, auth):
+    # Security Fix: Ensure user owns the item
+    uname = auth["user"]["username"]
+    # FIX: A malformed id is just "not found", checked before the snapshot guard (which would flag a rebuild on a 500)
+    if not ObjectId.is_valid(id): raise HTTPException(404, "Not found")
+    async with snapshot_write(uname):
+        doc = await coll.find_one_and_delete({"_id": ObjectId(id), "username": uname})
+        if doc: await record_delete(uname, kind, doc)
+    if not doc: raise HTTPException(404, "Not found")
+    jobs.schedule(auth["user"])
+    return {"msg": "ok"}
 
 @router.post("/onboard")
-def onboard(data: OnboardingModel, auth: dict = Depends(get_current_user)):
-    users.update_one({"username": auth["user"]["username"]}, {"$set": data.dict()})
+async def onboard(data: OnboardingModel, auth: dict = Depends(get_current_user)):
+    await users.update_one({"username": auth["user"]["username"]}, {"$set": data.dict()})
+    await record_profile(auth["user"]["username"], data.dict())
+    jobs.schedule(auth["user"])
+    invalidate_user(auth["user"]["username"])
     return {"msg": "Updated"}
 
 @router.post("/expenses")
-def add_e(d: ExpenseModel, auth: dict = Depends(get_current_user)):
-    expenses.insert_one({**d.dict(), "username": auth["user"]["username"]})
-    return {"msg": "ok"}
+async def add_e(d: ExpenseModel, auth: dict = Depends(get_current_user)):
+    return await _add(expenses, "expenses", d, auth)
 
 @router.delete("/expenses/{id}")
-def del_e(id: str, auth: dict = Depends(get_current_user)):
-    # Security Fix: Ensure user owns the item
-    res = expenses.delete_one({"_id": ObjectId(id), "username": auth["user"]["username"]})
-    if res.deleted_count == 0: raise HTTPException(404, "Not found")
-    return {"msg": "ok"}
+async def del_e(id: str, auth: dict = Depends(get_current_user)):
+    return await _delete(expenses, "expenses", id, auth)
 
 @router.post("/assets")
-def add_a(d: AssetModel, auth: dict = Depends(get_current_user)):
-    assets.insert_one({**d.dict(), "username": auth["user"]["username"]})
-    return {"msg": "ok"}
+async def add_a(d: AssetModel, auth: dict = Depends(get_current_user)):
+    return await _add(assets, "assets", d, auth)
 
 @router.delete("/assets/{id}")
-def del_a(id: str, auth: dict = Depends(get_current_user)):
-    res = assets.delete_one({"_id": ObjectId(id), "username": auth["user"]["username"]})
-    if res.deleted_count == 0: raise HTTPException(404, "Not found")
-    return {"msg": "ok"}
+async def del_a(id: str, auth: dict = Depends(get_current_user)):
+    return await _delete(assets, "assets", id, auth)
 
 @router.post("/liabilities")
-def add_l(d: LiabilityModel, auth: dict = Depends(get_current_user)):
-    liabilities.insert_one({**d.dict(), "username": auth["user"]["username"]})
-    return {"msg": "ok"}
+async def add_l(d: LiabilityModel, auth: dict = Depends(get_current_user)):
+    return await _add(liabilities, "liabilities", d, auth)
 
 @router.delete("/liabilities/{id}")
-def del_l(id: str, auth: dict = Depends(get_current_user)):
-    res = liabilities.delete_one({"_id": ObjectId(id), "username": auth["user"]["username"]})
-    if res.deleted_count == 0: raise HTTPException(404, "Not found")
-    return {"msg": "ok"}
+async def del_l(id: str, auth: dict = Depends(get_current_user)):
+    return await _delete(liabilities, "liabilities", id, auth)
 
 @router.post("/goals")
-def add_g(d: GoalModel, auth: dict = Depends(get_current_user)):
-    goals.insert_one({**d.dict(), "username": auth["user"]["username"]})
-    return {"msg": "ok"}
+async def add_g(d: GoalModel, auth: dict = Depends(get_current_user)):
+    return await _add(goals, "goals", d, auth)
 
 @router.delete("/goals/{id}")
-def del_g(id: str, auth: dict = Depends(get_current_user)):
-    res = goals.delete_one({"_id": ObjectId(id), "username": auth["user"]["username"]})
-    if res.deleted_count == 0: raise HTTPException(404, "Not found")
-    return {"msg": "ok"}
\ No newline at end of file
+async def del_g(id: str, auth: dict = Depends(get_current_user)):
+    return await _delete(goals, "goals", id, auth)
+
+# --- BULK IMPORT ---
+IMPORTS = {
+    "expenses": (expenses, ExpenseModel),
+    "assets": (assets, AssetModel),
+    "liabilities": (liabilities, LiabilityModel),
+    "goals": (goals, GoalModel),
+}
+
+@router.post("/import/{kind}")
+async def bulk_import(kind: str, request: Request, format: Literal["csv", "jsonl"] = None, dedup: bool = False, auth: dict = Depends(get_current_user)):
+    # 🚀 UPGRADE: One request for a whole statement. Body is CSV (header row) or JSON Lines,
+    # streamed and inserted in batches; `external_id` (or dedup=true) makes re-uploads idempotent.
+    if kind not in IMPORTS: raise HTTPException(404, "Unknown import type")
+    coll, model = IMPORTS[kind]
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "jsonl")
+
+    # Rows carry no snapshot deltas: the guard keeps a rebuild that runs mid-import from sticking
+    async with snapshot_write(auth["user"]["username"]):
+        result = await import_rows(coll, model, auth["user"]["username"], request.stream(), fmt, dedup)
+    if result["inserted"]:
+        await refresh_snapshot(auth["user"])
+        jobs.schedule(auth["user"])
+    return result
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException
+from dependencies import get_current_user, get_admin
+from services import jobs
+from services.snapshot_service import snapshot_state
+from services.data_service import health_state, HEALTH_STALENESS
+
+router = APIRouter()
+
+@router.get("/me")
+async def my_recompute(auth: dict = Depends(get_current_user)):
+    # Whether the dashboard's engine result reflects the latest write yet
+    user = auth["user"]
+    state = await snapshot_state(user)
+    return {
+        "health": (state and health_state(state)) or "pending",
+        "recompute": jobs.recompute_status(user["username"]),
+        "rev": state and state.get("rev"),
+        "health_rev": state and state.get("health_rev"),
+        "staleness_bound_seconds": HEALTH_STALENESS,
+    }
+
+# Bulk jobs are for users in ADMIN_USERS (dependencies.py)
+@router.post("/rescore", status_code=202)
+async def start_rescore(auth: dict = Depends(get_admin)):
+    return jobs.rescore_all()
+
+@router.get("/")
+async def list_jobs(auth: dict = Depends(get_admin)):
+    return jobs.job_stats()
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, auth: dict = Depends(get_admin)):
+    job = jobs.get_job(job_id)
+    if job is None: raise HTTPException(404, "Job not found")
+    return job
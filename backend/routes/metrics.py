@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from dependencies import metrics_access
+from utils import metrics
+
+# FIX: Latencies, route names and stack samples aren't public: the METRICS_TOKEN bearer or an admin
+router = APIRouter(dependencies=[Depends(metrics_access)])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_route():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/profiles/{profile_id}", response_class=PlainTextResponse)
+async def profile_route(profile_id: str):
+    # Folded stacks ("frame;frame;frame count"), ready for flamegraph.pl / speedscope
+    profile = metrics.get_profile(profile_id)
+    if profile is None: raise HTTPException(404, "Profile not found")
+    return profile
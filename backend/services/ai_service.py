@@ -1,21 +1,14 @@
 import os
-import httpx # Async Client
+import json
+import time
+import logging
 from datetime import datetime
-from database import ai_usage, chats
-from utils.security import encrypt_text, decrypt_text
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from database import chats, chat_pages
+from utils.security import encrypt_text, decrypt_page
+from utils.metrics import llm_request, llm_first_token, ENABLED as METRICS_ENABLED
 
-AI_DAILY_LIMIT = 20
-
-def check_rate_limit(username: str) -> bool:
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    usage_count = ai_usage.count_documents({
-        "username": username,
-        "created_at": {"$gte": today_start}
-    })
-    return usage_count < AI_DAILY_LIMIT
-
-def log_ai_usage(username: str):
-    ai_usage.insert_one({"username": username, "created_at": datetime.utcnow()})
+log = logging.getLogger(__name__)
 
 def get_ai_context(user_data):
     h = user_data["health"]
@@ -34,19 +27,70 @@ def get_ai_context(user_data):
     - Goals: {goal_status}
     """
 
-def get_chat_history(username: str, limit=6):
-    history_doc = chats.find_one({"username": username})
-    recent_context = []
-    if history_doc:
-        for msg in history_doc.get("messages", [])[-limit:]:
-            recent_context.append({
-                "role": msg["role"], 
-                "content": decrypt_text(msg["content"])
-            })
-    return recent_context
+# 🚀 UPGRADE: Bucketed chat store. Messages live in fixed-size pages (chat_pages, one doc per
+# PAGE_SIZE messages, seq 0..N) so no document grows unbounded and reads only touch the tail.
+PAGE_SIZE = 50
+SAVE_ATTEMPTS = 5 # Optimistic appends before a message is given up on
+stats = {"saved": 0, "dropped": 0}
+
+async def _decrypt(messages):
+    plain = await decrypt_page([m["content"] for m in messages])
+    return [{"role": m["role"], "content": c} for m, c in zip(messages, plain)]
+
+async def _migrate_legacy(username: str):
+    """Splits a pre-bucketing `chats` document into pages, once, then removes it."""
+    legacy = await chats.find_one({"username": username})
+    if not legacy: return False
+    messages = legacy.get("messages", [])
+    pages = [{"username": username, "seq": i // PAGE_SIZE, "count": len(messages[i:i + PAGE_SIZE]), "messages": messages[i:i + PAGE_SIZE]}
+             for i in range(0, len(messages), PAGE_SIZE)]
+    try:
+        if pages: await chat_pages.insert_many(pages)
+    except BulkWriteError:
+        pass # Another request migrated it first
+    await chats.delete_one({"_id": legacy["_id"]})
+    return bool(pages)
+
+async def _page(username: str, seq=None, window=None):
+    """One page (latest when seq is None) with only `window` messages projected via $slice."""
+    query = {"username": username}
+    if seq is not None: query["seq"] = seq
+    page = await chat_pages.find_one(query, {"seq": 1, "count": 1, "messages": {"$slice": window}}, sort=[("seq", -1)])
+    if page is None and seq is None and await _migrate_legacy(username):
+        page = await chat_pages.find_one(query, {"seq": 1, "count": 1, "messages": {"$slice": window}}, sort=[("seq", -1)])
+    return page
+
+async def get_chat_page(username: str, limit=50, before=None):
+    """
+    Up to `limit` messages (oldest first) ending just before the `before` cursor, newest
+    messages when no cursor is given. Cursors are "<seq>.<index>" of the oldest message
+    returned; cost is O(limit) regardless of history length.
+    """
+    collected, cursor = [], None
+    if before is None:
+        page = await _page(username, window=-limit)
+        start = page["count"] - len(page["messages"]) if page else 0
+    else:
+        seq, idx = before
+        start = max(0, idx - limit)
+        page = await _page(username, seq, [start, idx - start]) if idx > 0 else {"seq": seq, "messages": []}
+
+    while page:
+        collected = page["messages"] + collected
+        cursor = (page["seq"], start)
+        need = limit - len(collected)
+        if need <= 0 or start > 0 or page["seq"] == 0: break
+        page = await _page(username, page["seq"] - 1, -need)
+        start = page["count"] - len(page["messages"]) if page else 0
+
+    more = cursor is not None and (cursor[1] > 0 or cursor[0] > 0)
+    return {"messages": await _decrypt(collected), "next_cursor": f"{cursor[0]}.{cursor[1]}" if more else None}
+
+async def get_chat_history(username: str, limit=6):
+    return (await get_chat_page(username, limit))["messages"]
 
 # 🚀 UPGRADE: Store Metadata
-def save_chat(username: str, user_query: str, ai_response: str, health_score: int):
+async def save_chat(username: str, user_query: str, ai_response: str, health_score: int):
     # Simple heuristic to guess topic
     topic = "general"
     if "debt" in user_query.lower() or "loan" in user_query.lower(): topic = "debt"
@@ -64,31 +108,124 @@ def save_chat(username: str, user_query: str, ai_response: str, health_score: in
             }
         }
     ]
-    chats.update_one({"username": username}, {"$push": {"messages": {"$each": new_messages}}}, upsert=True)
+    n = len(new_messages)
+    for _ in range(SAVE_ATTEMPTS):
+        latest = await _page(username, window=0)
+        # Append to the newest page while it has room (the count guard makes this race-safe)
+        if latest and latest["count"] + n <= PAGE_SIZE:
+            res = await chat_pages.update_one(
+                {"_id": latest["_id"], "count": {"$lte": PAGE_SIZE - n}},
+                {"$push": {"messages": {"$each": new_messages}}, "$inc": {"count": n}}
+            )
+            if res.modified_count:
+                stats["saved"] += 1
+                return
+        # Otherwise open the next page; the unique (username, seq) index settles races
+        try:
+            await chat_pages.insert_one({"username": username, "seq": latest["seq"] + 1 if latest else 0, "count": n, "messages": new_messages})
+            stats["saved"] += 1
+            return
+        except DuplicateKeyError:
+            continue
+    # FIX: The answer has already gone out, so the exchange is not failed over history;
+    # it is logged and counted (cache-stats "chat_store") instead of vanishing silently
+    stats["dropped"] += 1
+    log.error("❌ Chat message for %s dropped after %d contended saves", username, SAVE_ATTEMPTS)
 
-# 🚀 UPGRADE: Async Call
-async def call_llm(context: str, query: str, history: list):
-    api_key = os.getenv('OPENROUTER_API_KEY')
-    if not api_key: return "System Error: API Key missing."
+def chat_stats():
+    return dict(stats)
 
-    messages = (
+# 🚀 UPGRADE: One pooled HTTP/2 client for the app lifetime (keep-alive, no per-call TLS handshake)
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+LLM_MODEL = "meta-llama/llama-3-8b-instruct"
+_http_client = None
+
+def get_http_client():
+    global _http_client
+    if _http_client is None:
+        import httpx # Loaded with the first LLM call; workers that never call one skip it
+        _http_client = httpx.AsyncClient(
+            base_url=OPENROUTER_BASE_URL,
+            http2=True,
+            timeout=15.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60)
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+# Replies that must never be cached or treated as advice
+LLM_ERROR_PREFIXES = ("System Error:", "Provider Error", "I am currently offline")
+
+def is_llm_error(text: str) -> bool:
+    return not text or text.startswith(LLM_ERROR_PREFIXES)
+
+def build_messages(context: str, query: str, history: list):
+    return (
         [{"role": "system", "content": context + "\nKeep answers under 3 sentences."}]
         + history
         + [{"role": "user", "content": query}]
     )
 
+# 🚀 UPGRADE: Async Call
+async def call_llm(context: str, query: str, history: list):
+    api_key = os.getenv('OPENROUTER_API_KEY')
+    if not api_key: return "System Error: API Key missing."
+
+    start, outcome = time.perf_counter(), "error"
     try:
-        async with httpx.AsyncClient() as client:
-            res = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={"Authorization": f"Bearer {api_key}"},
-                json={"model": "meta-llama/llama-3-8b-instruct", "messages": messages},
-                timeout=15.0
-            )
-            if res.status_code == 200:
-                return res.json()["choices"][0]["message"]["content"]
-            else:
-                return f"Provider Error ({res.status_code}). Try again."
+        res = await get_http_client().post(
+            "/chat/completions",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json={"model": LLM_MODEL, "messages": build_messages(context, query, history)}
+        )
+        if res.status_code == 200:
+            outcome = "ok"
+            return res.json()["choices"][0]["message"]["content"]
+        else:
+            outcome = str(res.status_code)
+            return f"Provider Error ({res.status_code}). Try again."
+    except Exception as e:
+        log.warning("Async LLM Error: %s", e)
+        return "I am currently offline due to a connection error."
+    finally:
+        if METRICS_ENABLED: llm_request.observe(time.perf_counter() - start, "complete", outcome)
+
+async def stream_llm(context: str, query: str, history: list):
+    """Yields completion text as the provider streams it (OpenAI-style SSE chunks)."""
+    api_key = os.getenv('OPENROUTER_API_KEY')
+    if not api_key:
+        yield "System Error: API Key missing."
+        return
+
+    start, first, outcome = time.perf_counter(), True, "error"
+    try:
+        async with get_http_client().stream(
+            "POST", "/chat/completions",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json={"model": LLM_MODEL, "messages": build_messages(context, query, history), "stream": True}
+        ) as res:
+            if res.status_code != 200:
+                outcome = str(res.status_code)
+                yield f"Provider Error ({res.status_code}). Try again."
+                return
+            async for line in res.aiter_lines():
+                # Skip keep-alive comments (": OPENROUTER PROCESSING") and blank separators
+                if not line.startswith("data:"): continue
+                data = line[5:].strip()
+                if data == "[DONE]": break
+                delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                if delta:
+                    if first and METRICS_ENABLED: llm_first_token.observe(time.perf_counter() - start)
+                    first = False
+                    yield delta
+            outcome = "ok"
     except Exception as e:
-        print(f"Async LLM Error: {e}")
-        return "I am currently offline due to a connection error."
\ No newline at end of file
+        log.warning("Async LLM Stream Error: %s", e)
+        yield "I am currently offline due to a connection error."
+    finally:
+        if METRICS_ENABLED: llm_request.observe(time.perf_counter() - start, "stream", outcome)
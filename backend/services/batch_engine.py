@@ -0,0 +1,97 @@
+import numpy as np
+from services.financial_engine import (
+    Calendar, calculate_from_totals, debt_strategy_for, analyze_goals, score_for, health_report,
+    projection_months, project_net_worth
+)
+
+# Column sums stay far away from int64 overflow below this bound (₹10 lakh crore per value)
+MAX_PAISE = 10 ** 15
+TOTALS = ("total_expense", "total_debt", "total_emi", "asset_value", "liquid_value")
+FIGURES = ("total_debt", "total_emi", "total_assets", "net_worth", "actual_burn", "emergency_months", "surplus")
+
+def fits(p):
+    """Paise value (engine records already hold int paise), or None if too large for the columns."""
+    return p if abs(p) < MAX_PAISE else None
+
+# --- BATCH ENGINE ---
+def calculate_from_totals_batch(rows):
+    """
+    Scores many users in one call. `rows` is a sequence of (profile, totals, liabilities, goals)
+    tuples, exactly as passed to `calculate_from_totals` (what the rescore job builds from
+    snapshots); results come back in the same order.
+
+    Money is held as int64 paise columns so the aggregation figures, emergency months and
+    allocation run as array ops. Debt plans and the goal waterfall still run per user, but
+    their date math (target dates parsed, "Mon YYYY" labels) goes through one Calendar shared
+    by the batch, which is most of what those stages cost. Projections stay exact integer
+    fractions per user: a float64 recurrence would round differently from the scalar engine.
+    Any row with a value beyond MAX_PAISE is scored by the scalar engine, so output is
+    bit-identical.
+    """
+    rows = list(rows)
+    results = [None] * len(rows)
+    cal = Calendar()
+
+    idx, cols, alloc_vals, alloc_codes, alloc_keys = [], [], [], [], []
+
+    # 1. COLUMNAR BUILD (single pass, scalar fallback per row)
+    for i, (profile, totals, liabilities, goals) in enumerate(rows):
+        row = [fits(profile.salary), fits(profile.rent), fits(profile.current_savings)] + [fits(totals[k]) for k in TOTALS]
+        buckets = [(k, fits(v)) for k, v in totals["allocation"].items()]
+        if None in row or any(p is None for _, p in buckets):
+            results[i] = calculate_from_totals(profile, totals, liabilities, goals)
+            continue
+
+        r = len(idx)
+        idx.append(i)
+        cols.append(row)
+        # Allocation buckets keep their order, with Cash accumulated last
+        codes = {}
+        for k, p in buckets + [('Cash', row[2])]:
+            alloc_codes.append(codes.setdefault(k, len(alloc_keys) + len(codes))); alloc_vals.append(p)
+        alloc_keys += [(r, k) for k in codes]
+
+    if not idx: return results
+
+    # 2. AGGREGATIONS
+    salary, rent, savings, total_expense, total_debt, total_emi, asset_value, liquid_value = np.array(cols, dtype=np.int64).T
+    total_assets = savings + asset_value
+    liquid_assets = savings + liquid_value
+    net_worth = total_assets - total_debt
+    actual_burn = rent + total_expense + total_emi
+    surplus = salary - actual_burn
+
+    # 3. EMERGENCY MONTHS (int64 -> float64 division is correctly rounded, like the scalar int / int)
+    emergency_months = liquid_assets / np.maximum(actual_burn, 100)
+
+    # 4. PROJECTIONS (exact integer fractions, same helper as the scalar engine)
+    labels = projection_months(cal.today.year, cal.today.month)
+
+    # 5. ALLOCATION (exact paise buckets, then the same float division as the scalar engine)
+    owner = np.array([r for r, _ in alloc_keys], dtype=np.int64)
+    sums = np.zeros(len(alloc_keys), dtype=np.int64)
+    np.add.at(sums, np.array(alloc_codes, dtype=np.int64), np.array(alloc_vals, dtype=np.int64))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = (sums / 100 / (total_assets[owner] / 100) * 100).tolist()
+    alloc = {}
+    for (r, k), v in zip(alloc_keys, pct): alloc.setdefault(r, {})[k] = round(v, 1)
+
+    # 6. PER-USER STAGES + ASSEMBLY
+    figures = zip(total_debt.tolist(), total_emi.tolist(), total_assets.tolist(), net_worth.tolist(),
+                  actual_burn.tolist(), emergency_months.tolist(), surplus.tolist())
+    for r, (i, f) in enumerate(zip(idx, figures)):
+        profile, totals, liabilities, goals = rows[i]
+        f = dict(zip(FIGURES, f), available_to_invest=max(0, f[-1]))
+        debt_strategy = debt_strategy_for(liabilities, f["total_debt"], f["total_emi"], f["surplus"], cal=cal)
+        projections = [{"month": m, "net_worth": v} for m, v in zip(labels, project_net_worth(f["net_worth"], f["surplus"]))]
+        results[i] = health_report(profile, f, debt_strategy, analyze_goals(goals, f["available_to_invest"], cal), projections,
+                                   alloc[r] if f["total_assets"] > 0 else {}, score_for(f["surplus"], f["emergency_months"], debt_strategy),
+                                   totals["expense_summary"])
+    return results
+
+# --- DIFFERENTIAL CHECK ---
+def diff_against_scalar(rows, results=None):
+    """Re-scores (profile, totals, liabilities, goals) `rows` with the scalar engine; indices whose output differs."""
+    rows = list(rows)
+    if results is None: results = calculate_from_totals_batch(rows)
+    return [i for i, (r, out) in enumerate(zip(rows, results)) if calculate_from_totals(*r) != out]
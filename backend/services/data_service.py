@@ -1,78 +1,198 @@
-import traceback
+import os
+import time
+import logging
+import hashlib
+import orjson
+from datetime import datetime
+from cachetools import LRUCache
 # FIX: Use absolute imports assuming running from backend root
-from database import expenses, assets, liabilities, goals
-from services.financial_engine import calculate_financial_health, EngineProfile, EngineAsset, EngineLiability, EngineGoal
+from services.financial_engine import ENGINE_VERSION, calculate_from_totals, expense_summary, EngineProfile, EngineLiability, EngineGoal
+from services.snapshot_service import load_snapshot, snapshot_state, store_health, bucket_type, snapshot_months, RECENT_EXPENSES
+from utils.metrics import stage
+from utils.responses import dumps
+from utils.money import rupees
+
+log = logging.getLogger(__name__)
 
 def serialize(items):
     for i in items: i["id"] = str(i["_id"]); del i["_id"]
     return items
 
-def fetch_user_snapshot(user):
+def engine_inputs(snap):
+    """Engine models + running totals (paise) from a materialized snapshot (no collection scans)."""
+    p = snap.get("profile", {})
+    profile = EngineProfile.from_doc(p)
+
+    t = snap.get("totals", {})
+    summary = expense_summary(snapshot_months(snap)) # month/category buckets, not expense rows
+    totals = {
+        "total_expense": summary["monthly_burn"],
+        "expense_summary": summary,
+        "total_debt": t.get("debt", 0),
+        "total_emi": t.get("emi", 0),
+        "asset_value": t.get("assets", 0),
+        "liquid_value": t.get("liquid_assets", 0),
+        "allocation": {bucket_type(k): b.get("value", 0) for k, b in snap.get("allocation", {}).items() if b.get("count", 0) > 0}
+    }
+
+    # Single pass per list straight into slotted records (rows were validated on write)
+    e_liabs = [EngineLiability.from_doc(l) for l in snap.get("liabilities", [])]
+    e_goals = [EngineGoal.from_doc(g) for g in snap.get("goals", [])]
+    return profile, totals, e_liabs, e_goals
+
+async def projection_inputs(user):
+    """(allocation incl. cash, salary, burn excl. EMI, [(outstanding, rate, EMI)]) for the Monte Carlo engine."""
+    profile, totals, e_liabs, _ = engine_inputs(await load_snapshot(user))
+    allocation = {k: rupees(v) for k, v in totals["allocation"].items()}
+    allocation["Cash"] = allocation.get("Cash", 0) + rupees(profile.current_savings)
+    loans = [(rupees(l.outstanding_amount), l.interest_rate, rupees(l.monthly_payment)) for l in e_liabs]
+    return allocation, rupees(profile.salary), rupees(profile.rent + totals["total_expense"]), loans
+
+# 🚀 UPGRADE: Engine results are computed off the request path (services/jobs.py) and stored
+# on the snapshot. A read uses the stored result while it's current, or stale by at most
+# HEALTH_STALENESS_SECONDS since the first write it doesn't include; past that (or when
+# nothing usable is stored) it computes inline and stores the result itself.
+HEALTH_STALENESS = float(os.getenv("HEALTH_STALENESS_SECONDS", "10"))
+
+def today():
+    return f"{datetime.now():%Y-%m-%d}"
+
+def health_state(snap, now=None):
+    """"fresh", "stale" (within the staleness bound) or None (must be computed)."""
+    if snap.get("health_version") != ENGINE_VERSION or snap.get("health_day") != today(): return None
+    if snap.get("health_rev") == snap.get("rev"): return "fresh"
+    dirty = snap.get("dirty_since")
+    return "stale" if dirty is not None and (now or time.time()) - dirty <= HEALTH_STALENESS else None
+
+def health_rev(snap):
+    """Rev the served engine result is computed from."""
+    return snap.get("health_rev") if health_state(snap) else snap.get("rev")
+
+def compute_health(snap):
+    with stage("inputs"):
+        profile, totals, e_liabs, e_goals = engine_inputs(snap)
+    return calculate_from_totals(profile, totals, e_liabs, e_goals)
+
+def score_snapshots(snaps):
+    """
+    (day, [(username, rev, health JSON)], failures) for a shard of snapshots. Runs in the
+    rescore worker processes; the shard is scored in one batch engine call.
+    """
+    from services.batch_engine import calculate_from_totals_batch # numpy loads in the workers, not at startup
+    day, rows, failed = today(), [], 0
+    for snap in snaps:
+        try:
+            rows.append((snap, engine_inputs(snap)))
+        except Exception:
+            log.exception("❌ FINANCIAL ENGINE CRASHED for %s", snap.get("username"))
+            failed += 1
+
+    try:
+        results = calculate_from_totals_batch([r for _, r in rows])
+    except Exception:
+        # One bad row fails the whole batch; score one by one so only that user is skipped
+        results = []
+        for snap, r in rows:
+            try:
+                results.append(calculate_from_totals(*r))
+            except Exception:
+                log.exception("❌ FINANCIAL ENGINE CRASHED for %s", snap.get("username"))
+                results.append(None)
+                failed += 1
+
+    scored = [(snap["username"], snap.get("rev"), dumps(h)) for (snap, _), h in zip(rows, results) if h is not None]
+    return day, scored, failed
+
+async def fetch_user_snapshot(user, snap=None):
     uname = user["username"]
-    print(f"\n--- DEBUG: Fetching data for {uname} ---")
-    
-    # 1. Fetch raw data
+    log.debug("Fetching data for %s", uname)
+
+    # 1. Fetch materialized snapshot (one document; rebuilt only on ENGINE_VERSION bumps)
     try:
-        u_expenses = list(expenses.find({"username": uname}).sort("date", -1).limit(50))
-        u_assets = list(assets.find({"username": uname}))
-        u_liabs = list(liabilities.find({"username": uname}))
-        u_goals = list(goals.find({"username": uname}))
-        print(f"DEBUG: Found {len(u_expenses)} expenses, {len(u_assets)} assets, {len(u_liabs)} liabilities")
+        if snap is None:
+            with stage("snapshot"):
+                snap = await load_snapshot(user)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Snapshot rev %s: %d expenses, %d assets, %d liabilities", snap.get('rev'),
+                      len(snap.get('expenses', [])), len(snap.get('assets', [])), len(snap.get('liabilities', [])))
     except Exception as e:
-        print(f"❌ DATABASE ERROR: {e}")
+        log.error("❌ DATABASE ERROR: %s", e)
         return {}
 
-    # 2. Run Engine
+    # 2. Stored engine result, or run the engine
     try:
-        profile = EngineProfile(
-            salary=user.get("salary", 0), 
-            rent=user.get("rent", 0), 
-            current_savings=user.get("current_savings", 0)
-        )
-        
-        e_assets = [EngineAsset(name=a.get('name',''), type=a.get('type',''), value=a.get('value',0), liquidity_score=a.get('liquidity_score',1)) for a in u_assets]
-        
-        e_liabs = [EngineLiability(name=l.get('name',''), type=l.get('type',''), outstanding_amount=l.get('outstanding_amount',0), interest_rate=l.get('interest_rate',0), monthly_payment=l.get('monthly_payment',0)) for l in u_liabs]
-        
-        e_goals = [EngineGoal(
-            name=g.get('name',''), 
-            target_amount=g.get('target_amount',0), 
-            target_date=g.get('target_date','2030-01-01'), 
-            priority=g.get('priority','Medium'),
-            id=str(g['_id'])
-        ) for g in u_goals]
-
-        print("DEBUG: Running Financial Engine...")
-        health = calculate_financial_health(profile, u_expenses, e_assets, e_liabs, e_goals)
-        print(f"DEBUG: Engine Success! Score: {health.get('score')}")
+        if health_state(snap):
+            health = orjson.loads(snap["health_json"])
+        else:
+            health = compute_health(snap)
+            log.debug("Engine success for %s, score %s", uname, health.get('score'))
+            if await store_health(uname, snap.get("rev"), dumps(health), today()):
+                snap.update(health_rev=snap.get("rev"), health_version=ENGINE_VERSION, health_day=today())
+
+    except Exception:
+        # Logs the EXACT line number of the error
+        log.exception("❌ FINANCIAL ENGINE CRASHED for %s", uname)
 
-    except Exception as e:
-        print(f"\n❌ FINANCIAL ENGINE CRASHED ❌")
-        print(f"Error: {e}")
-        traceback.print_exc() # This prints the EXACT line number of the error
-        
         # Fallback to prevent frontend white screen
         health = {
-            "score": 0, "net_worth": 0, "surplus": 0, "monthly_burn": 0, 
-            "recommended_investment": 0, "emergency_months": 0, 
-            "debt_strategy": {"strategy": "None", "freedom_date": "N/A"}, 
+            "score": 0, "net_worth": 0, "surplus": 0, "monthly_burn": 0,
+            "recommended_investment": 0, "emergency_months": 0,
+            "debt_strategy": {"strategy": "None", "freedom_date": "N/A"},
             "projections": [], "analyzed_goals": []
         }
 
     # 3. Handle Goals Fallback
     final_goals = health.get("analyzed_goals", [])
-    if not final_goals and u_goals:
-        print("DEBUG: Engine failed to analyze goals, returning raw goals.")
-        final_goals = serialize(u_goals)
-        for g in final_goals: g.setdefault("status", "Pending")
+    if not final_goals and snap.get("goals"):
+        log.debug("Engine failed to analyze goals, returning raw goals.")
+        final_goals = [{**g, "status": g.get("status", "Pending")} for g in snap["goals"]]
 
+    profile = snap.get("profile", {})
     return {
-        "user_profile": {"salary": user.get("salary"), "rent": user.get("rent")},
+        "user_profile": {"salary": profile.get("salary"), "rent": profile.get("rent")},
         "health": health,
         "lists": {
-            "expenses": serialize(u_expenses),
-            "assets": serialize(u_assets),
-            "liabilities": serialize(u_liabs),
+            "expenses": snap.get("expenses", []),
+            "assets": snap.get("assets", []),
+            "liabilities": snap.get("liabilities", []),
             "goals": final_goals
         }
-    }
\ No newline at end of file
+    }
+
+# 🚀 UPGRADE: Encoded dashboards. The payload only changes with the snapshot rev (and the rev
+# the engine result was computed from), the engine release and the calendar day (months-left,
+# current month), so those make the ETag and the last encoded body per user is reused until it changes.
+_bodies = LRUCache(maxsize=int(os.getenv("DASHBOARD_CACHE_SIZE", "1000"))) # (username, recent) -> (etag, body)
+
+def dashboard_etag(username, rev, recent=RECENT_EXPENSES):
+    key = f"{username}:{rev}:{recent}:{ENGINE_VERSION}:{datetime.now():%Y-%m-%d}"
+    return '"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+def snapshot_etag(username, snap, recent=RECENT_EXPENSES):
+    return dashboard_etag(username, f"{snap.get('rev')}.{health_rev(snap)}", recent)
+
+async def current_etag(user, recent=RECENT_EXPENSES):
+    """ETag of the dashboard as it stands (one projected read), None if a rebuild is due."""
+    state = await snapshot_state(user)
+    return snapshot_etag(user["username"], state, recent) if state else None
+
+async def dashboard_body(user, etag=None, recent=RECENT_EXPENSES):
+    """
+    (ETag, JSON bytes) of the dashboard with `recent` expense rows; engine and encoding run
+    only when `etag` moved on.
+    """
+    uname = user["username"]
+    cached = _bodies.get((uname, recent))
+    if etag and cached and cached[0] == etag: return cached
+
+    try:
+        with stage("snapshot"):
+            snap = await load_snapshot(user)
+    except Exception as e:
+        log.error("❌ DATABASE ERROR: %s", e)
+        return None, dumps({})
+    data = await fetch_user_snapshot(user, snap) # stores a fresh engine result on `snap` if it computes one
+    if data.get("lists"): data["lists"]["expenses"] = data["lists"]["expenses"][:recent]
+    with stage("encode"):
+        _bodies[(uname, recent)] = entry = (snapshot_etag(uname, snap, recent), dumps(data))
+    return entry
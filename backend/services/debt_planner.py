@@ -0,0 +1,75 @@
+import math
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+# Plans longer than this are reported as a debt trap, same as a loan that never amortizes
+MAX_MONTHS = 600
+NEVER = 999
+
+class Payoff(NamedTuple):
+    months: int
+    total_interest: Optional[float]
+    order: Tuple[str, ...]
+
+# --- CLOSED-FORM AMORTIZATION ---
+def months_to_zero(balance, rate, payment):
+    """Months until `balance` at monthly `rate` is cleared by a fixed `payment` (inf if never)."""
+    if balance <= 0: return 0
+    if payment <= 0: return math.inf
+    if rate == 0: return math.ceil(balance / payment - 1e-9)
+    if payment <= balance * rate: return math.inf
+    return math.ceil(-math.log1p(-rate * balance / payment) / math.log1p(rate) - 1e-9)
+
+def balance_after(balance, rate, payment, months):
+    """Outstanding balance after `months` fixed payments."""
+    if rate == 0: return balance - payment * months
+    growth = (1 + rate) ** months
+    return balance * growth - payment * (growth - 1) / rate
+
+# --- SIMULATION ---
+def _simulate(loans, extra, order):
+    """
+    Pays every loan its own EMI and sends `extra` (plus the EMI of every loan already
+    cleared) to the first open loan in `order`. Between payoffs nothing rolls over, so
+    each phase jumps straight to the next payoff with the closed form instead of
+    stepping month by month: cost is O(loans²), independent of tenure.
+    """
+    balances = {i: loans[i][1] for i in order if loans[i][1] > 0}
+    rates = [l[2] / 1200 for l in loans]
+    pool, month, interest, cleared = extra, 0, 0.0, []
+
+    while balances:
+        target = next(i for i in order if i in balances)
+        pays = {i: loans[i][3] + (pool if i == target else 0) for i in balances}
+        left = {i: months_to_zero(balances[i], rates[i], pays[i]) for i in balances}
+        step = min(left.values())
+        if step == math.inf or month + step > MAX_MONTHS: return Payoff(NEVER, None, tuple(cleared))
+
+        for i in list(balances):
+            bal, r, pay = balances[i], rates[i], pays[i]
+            if left[i] == step:
+                # Last instalment only covers what is left
+                paid = pay * (step - 1) + balance_after(bal, r, pay, step - 1) * (1 + r)
+                interest += paid - bal
+                pool += loans[i][3]
+                cleared.append(loans[i][0])
+                del balances[i]
+            else:
+                new_bal = balance_after(bal, r, pay, step)
+                interest += new_bal - bal + pay * step
+                balances[i] = new_bal
+        month += step
+
+    return Payoff(month, round(interest, 2), tuple(cleared))
+
+@lru_cache(maxsize=4096)
+def plan_debts(loans, extra):
+    """
+    Avalanche (highest rate first) and Snowball (smallest balance first) payoff plans.
+    `loans` is a tuple of (name, outstanding, annual_rate_pct, monthly_payment); results
+    are memoized on it, so repeated dashboard loads do no simulation at all.
+    """
+    idx = range(len(loans))
+    avalanche = sorted(idx, key=lambda i: (-loans[i][2], loans[i][1]))
+    snowball = sorted(idx, key=lambda i: (loans[i][1], -loans[i][2]))
+    return {"Avalanche": _simulate(loans, extra, avalanche), "Snowball": _simulate(loans, extra, snowball)}
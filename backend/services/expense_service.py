@@ -0,0 +1,59 @@
+import base64
+from datetime import date, timedelta
+from bson import ObjectId
+from database import expenses
+
+# 🚀 UPGRADE: Expense history with keyset pagination. Pages are walked newest first on
+# (date, _id), so each page is one range scan on the (username, date, _id) index (or the
+# category one) however deep into the history it is. Cursors are opaque to the client.
+MAX_PAGE = 200
+FIELDS = ("title", "amount", "category", "date")
+
+class BadQuery(ValueError):
+    """Invalid cursor, range or field list (reported as 400)."""
+
+def encode_cursor(row):
+    raw = f"{row['date']}\x00{row['_id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        day, oid = raw.split("\x00")
+        return day, ObjectId(oid)
+    except Exception:
+        raise BadQuery("Invalid cursor")
+
+def projection(fields):
+    """Mongo projection for a comma-separated field list; date and _id are always kept (cursor)."""
+    wanted = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(FIELDS)
+    unknown = set(wanted) - set(FIELDS)
+    if unknown: raise BadQuery(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return {f: 1 for f in wanted} | {"date": 1}
+
+def build_query(username, start: date = None, end: date = None, category=None, before=None):
+    query = {"username": username}
+    if category: query["category"] = category
+    if start or end:
+        if start and end and start > end: raise BadQuery("start is after end")
+        # Dates are stored as "YYYY-MM-DD..." strings; `end` is inclusive, so compare against the next day
+        query["date"] = {k: v for k, v in (("$gte", start and start.isoformat()), ("$lt", end and (end + timedelta(days=1)).isoformat())) if v}
+    if before:
+        day, oid = decode_cursor(before)
+        after_cursor = {"$or": [{"date": {"$lt": day}}, {"date": day, "_id": {"$lt": oid}}]}
+        query = {"$and": [query, after_cursor]}
+    return query
+
+async def list_expenses(username, limit=50, before=None, start=None, end=None, category=None, fields=None):
+    """
+    One page of a user's expenses, newest first, plus `next_cursor` for the page after it
+    (None on the last page).
+    """
+    limit = max(1, min(int(limit), MAX_PAGE))
+    docs = await expenses.find(build_query(username, start, end, category, before), projection(fields)) \
+        .sort([("date", -1), ("_id", -1)]).limit(limit + 1).to_list()
+    more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(docs[-1]) if more else None
+    for d in docs: d["id"] = str(d.pop("_id"))
+    return {"expenses": docs, "next_cursor": next_cursor}
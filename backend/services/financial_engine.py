@@ -1,148 +1,349 @@
-from decimal import Decimal, ROUND_HALF_UP, InvalidOperation
 from datetime import datetime
-from typing import List, Literal, Optional
-from pydantic import BaseModel
+from typing import Optional
+from dataclasses import dataclass
 from dateutil.relativedelta import relativedelta
 from collections import defaultdict
+from functools import lru_cache
+from services.debt_planner import plan_debts, NEVER
+from services.goal_planner import plan_goals
+from utils.metrics import stage
+from utils.money import paise, rupees, FAST_LIMIT
 
-ENGINE_VERSION = "3.2.1" 
+ENGINE_VERSION = "3.6.0" 
 
 # --- INTERNAL MODELS ---
-class EngineAsset(BaseModel):
-    name: str; type: str; value: Decimal; liquidity_score: int
+# 🚀 UPGRADE: Slotted records instead of Pydantic models. Rows are already validated at the
+# API boundary, so each Mongo document is converted exactly once in `from_doc`.
+# Money fields are int paise (utils.money); interest rates stay float percentages.
+@dataclass(slots=True)
+class EngineAsset:
+    name: str; type: str; value: int; liquidity_score: int
 
-class EngineLiability(BaseModel):
-    name: str; type: str; outstanding_amount: Decimal; interest_rate: Decimal; monthly_payment: Decimal
+    @classmethod
+    def from_doc(cls, d):
+        return cls(d.get('name', ''), d.get('type', ''), to_paise(d.get('value', 0)), int(d.get('liquidity_score', 0) or 0))
 
-class EngineGoal(BaseModel):
+@dataclass(slots=True)
+class EngineLiability:
+    name: str; type: str; outstanding_amount: int; interest_rate: float; monthly_payment: int
+
+    @classmethod
+    def from_doc(cls, d):
+        return cls(d.get('name', ''), d.get('type', ''), to_paise(d.get('outstanding_amount', 0)), to_rate(d.get('interest_rate', 0)), to_paise(d.get('monthly_payment', 0)))
+
+@dataclass(slots=True)
+class EngineGoal:
     name: str
-    target_amount: Decimal
+    target_amount: int
     target_date: str
     priority: str
-    id: Optional[str] = None 
+    id: Optional[str] = None
+
+    @classmethod
+    def from_doc(cls, d):
+        return cls(d.get('name', ''), to_paise(d.get('target_amount', 0)), d.get('target_date', '2030-01-01'), d.get('priority', 'Medium'), d.get('id'))
+
+@dataclass(slots=True)
+class EngineProfile:
+    salary: int; rent: int; current_savings: int
 
-class EngineProfile(BaseModel):
-    salary: Decimal; rent: Decimal; current_savings: Decimal
+    @classmethod
+    def from_doc(cls, d):
+        return cls(to_paise(d.get('salary', 0)), to_paise(d.get('rent', 0)), to_paise(d.get('current_savings', 0)))
 
 # --- SAFE MATH UTILS ---
-def to_d(value):
-    """Safely converts input to Decimal. Returns 0 on failure."""
+def to_paise(value):
+    """Paise for a stored amount. Returns 0 on failure."""
+    if type(value) is float and -FAST_LIMIT < value < FAST_LIMIT:
+        # Hot path (one call per expense): stored amounts are 2dp floats that map straight back
+        p = round(value * 100)
+        if p / 100 == value: return p
     try:
-        return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    except:
-        return Decimal("0.00")
+        return paise(value if value is not None else 0)
+    except ValueError:
+        return 0
 
-def calculate_financial_health(profile, expenses, assets, liabilities, goals):
-    # 1. AGGREGATIONS
-    total_expense = sum(to_d(e.get('amount', 0)) for e in expenses)
-    total_debt = sum(l.outstanding_amount for l in liabilities)
-    total_emi = sum(l.monthly_payment for l in liabilities)
-    
-    liquid_assets = profile.current_savings + sum(a.value for a in assets if a.liquidity_score >= 4)
-    total_assets = profile.current_savings + sum(a.value for a in assets)
-    net_worth = total_assets - total_debt
+def to_rate(value):
+    """Interest rate (% a year) as a float. Returns 0 on failure."""
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
 
-    actual_burn = profile.rent + total_expense + total_emi
-    
-    # 🚀 FIX: Ensure emergency_months is defined before use
-    # We use max(actual_burn, 1) to avoid DivisionByZero errors
-    emergency_months = float(liquid_assets / max(actual_burn, Decimal("1.0")))
-    
-    surplus = profile.salary - actual_burn
-    
-    # 2. DEBT STRATEGY
+def mean_paise(total, n):
+    """Average in whole paise, halves rounded away from zero (as ROUND_HALF_UP did)."""
+    q, r = divmod(abs(total), n)
+    if 2 * r >= n: q += 1
+    return q if total >= 0 else -q
+
+# --- EXPENSE AGGREGATES ---
+ROLLING_WINDOWS = (3, 6, 12) # Months averaged for the burn baseline
+
+def expense_category(e):
+    c = e.get('category')
+    return "General" if c is None else str(c)
+
+def expense_months(expenses):
+    """{"YYYY-MM": {category: paise}} from raw rows; the in-memory twin of the snapshot's Mongo aggregation."""
+    months = defaultdict(lambda: defaultdict(int))
+    for e in expenses:
+        months[str(e.get('date', ''))[:7]][expense_category(e)] += to_paise(e.get('amount', 0))
+    return months
+
+@lru_cache(maxsize=4)
+def month_keys(year, month):
+    """This month and the ones before it, newest first, as "YYYY-MM"."""
+    first = datetime(year, month, 1)
+    return tuple((first - relativedelta(months=i)).strftime("%Y-%m") for i in range(max(ROLLING_WINDOWS) + 1))
+
+def expense_summary(months, today=None):
+    """
+    Monthly burn from month/category buckets (paise). Burn is the larger of this month's spend
+    and the average of the 3 previous months, so a quiet first week doesn't inflate the surplus.
+    Cost depends on the number of buckets, not on how many expenses a user has.
+    """
+    today = today or datetime.now()
+    keys = month_keys(today.year, today.month)
+    totals = [sum(months.get(k, {}).values()) for k in keys]
+    rolling = {n: mean_paise(sum(totals[1:n + 1]), n) for n in ROLLING_WINDOWS}
+    return {
+        "monthly_burn": max(totals[0], rolling[3]),
+        "current_month": totals[0],
+        "rolling_avg": rolling,
+        "categories": {c: p for c, p in months.get(keys[0], {}).items() if p}
+    }
+
+def expense_report(summary):
+    """Rupee view of `expense_summary` for the API response."""
+    return {
+        "current_month": rupees(summary["current_month"]),
+        "rolling_avg": {f"{n}m": rupees(p) for n, p in summary["rolling_avg"].items()},
+        "categories": {c: rupees(p) for c, p in summary["categories"].items()}
+    }
+
+# --- DATES ---
+class Calendar:
+    """
+    Month arithmetic against one `today`, memoized: the batch engine shares one across a whole
+    batch so each target date is parsed and each "Mon YYYY" label formatted once.
+    """
+    __slots__ = ("today", "_labels", "_months_left")
+
+    def __init__(self, today=None):
+        self.today = today or datetime.now()
+        self._labels, self._months_left = {}, {}
+
+    def label(self, months):
+        """today + `months`, as "Mon YYYY" (what relativedelta + strftime gave: the day never moves the month)."""
+        out = self._labels.get(months)
+        if out is None:
+            y, m = divmod(self.today.month - 1 + months, 12)
+            out = self._labels[months] = datetime(self.today.year + y, m + 1, 1).strftime("%b %Y")
+        return out
+
+    def months_left(self, target_date):
+        """Whole months from this month to a "YYYY-MM-DD" target (at least 1; 12 if it doesn't parse)."""
+        out = self._months_left.get(target_date)
+        if out is None:
+            try:
+                t_date = datetime.strptime(target_date, "%Y-%m-%d")
+                out = max(1, (t_date.year - self.today.year) * 12 + (t_date.month - self.today.month))
+            except: out = 12
+            self._months_left[target_date] = out
+        return out
+
+def debt_strategy_for(liabilities, total_debt, total_emi, surplus, committed=0, cal=None):
+    """
+    Amounts in paise. `committed` is a fixed extra payment on top of the recommended one; `surplus`
+    is after it, and the recommended half is taken from the surplus before it.
+    """
     debt_strategy = {"strategy": "None", "freedom_date": "N/A", "recommended_extra_payment": 0, "months_to_freedom": 0}
     
     if liabilities and total_debt > 0:
-        max_possible_pay = min(surplus * Decimal("0.5"), total_debt)
-        extra = max(Decimal(0), max_possible_pay)
-        
-        if total_debt > 0:
-            weighted_interest = sum(l.outstanding_amount * (l.interest_rate / 100) for l in liabilities) / total_debt
-            monthly_rate = weighted_interest / 12
-        else:
-            monthly_rate = Decimal("0.0125")
-
-        months = 0
-        balance = total_debt
-        
-        while balance > 0 and months < 120:
-            months += 1
-            interest = (balance * monthly_rate).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-            payment = total_emi + extra
-            
-            if interest >= payment:
-                months = 999 
-                break
-                
-            balance = balance + interest - payment
-            if balance < 0: balance = 0
-            
-        freedom_date = "Never (Debt Trap)" if months == 999 else (datetime.now() + relativedelta(months=months)).strftime("%b %Y")
+        # Half the surplus capped at the debt, plus the committed payment, counted in half-paise so it stays exact
+        extra = (max(0, min(surplus + committed, 2 * total_debt)) + 2 * committed) / 200
+
+        # 🚀 UPGRADE: Each loan is simulated separately; pick the cheaper of Avalanche / Snowball
+        loans = tuple((l.name, rupees(l.outstanding_amount), l.interest_rate, rupees(l.monthly_payment)) for l in liabilities)
+        plans = plan_debts(loans, extra)
+        name = min(plans, key=lambda k: (plans[k].months, plans[k].total_interest or 0))
+        best = plans[name]
+
+        months = best.months
+        freedom_date = "Never (Debt Trap)" if months == NEVER else (cal or Calendar()).label(months)
 
         debt_strategy = {
-            "strategy": "Avalanche",
-            "recommended_extra_payment": float(extra),
+            "strategy": name,
+            "recommended_extra_payment": extra,
             "freedom_date": freedom_date,
-            "months_to_freedom": months
+            "months_to_freedom": months,
+            "total_interest": best.total_interest,
+            "payoff_order": list(best.order),
+            "comparison": {k: {"months_to_freedom": p.months, "total_interest": p.total_interest} for k, p in plans.items()}
         }
+    return debt_strategy
 
-    # 3. GOAL FEASIBILITY
-    analyzed_goals = []
-    today = datetime.now()
-    available_to_invest = max(Decimal(0), surplus)
-
+def analyze_goals(goals, available_to_invest, cal=None):
+    """
+    🚀 UPGRADE: Goals share one surplus. It is split as a waterfall by priority and deadline,
+    so five goals can no longer each claim the whole surplus and report "On Track".
+    """
+    cal = cal or Calendar()
+    rows = []
     for g in goals:
-        try:
-            t_date = datetime.strptime(g.target_date, "%Y-%m-%d")
-            months_left = (t_date.year - today.year) * 12 + (t_date.month - today.month)
-            if months_left <= 0: months_left = 1
-        except: months_left = 12
-        
-        req_monthly = g.target_amount / Decimal(months_left)
+        months_left = cal.months_left(g.target_date)
+        rows.append((rupees(g.target_amount), g.target_amount / (100 * months_left), g.priority, months_left))
+
+    allocated, completion = plan_goals(rows, rupees(available_to_invest))
+
+    analyzed_goals = []
+    for g, (target, req_monthly, _, months_left), alloc, months in zip(goals, rows, allocated, completion):
+        funded = 100.0 if req_monthly <= 0 else min(100.0, alloc / req_monthly * 100)
         status = "On Track"
-        if req_monthly > available_to_invest: status = "At Risk"
-        if req_monthly > available_to_invest * 2: status = "Unrealistic"
+        if funded < 100: status = "At Risk"
+        if funded < 50: status = "Unrealistic"
 
         analyzed_goals.append({
-            **g.dict(),
-            "target_amount": float(g.target_amount),
-            "required_monthly": float(req_monthly),
+            "name": g.name,
+            "target_amount": target,
+            "target_date": g.target_date,
+            "priority": g.priority,
+            "id": g.id,
+            "required_monthly": req_monthly,
             "months_left": months_left,
-            "status": status
+            "status": status,
+            "allocated_monthly": round(alloc, 2),
+            "funded_pct": round(funded, 1),
+            "months_to_complete": months,
+            "completion_date": "Never" if months is None else cal.label(months)
         })
+    return analyzed_goals
 
-    # 4. PROJECTIONS
-    projections = []
-    curr = net_worth
-    for i in range(1, 13):
-        growth = (curr * Decimal("0.005")) if curr > 0 else 0
-        curr += growth + surplus
-        projections.append({"month": (datetime.now() + relativedelta(months=i)).strftime("%b"), "net_worth": float(curr)})
+@lru_cache(maxsize=4)
+def projection_months(year, month):
+    """Labels of the 12 months after this one."""
+    first = datetime(year, month, 1)
+    return tuple((first + relativedelta(months=i)).strftime("%b") for i in range(1, 13))
 
-    # 5. ALLOCATION
-    allocation = defaultdict(float)
-    if total_assets > 0:
-        for a in assets: allocation[a.type] += float(a.value)
-        allocation['Cash'] += float(profile.current_savings)
-        allocation = {k: round(v/float(total_assets)*100, 1) for k, v in allocation.items()}
+def project_net_worth(net_worth, surplus):
+    """
+    Net worth (rupees) at the end of each of the next 12 months: 0.5% growth while positive,
+    plus the surplus. Kept as an exact fraction of paise (over 200^k) so nothing rounds until
+    the float at the end.
+    """
+    num, den, path = net_worth, 1, []
+    for _ in range(12):
+        if num > 0: num, den = num * 201, den * 200
+        num += surplus * den
+        path.append(num / (100 * den))
+    return path
 
-    # 6. SCORING
+def score_for(surplus, emergency_months, debt_strategy):
     score = 50
     if surplus > 0: score += 15
     if emergency_months > 3: score += 15
     if debt_strategy.get("months_to_freedom", 0) > 60: score -= 20
+    return max(0, min(100, score))
+
+def aggregate_totals(expenses, assets, liabilities):
+    """Running totals the engine needs (paise); also what the materialized snapshot keeps up to date."""
+    allocation = defaultdict(int)
+    for a in assets: allocation[a.type] += a.value
+    summary = expense_summary(expense_months(expenses))
+    return {
+        "total_expense": summary["monthly_burn"],
+        "expense_summary": summary,
+        "total_debt": sum(l.outstanding_amount for l in liabilities),
+        "total_emi": sum(l.monthly_payment for l in liabilities),
+        "asset_value": sum(a.value for a in assets),
+        "liquid_value": sum(a.value for a in assets if a.liquidity_score >= 4),
+        "allocation": allocation
+    }
+
+def calculate_financial_health(profile, expenses, assets, liabilities, goals):
+    with stage("expense_aggregation"):
+        totals = aggregate_totals(expenses, assets, liabilities)
+    return calculate_from_totals(profile, totals, liabilities, goals)
 
+# --- STAGES ---
+# 🚀 UPGRADE: Each engine stage is a function of a few figures, so what-if scenarios
+# (services/scenario_service.py) can rerun only the stages whose inputs a change touches.
+def engine_figures(profile, totals, committed=0):
+    """
+    Aggregation stage: the figures every later stage reads (paise; emergency months a float).
+    `committed` is extra monthly spend on top of the burn (a scenario's extra debt payment).
+    """
+    liquid_assets = profile.current_savings + totals["liquid_value"]
+    total_assets = profile.current_savings + totals["asset_value"]
+    actual_burn = profile.rent + totals["total_expense"] + totals["total_emi"] + committed
+    surplus = profile.salary - actual_burn
+    return {
+        "total_debt": totals["total_debt"],
+        "total_emi": totals["total_emi"],
+        "total_assets": total_assets,
+        "net_worth": total_assets - totals["total_debt"],
+        "actual_burn": actual_burn,
+        # 🚀 FIX: Ensure emergency_months is defined before use
+        # We use max(actual_burn, ₹1) to avoid DivisionByZero errors
+        "emergency_months": liquid_assets / max(actual_burn, 100),
+        "surplus": surplus,
+        "available_to_invest": max(0, surplus)
+    }
+
+def projections_for(net_worth, surplus):
+    today = datetime.now()
+    labels = projection_months(today.year, today.month)
+    return [{"month": m, "net_worth": v} for m, v in zip(labels, project_net_worth(net_worth, surplus))]
+
+def allocation_for(buckets, current_savings, total_assets):
+    """Share of total assets (%) per asset type; savings count as Cash."""
+    if total_assets <= 0: return {}
+    buckets = dict(buckets)
+    buckets['Cash'] = buckets.get('Cash', 0) + current_savings
+    total = rupees(total_assets)
+    return {k: round(rupees(v)/total*100, 1) for k, v in buckets.items()}
+
+def health_report(profile, figures, debt_strategy, analyzed_goals, projections, allocation, score, expense_summary):
+    """The engine's output document (rupees)."""
     return {
         "engine_version": ENGINE_VERSION,
-        "score": max(0, min(100, score)),
-        "net_worth": float(net_worth),
-        "surplus": float(surplus),
-        "monthly_burn": float(actual_burn),
-        "recommended_investment": float(min(available_to_invest * Decimal("0.3"), profile.salary * Decimal("0.2"))),
-        "emergency_months": round(emergency_months, 1),
+        "score": score,
+        "net_worth": rupees(figures["net_worth"]),
+        "surplus": rupees(figures["surplus"]),
+        "monthly_burn": rupees(figures["actual_burn"]),
+        # min(30% of surplus, 20% of salary), in tenths of paise
+        "recommended_investment": min(figures["available_to_invest"] * 3, profile.salary * 2) / 1000,
+        "emergency_months": round(figures["emergency_months"], 1),
         "debt_strategy": debt_strategy,
         "projections": projections,
         "analyzed_goals": analyzed_goals,
-        "allocation": allocation
-    }
\ No newline at end of file
+        "allocation": allocation,
+        "expenses": expense_report(expense_summary)
+    }
+
+def calculate_from_totals(profile, totals, liabilities, goals):
+    # 1. AGGREGATIONS
+    with stage("aggregation"):
+        f = engine_figures(profile, totals)
+
+    # 2. DEBT STRATEGY
+    with stage("debt"):
+        debt_strategy = debt_strategy_for(liabilities, f["total_debt"], f["total_emi"], f["surplus"])
+
+    # 3. GOAL FEASIBILITY
+    with stage("goals"):
+        analyzed_goals = analyze_goals(goals, f["available_to_invest"])
+
+    # 4. PROJECTIONS
+    with stage("projections"):
+        projections = projections_for(f["net_worth"], f["surplus"])
+
+    # 5. ALLOCATION
+    with stage("allocation"):
+        allocation = allocation_for(totals["allocation"], profile.current_savings, f["total_assets"])
+
+    # 6. SCORING
+    with stage("scoring"):
+        score = score_for(f["surplus"], f["emergency_months"], debt_strategy)
+
+    return health_report(profile, f, debt_strategy, analyzed_goals, projections, allocation, score, totals["expense_summary"])
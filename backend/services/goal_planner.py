@@ -0,0 +1,67 @@
+import heapq
+import math
+
+# Goals that can't be reached within this many months report no completion date
+MAX_MONTHS = 600
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+
+def waterfall_order(goals):
+    """Funding order: priority first, then the nearest deadline, then input order."""
+    return sorted(range(len(goals)), key=lambda i: (PRIORITY_RANK.get(goals[i][2], 1), goals[i][3], i))
+
+def plan_goals(goals, available):
+    """
+    Splits one monthly surplus across all goals as a waterfall.
+
+    goals -- [(target amount, required monthly, priority, months left)]
+
+    Goals are funded in `waterfall_order` up to their required monthly amount; the first
+    goal that doesn't fit gets what is left and the rest get nothing. When a goal is
+    reached its contribution flows down to the next one. Funded goals keep a fixed rate,
+    so their finish time is known the moment they are fully funded: events go through a
+    heap and the whole plan is O(n log n) however many goals there are.
+
+    Returns (allocated monthly now, months to completion or None) per goal, in input order.
+    """
+    n = len(goals)
+    order = waterfall_order(goals)
+    alloc, finish = [0.0] * n, [None] * n
+    remaining = [max(0.0, float(g[0])) for g in goals]
+    for i in range(n):
+        if remaining[i] <= 0: finish[i] = 0.0 # nothing left to save
+    free, t, ptr, events = max(0.0, float(available)), 0.0, 0, []
+    first = True
+
+    def fund():
+        nonlocal free, ptr
+        while ptr < n:
+            i = order[ptr]
+            req = float(goals[i][1])
+            if remaining[i] > 0:
+                if not free >= req > 0: return
+                free -= req
+                heapq.heappush(events, (t + remaining[i] / req, i, req))
+                if first: alloc[i] = req
+            ptr += 1
+
+    fund()
+    if first and ptr < n: alloc[order[ptr]] = free
+    first = False
+
+    while t <= MAX_MONTHS and (events or (ptr < n and free > 0)):
+        # Next event: a fully funded goal completes, or the partially funded one gets there first
+        m = order[ptr] if ptr < n else None
+        m_done = t + remaining[m] / free if m is not None and free > 0 else math.inf
+        if events and events[0][0] <= m_done:
+            done, i, req = heapq.heappop(events)
+            if m is not None: remaining[m] -= free * (done - t)
+            t, finish[i] = done, done
+            free += req
+        else:
+            t, finish[m] = m_done, m_done
+            remaining[m] = 0
+            ptr += 1
+        fund()
+
+    months = [None if f is None or f > MAX_MONTHS else max(0, math.ceil(f - 1e-9)) for f in finish]
+    return alloc, months
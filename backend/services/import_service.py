@@ -0,0 +1,115 @@
+import os
+import csv
+import json
+import codecs
+import hashlib
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+# Bulk import: rows are streamed off the request body, validated with the same models as the
+# single-row routes and written in unordered batches. Memory stays bounded by one batch.
+BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "500"))
+MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "50000"))
+MAX_ERRORS = 100 # Per-row errors echoed back; the counts are always complete
+
+def _error(e):
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(str(p) for p in x['loc'])}: {x['msg']}" for x in e.errors())
+    return str(e)
+
+# --- PARSING ---
+async def iter_lines(chunks):
+    """Decoded lines from a byte stream (chunk boundaries may split lines or UTF-8 sequences)."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    tail = ""
+    async for chunk in chunks:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines: yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail: yield tail.rstrip("\r")
+
+async def iter_records(chunks, fmt):
+    """(row number, dict) per record, or (row number, Exception) for rows that don't parse."""
+    row = 0
+    if fmt == "jsonl":
+        async for line in iter_lines(chunks):
+            if not line.strip(): continue
+            row += 1
+            try:
+                rec = json.loads(line)
+                yield row, rec if isinstance(rec, dict) else ValueError("Expected a JSON object")
+            except ValueError as e:
+                yield row, e
+        return
+
+    header, pending = None, ""
+    async for line in iter_lines(chunks):
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2: continue # quoted field spans lines
+        record, pending = pending, ""
+        if not record.strip(): continue
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, ValueError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        # Empty cells fall back to model defaults (e.g. expense category/date)
+        yield row, {k: v for k, v in zip(header, values) if v != ""}
+    if pending:
+        yield row + 1, ValueError("Unterminated quoted field")
+
+# --- DEDUP ---
+def import_key(raw, doc, dedup):
+    """Client `external_id` if given, else a content hash when dedup is on, else None."""
+    if raw.get("external_id") not in (None, ""): return str(raw["external_id"])
+    if dedup: return hashlib.sha1(json.dumps(doc, sort_keys=True, default=str).encode()).hexdigest()
+    return None
+
+# --- WRITING ---
+async def _flush(coll, batch, result):
+    docs = [d for _, d in batch]
+    try:
+        res = await coll.insert_many(docs, ordered=False)
+        result["inserted"] += len(res.inserted_ids)
+    except BulkWriteError as e:
+        result["inserted"] += e.details.get("nInserted", 0)
+        for err in e.details.get("writeErrors", []):
+            if err.get("code") == 11000:
+                result["duplicates"] += 1
+            else:
+                _fail(result, batch[err["index"]][0], err.get("errmsg", "Write failed"))
+    batch.clear()
+
+def _fail(result, row, message):
+    result["failed"] += 1
+    if len(result["errors"]) < MAX_ERRORS: result["errors"].append({"row": row, "error": message})
+
+async def import_rows(coll, model, username, chunks, fmt, dedup=False):
+    """Validates and inserts every record in the stream; returns counts plus per-row errors."""
+    result = {"inserted": 0, "duplicates": 0, "failed": 0, "errors": [], "truncated": False}
+    batch = []
+    async for row, rec in iter_records(chunks, fmt):
+        if row > MAX_ROWS:
+            result["truncated"] = True
+            break
+        if isinstance(rec, Exception):
+            _fail(result, row, _error(rec))
+            continue
+        try:
+            doc = model(**rec).dict()
+        except (ValidationError, TypeError) as e:
+            _fail(result, row, _error(e))
+            continue
+
+        key = import_key(rec, doc, dedup)
+        doc["username"] = username
+        if key: doc["import_key"] = key
+        batch.append((row, doc))
+        if len(batch) >= BATCH_SIZE: await _flush(coll, batch, result)
+
+    if batch: await _flush(coll, batch, result)
+    return result
@@ -0,0 +1,183 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+from pymongo import UpdateOne
+from database import snapshots
+from services.financial_engine import ENGINE_VERSION
+from services.snapshot_service import load_snapshot, store_health, health_update
+from services.data_service import health_state, compute_health, score_snapshots, today
+from utils.responses import dumps
+
+# 🚀 UPGRADE: Engine results are recomputed in the background. A CRUD write schedules a
+# recompute for its user, debounced so a burst of writes (or an import) costs one engine run;
+# an in-process asyncio queue stands in for a broker and a few worker tasks drain it. Handlers
+# read the stored result (see data_service.HEALTH_STALENESS for the staleness bound), and a
+# "rescore all users" job fans the snapshots out over a process pool, one shard per core, and
+# each shard is scored in one batch engine call (services/batch_engine).
+DEBOUNCE = float(os.getenv("RECOMPUTE_DEBOUNCE_SECONDS", "0.5"))
+MAX_DELAY = float(os.getenv("RECOMPUTE_MAX_DELAY_SECONDS", "3")) # A steady stream of writes still gets scored
+WORKERS = int(os.getenv("RECOMPUTE_WORKERS", "2"))
+PROCESSES = int(os.getenv("RESCORE_PROCESSES", str(os.cpu_count() or 1)))
+CHUNK = int(os.getenv("RESCORE_CHUNK", "500")) # Snapshots per shard sent to a process
+JOBS_KEPT = 100
+
+log = logging.getLogger(__name__)
+_queue = None      # asyncio.Queue of users; None while the workers aren't running
+_timers = {}       # username -> (debounce TimerHandle, time of the first write it covers)
+_queued = set()    # usernames in the queue (a user is queued at most once)
+_running = set()   # usernames being recomputed
+_workers = []
+_tasks = set()     # running rescore jobs
+_jobs = OrderedDict() # job id -> status, newest last
+stats = {"scheduled": 0, "computed": 0, "skipped": 0, "errors": 0}
+
+# --- PER-USER RECOMPUTE ---
+def schedule(user):
+    """Debounced background recompute after a write to `user`'s data."""
+    if _queue is None: return # Workers not running (scripts): reads compute inline
+    uname = user["username"]
+    loop = asyncio.get_running_loop()
+    now = loop.time()
+    handle, first = _timers.get(uname, (None, now))
+    if handle: handle.cancel()
+    delay = max(0.0, min(DEBOUNCE, first + MAX_DELAY - now))
+    _timers[uname] = (loop.call_later(delay, _enqueue, user), first)
+    stats["scheduled"] += 1
+
+def _enqueue(user):
+    uname = user["username"]
+    _timers.pop(uname, None)
+    if uname not in _queued:
+        _queued.add(uname)
+        _queue.put_nowait(user)
+
+async def recompute(user):
+    """Scores the user's current snapshot and stores the result; False if it was already current."""
+    snap = await load_snapshot(user)
+    if health_state(snap) == "fresh":
+        stats["skipped"] += 1
+        return False
+    health = await run_in_threadpool(compute_health, snap)
+    # Conditional on rev: if another write landed meanwhile, its own recompute stores the result
+    stored = await store_health(user["username"], snap.get("rev"), dumps(health), today())
+    stats["computed" if stored else "skipped"] += 1
+    return stored
+
+async def _worker():
+    while True:
+        user = await _queue.get()
+        uname = user["username"]
+        _queued.discard(uname)
+        _running.add(uname)
+        try:
+            await recompute(user)
+        except Exception:
+            stats["errors"] += 1
+            log.exception("❌ Recompute failed for %s", uname)
+        finally:
+            _running.discard(uname)
+            _queue.task_done()
+
+def recompute_status(username):
+    if username in _running: return "running"
+    if username in _queued: return "queued"
+    if username in _timers: return "scheduled"
+    return "idle"
+
+# --- RESCORE ALL USERS ---
+def _new_job(kind):
+    job = {"id": uuid.uuid4().hex[:12], "kind": kind, "state": "queued", "created": time.time(),
+           "started": None, "finished": None, "total": 0, "done": 0, "updated": 0, "failed": 0, "error": None}
+    _jobs[job["id"]] = job
+    while len(_jobs) > JOBS_KEPT: _jobs.popitem(last=False)
+    return job
+
+def rescore_all():
+    """Starts a rescore of every user (or returns the one already running)."""
+    running = next((j for j in reversed(_jobs.values()) if j["kind"] == "rescore" and j["state"] in ("queued", "running")), None)
+    if running: return running
+    job = _new_job("rescore")
+    task = asyncio.create_task(_rescore(job))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
+
+async def _save_shard(job, future):
+    day, scored, failed = future.result()
+    if scored:
+        res = await snapshots.bulk_write(
+            [UpdateOne({"username": u, "rev": rev}, health_update(rev, body, day)) for u, rev, body in scored], ordered=False)
+        job["updated"] += res.modified_count
+    job["done"] += len(scored) + failed
+    job["failed"] += failed
+
+async def _rescore(job):
+    job["state"], job["started"] = "running", time.time()
+    import multiprocessing # Loaded only when a rescore runs
+    from concurrent.futures import ProcessPoolExecutor
+    loop = asyncio.get_running_loop()
+    # spawn: forking a process that runs an event loop and a Mongo client isn't safe
+    pool = ProcessPoolExecutor(PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        query = {"engine_version": ENGINE_VERSION}
+        job["total"] = await snapshots.count_documents(query)
+        # The engine only reads totals, buckets, liabilities and goals
+        cursor = snapshots.find(query, {"expenses": 0, "assets": 0, "health_json": 0})
+        pending, shard = set(), []
+
+        async def submit(shard):
+            nonlocal pending
+            pending.add(loop.run_in_executor(pool, score_snapshots, shard))
+            # Keep a couple of shards per process in flight; stream the rest from the cursor
+            while len(pending) >= 2 * PROCESSES:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for f in done: await _save_shard(job, f)
+
+        async for snap in cursor:
+            shard.append(snap)
+            if len(shard) >= CHUNK:
+                await submit(shard)
+                shard = []
+        if shard: await submit(shard)
+        if pending:
+            done, _ = await asyncio.wait(pending)
+            for f in done: await _save_shard(job, f)
+        job["state"] = "done"
+    except asyncio.CancelledError:
+        job["state"] = "cancelled"
+        raise
+    except Exception as e:
+        log.exception("❌ Rescore job %s failed", job["id"])
+        job["state"], job["error"] = "failed", str(e)
+    finally:
+        job["finished"] = time.time()
+        await run_in_threadpool(pool.shutdown, True, cancel_futures=True)
+
+def get_job(job_id):
+    return _jobs.get(job_id)
+
+def job_stats():
+    return {**stats, "workers": WORKERS, "queued": len(_queued), "running": len(_running), "debouncing": len(_timers),
+            "jobs": list(_jobs.values())[-10:]}
+
+# --- LIFECYCLE ---
+def start():
+    global _queue
+    _queue = asyncio.Queue()
+    _workers[:] = [asyncio.create_task(_worker()) for _ in range(WORKERS)]
+
+async def stop():
+    """Drops pending recomputes (reads fall back to computing inline) and cancels running jobs."""
+    global _queue
+    for handle, _ in _timers.values(): handle.cancel()
+    _timers.clear()
+    tasks = [*_workers, *_tasks]
+    for t in tasks: t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _workers.clear()
+    _queued.clear()
+    _queue = None
@@ -0,0 +1,150 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import NamedTuple
+from pymongo import ReturnDocument
+from database import ai_usage
+
+# 🚀 UPGRADE: Advisor quota counted in memory. A sliding 24h window is approximated from two
+# per-day counters (yesterday's weighted by how much of it is still inside the window), so a
+# check is a dict lookup. Counts reach Mongo as one {username, day, count} doc per user per day,
+# flushed in the background every FLUSH_INTERVAL seconds.
+DAY = 86400
+AI_DAILY_LIMIT = int(os.getenv("AI_DAILY_LIMIT", "20"))
+FLUSH_INTERVAL = float(os.getenv("AI_USAGE_FLUSH_SECONDS", "10"))
+
+def parse_tiers(spec):
+    """"free:20,plus:100,pro:0" -> {tier: daily limit}; 0 means uncapped."""
+    tiers = {"free": AI_DAILY_LIMIT}
+    for part in spec.split(","):
+        name, _, limit = part.partition(":")
+        if name.strip() and limit.strip(): tiers[name.strip()] = int(limit)
+    return tiers
+
+TIERS = parse_tiers(os.getenv("AI_TIERS", ""))
+clock = time.time # Seconds since the epoch; tests swap in their own
+log = logging.getLogger(__name__)
+
+class Quota(NamedTuple):
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int # Seconds until the current day's counter rolls over
+
+class Counter:
+    __slots__ = ("day", "curr", "prev")
+    def __init__(self, day, curr=0, prev=0):
+        self.day, self.curr, self.prev = day, curr, prev
+
+    def roll(self, day):
+        if day == self.day: return
+        self.prev = self.curr if day == self.day + 1 else 0
+        self.curr, self.day = 0, day
+
+_counters = {}  # username -> Counter
+_pending = {}   # (username, day) -> uses not yet flushed
+_loads = {}     # username -> in-flight seed task
+_flusher = None
+stats = {"checks": 0, "denied": 0, "loads": 0, "flushes": 0}
+
+def limit_for(user):
+    return TIERS.get(user.get("tier") or "free", TIERS["free"])
+
+def _used(c, now):
+    return c.prev * (1 - (now % DAY) / DAY) + c.curr
+
+async def _seed(username, day):
+    docs = await ai_usage.find({"username": username, "day": {"$in": [day - 1, day]}}).to_list()
+    counts = {d["day"]: d.get("count", 0) for d in docs}
+    stats["loads"] += 1
+    return Counter(day, counts.get(day, 0) + _pending.get((username, day), 0), counts.get(day - 1, 0))
+
+async def _counter(username, now):
+    day = int(now // DAY)
+    c = _counters.get(username)
+    if c is None:
+        # One Mongo read per user per process; concurrent first requests share it
+        task = _loads.get(username)
+        if task is None:
+            task = _loads[username] = asyncio.ensure_future(_seed(username, day))
+            task.add_done_callback(lambda _: _loads.pop(username, None))
+        c = _counters.setdefault(username, await task)
+    c.roll(day)
+    return c
+
+def _quota(allowed, limit, c, now):
+    remaining = -1 if limit <= 0 else max(0, math.floor(limit - _used(c, now)))
+    return Quota(allowed, limit, remaining, int(DAY - now % DAY))
+
+async def acquire(user) -> Quota:
+    """Checks the quota and, if allowed, counts one advisor call."""
+    now = clock()
+    c = await _counter(user["username"], now)
+    limit = limit_for(user)
+    stats["checks"] += 1
+    if limit > 0 and _used(c, now) + 1 > limit:
+        stats["denied"] += 1
+        return _quota(False, limit, c, now)
+    c.curr += 1
+    key = (user["username"], c.day)
+    _pending[key] = _pending.get(key, 0) + 1
+    return _quota(True, limit, c, now)
+
+async def peek(user) -> Quota:
+    now = clock()
+    c = await _counter(user["username"], now)
+    limit = limit_for(user)
+    return _quota(limit <= 0 or _used(c, now) + 1 <= limit, limit, c, now)
+
+def headers(q: Quota):
+    return {"X-RateLimit-Limit": str(q.limit), "X-RateLimit-Remaining": str(q.remaining), "X-RateLimit-Reset": str(q.reset)}
+
+# --- DURABILITY ---
+def _expiry(day):
+    # Kept through the next day, while it still counts towards the sliding window
+    return datetime.fromtimestamp((day + 2) * DAY, timezone.utc)
+
+async def flush():
+    """Writes pending counts with $inc and pulls back the merged total (other workers' uses included)."""
+    for key in list(_pending):
+        n = _pending.pop(key, 0)
+        if not n: continue
+        username, day = key
+        try:
+            doc = await ai_usage.find_one_and_update(
+                {"username": username, "day": day},
+                {"$inc": {"count": n}, "$setOnInsert": {"expires_at": _expiry(day)}},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            _pending[key] = _pending.get(key, 0) + n
+            log.warning("⚠️ AI usage flush failed: %s", e)
+            continue
+        c = _counters.get(username)
+        if c and c.day == day: c.curr = max(c.curr, doc["count"] + _pending.get(key, 0))
+    stats["flushes"] += 1
+
+    # Counters that no longer reach into the window are reloaded on next use
+    today = int(clock() // DAY)
+    for username in [u for u, c in _counters.items() if c.day < today - 1]: del _counters[username]
+
+async def _run():
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL)
+        await flush()
+
+def start():
+    global _flusher
+    if _flusher is None: _flusher = asyncio.create_task(_run())
+
+async def stop():
+    global _flusher
+    if _flusher: _flusher.cancel()
+    _flusher = None
+    await flush()
+
+def limiter_stats():
+    return {**stats, "users": len(_counters), "pending": sum(_pending.values()), "tiers": TIERS}
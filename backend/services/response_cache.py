@@ -0,0 +1,90 @@
+import os
+import re
+import time
+from collections import OrderedDict
+from services.financial_engine import ENGINE_VERSION
+
+# Repeated advisor questions are answered from here: no provider call, no quota used.
+MAXSIZE = int(os.getenv("AI_CACHE_SIZE", "5000"))
+TTL = int(os.getenv("AI_CACHE_TTL", str(6 * 3600)))
+SIMILARITY = float(os.getenv("AI_CACHE_SIMILARITY", "0.8"))
+PER_CONTEXT = 32 # Candidates scanned for a fuzzy match
+
+STOPWORDS = {"a", "an", "the", "i", "me", "my", "we", "our", "you", "your", "to", "of", "for", "in", "on",
+             "is", "are", "am", "be", "do", "does", "can", "could", "should", "would", "how", "what",
+             "please", "pls", "it", "this", "that", "and", "or", "so", "with", "at", "from", "about"}
+SURPLUS_BANDS = [0, 10000, 25000, 50000, 100000, 250000]
+
+_entries = OrderedDict()  # (context, query) -> (answer, tokens, expires_at); LRU order
+_by_context = {}          # context -> [query, ...] newest last
+stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "evictions": 0}
+
+# --- KEYS ---
+def normalize(query: str):
+    words = re.findall(r"[a-z0-9]+", query.lower())
+    tokens = frozenset(w for w in words if w not in STOPWORDS)
+    return " ".join(words), tokens
+
+def fingerprint(username: str, data: dict):
+    """
+    Bucketed view of the metrics the advisor prompt is built from. Small moves in score or
+    surplus keep hitting the cache; crossing a band, a new freedom date or an engine bump does not.
+    Scoped per user because the prompt also carries goal names.
+    """
+    h = data.get("health", {})
+    surplus = h.get("surplus", 0) or 0
+    band = -1 if surplus < 0 else sum(1 for b in SURPLUS_BANDS if surplus >= b)
+    freedom = h.get("debt_strategy", {}).get("freedom_date", "N/A")
+    return (username, ENGINE_VERSION, int(h.get("score", 0) or 0) // 10, band, freedom)
+
+def _jaccard(a, b):
+    if not a or not b: return 0.0
+    return len(a & b) / len(a | b)
+
+# --- CACHE ---
+def _drop(key):
+    _entries.pop(key, None)
+    queries = _by_context.get(key[0])
+    if queries and key[1] in queries:
+        queries.remove(key[1])
+        if not queries: del _by_context[key[0]]
+
+def lookup(username: str, data: dict, query: str):
+    """Cached answer for an identical or near-identical question in the same context, else None."""
+    context = fingerprint(username, data)
+    text, tokens = normalize(query)
+    now = time.time()
+
+    hit = _entries.get((context, text))
+    if hit and hit[2] > now:
+        _entries.move_to_end((context, text))
+        stats["exact_hits"] += 1
+        return hit[0]
+
+    best, best_score = None, SIMILARITY
+    for q in reversed(_by_context.get(context, [])[-PER_CONTEXT:]):
+        entry = _entries.get((context, q))
+        if not entry or entry[2] <= now: continue
+        score = _jaccard(tokens, entry[1])
+        if score >= best_score: best, best_score = (context, q), score
+    if best:
+        _entries.move_to_end(best)
+        stats["similar_hits"] += 1
+        return _entries[best][0]
+
+    stats["misses"] += 1
+    return None
+
+def store(username: str, data: dict, query: str, answer: str):
+    context = fingerprint(username, data)
+    text, tokens = normalize(query)
+    key = (context, text)
+    _drop(key)
+    _entries[key] = (answer, tokens, time.time() + TTL)
+    _by_context.setdefault(context, []).append(text)
+    while len(_entries) > MAXSIZE:
+        _drop(next(iter(_entries)))
+        stats["evictions"] += 1
+
+def cache_stats():
+    return {**stats, "size": len(_entries), "maxsize": MAXSIZE, "ttl": TTL}
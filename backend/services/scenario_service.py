@@ -0,0 +1,148 @@
+import os
+from dataclasses import dataclass, replace
+from cachetools import LRUCache
+from starlette.concurrency import run_in_threadpool
+from services.financial_engine import (EngineProfile, EngineAsset, EngineGoal, engine_figures, debt_strategy_for,
+                                       analyze_goals, projections_for, allocation_for, score_for, health_report)
+from services.snapshot_service import load_snapshot, snapshot_state
+from services.data_service import engine_inputs, today
+from utils.metrics import stage
+
+# 🚀 UPGRADE: What-if scenarios. The user's engine inputs and base result are built once per
+# snapshot rev and cached; each scenario applies its changes to a shallow copy of them and reruns
+# only the stages whose inputs moved (a salary change reruns debt, goals, projections and scoring
+# but reuses the allocation; a new goal reruns goals only). Nothing is written.
+CACHE_SIZE = int(os.getenv("SCENARIO_CACHE_SIZE", "1000"))
+HEADLINE = ("score", "net_worth", "surplus", "monthly_burn", "recommended_investment", "emergency_months")
+
+_bases = LRUCache(maxsize=CACHE_SIZE) # username -> Base
+stats = {"hits": 0, "misses": 0}
+
+class ScenarioError(ValueError):
+    """A change that doesn't apply to this user's data (reported as 400)."""
+
+@dataclass(slots=True)
+class Inputs:
+    profile: EngineProfile
+    totals: dict
+    liabilities: list
+    goals: list
+    assets: dict        # asset id -> EngineAsset
+    committed: int = 0  # Extra monthly debt payment (paise)
+
+@dataclass(slots=True)
+class Base:
+    rev: int
+    day: str
+    inputs: Inputs
+    keys: dict     # stage -> the inputs it ran on
+    results: dict  # stage -> output
+    health: dict
+
+# (stage, its inputs, run) in engine order; later stages may read earlier results
+STAGES = (
+    ("debt", lambda s, f, r: (s.liabilities, f["total_debt"], f["surplus"], s.committed),
+             lambda s, f, r: debt_strategy_for(s.liabilities, f["total_debt"], f["total_emi"], f["surplus"], s.committed)),
+    ("goals", lambda s, f, r: (s.goals, f["available_to_invest"]),
+              lambda s, f, r: analyze_goals(s.goals, f["available_to_invest"])),
+    ("projections", lambda s, f, r: (f["net_worth"], f["surplus"]),
+                    lambda s, f, r: projections_for(f["net_worth"], f["surplus"])),
+    ("allocation", lambda s, f, r: (s.totals["allocation"], s.profile.current_savings, f["total_assets"]),
+                   lambda s, f, r: allocation_for(s.totals["allocation"], s.profile.current_savings, f["total_assets"])),
+    ("scoring", lambda s, f, r: (f["surplus"], f["emergency_months"], r["debt"].get("months_to_freedom", 0)),
+                lambda s, f, r: score_for(f["surplus"], f["emergency_months"], r["debt"])),
+)
+
+def _same(a, b):
+    # Unchanged lists and dicts are the base's own objects, so `is` settles most comparisons
+    return all(x is y or x == y for x, y in zip(a, b))
+
+def evaluate(s, base=None):
+    """(health, stage inputs, stage results, stages rerun); stages with the base's inputs reuse its results."""
+    f = engine_figures(s.profile, s.totals, s.committed)
+    keys, results, rerun = {}, {}, []
+    for name, inputs, run in STAGES:
+        keys[name] = key = inputs(s, f, results)
+        if base is not None and _same(key, base.keys[name]):
+            results[name] = base.results[name]
+        else:
+            results[name] = run(s, f, results)
+            rerun.append(name)
+    health = health_report(s.profile, f, results["debt"], results["goals"], results["projections"],
+                           results["allocation"], results["scoring"], s.totals["expense_summary"])
+    return health, keys, results, rerun
+
+# --- CHANGES ---
+def _sell(s, asset_id, price):
+    a = s.assets.get(asset_id)
+    if a is None: raise ScenarioError(f"Unknown asset: {asset_id}")
+    s.assets = {k: v for k, v in s.assets.items() if k != asset_id}
+    totals = s.totals = dict(s.totals)
+    totals["asset_value"] -= a.value
+    if a.liquidity_score >= 4: totals["liquid_value"] -= a.value
+    allocation = totals["allocation"] = dict(totals["allocation"])
+    if any(x.type == a.type for x in s.assets.values()): allocation[a.type] -= a.value
+    else: allocation.pop(a.type, None)
+    s.profile = replace(s.profile, current_savings=s.profile.current_savings + (a.value if price is None else price))
+
+def apply(inputs, changes):
+    """Scenario inputs: `inputs` with `changes` applied (copy on write; the base is never touched)."""
+    s = replace(inputs)
+    for c in changes:
+        if c.type == "salary":
+            s.profile = replace(s.profile, salary=max(0, s.profile.salary + c.amount))
+        elif c.type == "rent":
+            s.profile = replace(s.profile, rent=max(0, s.profile.rent + c.amount))
+        elif c.type == "extra_payment":
+            if c.amount <= 0: raise ScenarioError("Extra payment must be positive")
+            if not s.liabilities or s.totals["total_debt"] <= 0: raise ScenarioError("No debt to prepay")
+            s.committed += c.amount
+        elif c.type == "goal":
+            s.goals = [*s.goals, EngineGoal(c.name, c.target_amount, c.target_date, c.priority)]
+        elif c.type == "asset_sale":
+            _sell(s, c.asset_id, c.price)
+    return s
+
+# --- BASE SNAPSHOT ---
+async def base_for(user):
+    """Engine inputs and base result for the user's current snapshot rev (cached per rev and day)."""
+    uname = user["username"]
+    state = await snapshot_state(user)
+    cached = _bases.get(uname)
+    if state and cached and cached.rev == state.get("rev") and cached.day == today():
+        stats["hits"] += 1
+        return cached
+
+    stats["misses"] += 1
+    with stage("snapshot"):
+        snap = await load_snapshot(user)
+    with stage("inputs"):
+        profile, totals, e_liabs, e_goals = engine_inputs(snap)
+        e_assets = {a["id"]: EngineAsset.from_doc(a) for a in snap.get("assets", []) if "id" in a}
+    inputs = Inputs(profile, totals, e_liabs, e_goals, e_assets)
+    health, keys, results, _ = evaluate(inputs)
+    _bases[uname] = base = Base(snap.get("rev"), today(), inputs, keys, results, health)
+    return base
+
+def compare(base, health):
+    """Headline differences from the base result."""
+    diff = {k: round(health[k] - base[k], 2) for k in HEADLINE}
+    months = health["debt_strategy"].get("months_to_freedom", 0), base["debt_strategy"].get("months_to_freedom", 0)
+    diff["months_to_freedom"] = months[0] - months[1]
+    return diff
+
+def run_scenarios(base, scenarios):
+    out = []
+    for sc in scenarios:
+        health, _, _, rerun = evaluate(apply(base.inputs, sc.changes), base)
+        out.append({"name": sc.name, "health": health, "vs_base": compare(base.health, health), "recomputed": rerun})
+    return out
+
+def scenario_stats():
+    return {**stats, "size": len(_bases), "maxsize": CACHE_SIZE}
+
+async def evaluate_scenarios(user, scenarios):
+    """Base result and every scenario side by side. Raises ScenarioError for a change that doesn't apply."""
+    base = await base_for(user)
+    results = await run_in_threadpool(run_scenarios, base, scenarios)
+    return {"rev": base.rev, "base": base.health, "scenarios": results}
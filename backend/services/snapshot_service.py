@@ -0,0 +1,226 @@
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from urllib.parse import unquote
+from pymongo.errors import DuplicateKeyError
+from database import users, expenses, assets, liabilities, goals, snapshots
+from services.financial_engine import ENGINE_VERSION, ROLLING_WINDOWS, to_paise, expense_category
+
+# Size of the "recent expenses" list shown on the dashboard
+RECENT_EXPENSES = 50
+# A write that hasn't finished after this long (crashed worker) no longer holds rebuilds back
+PENDING_TIMEOUT = 60
+
+# --- ENCODING ---
+def bucket_field(asset_type):
+    """Mongo-safe field name for an allocation bucket (asset types are user input)."""
+    return "t_" + str(asset_type).replace("%", "%25").replace(".", "%2E")
+
+def bucket_type(field):
+    return unquote(field[2:])
+
+def _row(doc):
+    row = {k: v for k, v in doc.items() if k != "_id"}
+    row["id"] = str(doc["_id"])
+    return row
+
+def month_path(doc):
+    """Snapshot path of an expense's month/category bucket."""
+    return f"months.{bucket_field(str(doc.get('date', ''))[:7])}.{bucket_field(expense_category(doc))}"
+
+def _deltas(kind, doc, sign):
+    """Running-total changes for adding (sign=1) or removing (sign=-1) one row."""
+    if kind == "expenses":
+        return {month_path(doc): sign * to_paise(doc.get("amount", 0))}
+    if kind == "assets":
+        p = sign * to_paise(doc.get("value", 0))
+        bucket = "allocation." + bucket_field(doc.get("type", ""))
+        inc = {"totals.assets": p, bucket + ".value": p, bucket + ".count": sign}
+        if doc.get("liquidity_score", 1) >= 4: inc["totals.liquid_assets"] = p
+        return inc
+    if kind == "liabilities":
+        return {"totals.debt": sign * to_paise(doc.get("outstanding_amount", 0)),
+                "totals.emi": sign * to_paise(doc.get("monthly_payment", 0))}
+    return {}
+
+PROFILE_FIELDS = {"_id": 0, "salary": 1, "rent": 1, "current_savings": 1}
+
+def _profile(user):
+    return {"salary": user.get("salary", 0), "rent": user.get("rent", 0), "current_savings": user.get("current_savings", 0)}
+
+# --- FULL REBUILD ---
+def expense_pipeline(uname, since):
+    """
+    Month x category spend for one user, summed in Mongo (served by the (username, date, _id) index).
+    Rolling averages and burn are derived from these few buckets by the engine.
+    """
+    return [
+        {"$match": {"username": uname, "date": {"$gte": since}}},
+        {"$group": {
+            "_id": {"month": {"$substr": ["$date", 0, 7]}, "category": {"$ifNull": ["$category", "General"]}},
+            "total": {"$sum": "$amount"}
+        }}
+    ]
+
+def window_start(today=None):
+    """First day of the oldest month the rolling averages look at."""
+    return ((today or datetime.now()) - relativedelta(months=max(ROLLING_WINDOWS))).strftime("%Y-%m-01")
+
+def months_from(buckets):
+    """Snapshot `months` map from aggregation output."""
+    months = {}
+    for b in buckets:
+        p = to_paise(b.get("total") or 0)
+        if p: months.setdefault(bucket_field(b["_id"]["month"]), {})[bucket_field(str(b["_id"]["category"]))] = p
+    return months
+
+def snapshot_months(snap):
+    """{"YYYY-MM": {category: paise}} back out of a snapshot (the engine's expense input)."""
+    return {bucket_type(m): {bucket_type(c): p for c, p in cats.items()} for m, cats in snap.get("months", {}).items()}
+
+def build_snapshot(user, u_expenses, u_assets, u_liabs, u_goals, buckets=()):
+    """Snapshot document from raw rows, using the same deltas the write path applies."""
+    doc = {
+        "engine_version": ENGINE_VERSION,
+        "profile": _profile(user),
+        "totals": {"assets": 0, "liquid_assets": 0, "debt": 0, "emi": 0},
+        "allocation": {},
+        "months": months_from(buckets),
+        "expenses": [_row(e) for e in u_expenses],
+        "assets": [_row(a) for a in u_assets],
+        "liabilities": [_row(l) for l in u_liabs],
+        "goals": [_row(g) for g in u_goals]
+    }
+    for kind, rows in (("assets", u_assets), ("liabilities", u_liabs)):
+        for r in rows:
+            for path, v in _deltas(kind, r, 1).items():
+                *parents, leaf = path.split(".")
+                node = doc
+                for p in parents: node = node.setdefault(p, {})
+                node[leaf] = node.get(leaf, 0) + v
+    return doc
+
+async def _aggregate(coll, pipeline):
+    return await (await coll.aggregate(pipeline)).to_list()
+
+async def rebuild_snapshot(user, current=None):
+    """
+    Re-reads the collections and stores a fresh snapshot. The write is conditional
+    on `rev`, so a write racing with the rebuild wins and the snapshot is flagged for another rebuild.
+    """
+    uname = user["username"]
+    rev = current.get("rev") if current else None
+
+    # 🚀 UPGRADE: The collection reads run concurrently on the pooled async client;
+    # expense totals are aggregated server-side instead of summed from rows here
+    # FIX: The profile comes from the users collection too, not the caller's (auth-cached) user doc,
+    # which can predate an onboarding handled by another worker
+    profile, u_expenses, buckets, u_assets, u_liabs, u_goals = await asyncio.gather(
+        users.find_one({"username": uname}, PROFILE_FIELDS),
+        expenses.find({"username": uname}).sort([("date", -1), ("_id", -1)]).limit(RECENT_EXPENSES).to_list(),
+        _aggregate(expenses, expense_pipeline(uname, window_start())),
+        assets.find({"username": uname}).to_list(),
+        liabilities.find({"username": uname}).to_list(),
+        goals.find({"username": uname}).to_list(),
+    )
+
+    doc = build_snapshot(profile or user, u_expenses, u_assets, u_liabs, u_goals, buckets)
+    doc["rev"] = (rev or 0) + 1
+    # FIX: A write in flight may or may not be in what we just read, and its delta lands later
+    # either way: keep the result, but rebuild again once the write has finished
+    doc["rebuild"] = writes_pending(current)
+    try:
+        # The stored engine result now lags the snapshot, same as after a CRUD write
+        await snapshots.update_one({"username": uname, "rev": rev}, {"$set": doc, "$min": {"dirty_since": time.time()}}, upsert=True)
+    except DuplicateKeyError:
+        # FIX: A write started after our read (rev moved on). Bulk imports have no per-row delta,
+        # so what's stored may miss rows: the next read rebuilds again
+        await snapshots.update_one({"username": uname}, {"$set": {"rebuild": True}})
+    return {**doc, "username": uname}
+
+def writes_pending(snap):
+    return bool(snap and snap.get("pending", 0) > 0 and time.time() - snap.get("pending_at", 0) < PENDING_TIMEOUT)
+
+def needs_rebuild(snap):
+    """Missing, built by another ENGINE_VERSION, or flagged by a rebuild that raced a write (once no write is in flight)."""
+    if not snap or snap.get("engine_version") != ENGINE_VERSION: return True
+    return bool(snap.get("rebuild")) and not writes_pending(snap)
+
+async def load_snapshot(user):
+    """Single document read; full recompute only when `needs_rebuild`."""
+    snap = await snapshots.find_one({"username": user["username"]})
+    if needs_rebuild(snap):
+        snap = await rebuild_snapshot(user, snap)
+    return snap
+
+HEALTH_STATE = {"_id": 0, "rev": 1, "engine_version": 1, "health_rev": 1, "health_version": 1, "health_day": 1, "dirty_since": 1,
+                "rebuild": 1, "pending": 1, "pending_at": 1}
+
+async def snapshot_state(user):
+    """Revision fields only (projected read); None when a rebuild is due."""
+    doc = await snapshots.find_one({"username": user["username"]}, HEALTH_STATE)
+    return None if needs_rebuild(doc) else doc
+
+async def refresh_snapshot(user):
+    """Full recompute after bulk writes (one rebuild instead of a delta per row)."""
+    return await rebuild_snapshot(user, await snapshots.find_one({"username": user["username"]}))
+
+# --- STORED ENGINE RESULT ---
+# The recompute worker stores the engine output (orjson bytes: allocation and category keys
+# are user input) tagged with the rev it was computed from. `dirty_since` marks the first
+# write the stored result doesn't reflect yet.
+def health_update(rev, health_json, day):
+    return {"$set": {"health_json": health_json, "health_rev": rev, "health_version": ENGINE_VERSION, "health_day": day},
+            "$unset": {"dirty_since": ""}}
+
+async def store_health(uname, rev, health_json, day):
+    """Saves a result computed from snapshot `rev`; a no-op if the snapshot has moved on."""
+    res = await snapshots.update_one({"username": uname, "rev": rev}, health_update(rev, health_json, day))
+    return res.modified_count > 0
+
+# --- INCREMENTAL WRITES ---
+@asynccontextmanager
+async def snapshot_write(uname):
+    """
+    Wraps a collection write and its snapshot delta. Entering bumps `rev`, so a rebuild that read
+    the snapshot earlier can't store totals that miss (or also count) this row, and counts the
+    write as pending, so a rebuild that starts meanwhile is redone once it has finished.
+    """
+    await snapshots.update_one({"username": uname}, {"$inc": {"rev": 1, "pending": 1}, "$max": {"pending_at": time.time()}}, upsert=True)
+    try:
+        yield
+    except BaseException:
+        # The delta may not have been applied: recount from the collections
+        await snapshots.update_one({"username": uname}, {"$inc": {"pending": -1}, "$set": {"rebuild": True}})
+        raise
+    await snapshots.update_one({"username": uname}, {"$inc": {"pending": -1}})
+
+async def _update(uname, update):
+    # Every write bumps rev (creating a stub if needed) so an in-flight rebuild can't overwrite it
+    update.setdefault("$inc", {})["rev"] = 1
+    update.setdefault("$min", {})["dirty_since"] = time.time()
+    await snapshots.update_one({"username": uname}, update, upsert=True)
+
+async def record_insert(uname, kind, doc):
+    row = _row(doc)
+    if kind == "expenses":
+        await _update(uname, {"$push": {"expenses": {"$each": [row], "$sort": {"date": -1, "id": -1}, "$slice": RECENT_EXPENSES}}, "$inc": _deltas(kind, doc, 1)})
+    else:
+        await _update(uname, {"$push": {kind: row}, "$inc": _deltas(kind, doc, 1)})
+
+async def record_delete(uname, kind, doc):
+    row_id = str(doc["_id"])
+    if kind != "expenses":
+        return await _update(uname, {"$pull": {kind: {"id": row_id}}, "$inc": _deltas(kind, doc, -1)})
+
+    res = await snapshots.update_one({"username": uname, "expenses.id": row_id}, {"$pull": {"expenses": {"id": row_id}}, "$inc": {"rev": 1, **_deltas(kind, doc, -1)}, "$min": {"dirty_since": time.time()}})
+    if not res.matched_count: return await _update(uname, {"$inc": _deltas(kind, doc, -1)})
+
+    # An expense left the window: pull the next most recent one back in
+    window = [_row(e) for e in await expenses.find({"username": uname}).sort([("date", -1), ("_id", -1)]).limit(RECENT_EXPENSES).to_list()]
+    await _update(uname, {"$set": {"expenses": window}})
+
+async def record_profile(uname, profile):
+    await _update(uname, {"$set": {"profile": _profile(profile)}})
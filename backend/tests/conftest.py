@@ -0,0 +1,64 @@
+"""
+Tests run from backend/: pip install -r requirements-dev.txt && python -m pytest
+Collections are served by mongomock (benchmarks/fake_mongo.py); tests that need them take the
+`db` fixture and are skipped when mongomock isn't installed.
+"""
+import os
+import time
+import asyncio
+import threading
+from contextlib import contextmanager
+import pytest
+
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ["DB_NAME"] = "finai_test"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+else:
+    from benchmarks import fake_mongo
+    fake_mongo.install()
+
+def run(coro):
+    return asyncio.run(coro)
+
+@pytest.fixture
+def db():
+    if mongomock is None: pytest.skip("needs mongomock")
+    import database
+    run(database.ensure_indexes())
+    yield database
+    database.client.sync.drop_database(os.environ["DB_NAME"])
+
+@pytest.fixture
+def api(db):
+    """TestClient over the whole app (lifespan included)."""
+    from fastapi.testclient import TestClient
+    from main import app
+    with TestClient(app) as client:
+        yield client
+
+def login(db, username, **profile):
+    """Auth headers for a new user."""
+    from routes.auth import create_token
+    run(db.users.insert_one({"username": username, "salary": 90000, "rent": 10000, "current_savings": 50000, **profile}))
+    return {"Authorization": f"Bearer {create_token({'sub': username})}"}
+
+@contextmanager
+def serve(app):
+    """Runs an ASGI app on a local port in a background thread; yields its base URL."""
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started: time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
@@ -0,0 +1,103 @@
+import json
+import pytest
+from pymongo.errors import DuplicateKeyError
+from benchmarks import stub_llm
+from services import ai_service
+from tests.conftest import run, login, serve
+
+ANSWER = "".join(stub_llm.WORDS)
+
+@pytest.fixture(scope="module")
+def llm_url():
+    with serve(stub_llm.app) as url:
+        yield url + "/api/v1"
+
+@pytest.fixture
+def llm(monkeypatch, llm_url):
+    """ai_service's real pooled client pointed at the local stub OpenRouter."""
+    monkeypatch.setattr(ai_service, "OPENROUTER_BASE_URL", llm_url)
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setattr(stub_llm, "LATENCY", 0)
+    monkeypatch.setattr(stub_llm, "status", 200)
+    stub_llm.calls.update(complete=0, stream=0)
+    run(ai_service.close_http_client())
+    yield stub_llm
+    run(ai_service.close_http_client())
+
+def events(body):
+    out = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+def ask(fn, *args):
+    async def once():
+        try:
+            if fn is ai_service.stream_llm: return [d async for d in fn(*args)]
+            return await fn(*args)
+        finally:
+            await ai_service.close_http_client()
+    return run(once())
+
+def test_call_llm(llm):
+    assert ask(ai_service.call_llm, "context", "How do I start?", []) == ANSWER
+    assert llm.calls["complete"] == 1
+
+def test_stream_llm(llm):
+    assert ask(ai_service.stream_llm, "context", "How do I start?", []) == stub_llm.WORDS
+
+def test_upstream_error(llm):
+    llm.status = 502
+    assert ask(ai_service.call_llm, "context", "q", []) == "Provider Error (502). Try again."
+    assert ask(ai_service.stream_llm, "context", "q", []) == ["Provider Error (502). Try again."]
+
+def test_advisor_stream(db, api, llm):
+    headers = login(db, "streamer")
+    res = api.post("/v1/ai/advisor/stream", json={"query": "Should I invest?"}, headers=headers)
+    assert res.status_code == 200 and res.headers["content-type"].startswith("text/event-stream")
+    ev = events(res.text)
+    assert [d["content"] for e, d in ev if e == "token"] == stub_llm.WORDS
+    assert ev[-1] == ("done", {"role": "ai"})
+    assert llm.calls["stream"] == 1
+    history = api.get("/v1/ai/advisor/history", headers=headers).json()["messages"]
+    assert history[-1] == {"role": "ai", "content": ANSWER}
+
+def test_repeat_question_is_a_cache_hit(db, api, llm):
+    headers = login(db, "repeater")
+    first = api.post("/v1/ai/advisor", json={"query": "Should I invest now?"}, headers=headers).json()
+    again = api.post("/v1/ai/advisor", json={"query": "should i invest now"}, headers=headers).json()
+    streamed = events(api.post("/v1/ai/advisor/stream", json={"query": "Should I invest now?"}, headers=headers).text)
+    assert first == {"role": "ai", "content": ANSWER}
+    assert again == {"role": "ai", "content": ANSWER, "cached": True}
+    assert streamed[-1] == ("done", {"role": "ai", "cached": True})
+    assert llm.calls == {"complete": 1, "stream": 0}
+
+def test_upstream_error_is_not_cached(db, api, llm):
+    headers = login(db, "unlucky")
+    llm.status = 503
+    first = api.post("/v1/ai/advisor", json={"query": "Pay off the loan?"}, headers=headers).json()
+    streamed = events(api.post("/v1/ai/advisor/stream", json={"query": "Pay off the loan?"}, headers=headers).text)
+    assert first["content"] == "Provider Error (503). Try again."
+    assert streamed[0] == ("token", {"content": "Provider Error (503). Try again."})
+    llm.status = 200
+    assert api.post("/v1/ai/advisor", json={"query": "Pay off the loan?"}, headers=headers).json() == {"role": "ai", "content": ANSWER}
+    assert llm.calls == {"complete": 2, "stream": 1}
+
+class Contended:
+    """chat_pages where every append and new page loses the race."""
+    def __init__(self, coll): self.coll = coll
+    async def find_one(self, *a, **kw): return await self.coll.find_one(*a, **kw)
+    async def update_one(self, *a, **kw): return type("Res", (), {"modified_count": 0})()
+    async def insert_one(self, doc): raise DuplicateKeyError("E11000")
+
+def test_save_chat_counts_drops(db, monkeypatch, caplog):
+    before = ai_service.chat_stats()
+    run(ai_service.save_chat("talker", "hi", "hello", 50))
+    assert ai_service.chat_stats() == {**before, "saved": before["saved"] + 1}
+    assert [m["content"] for m in run(ai_service.get_chat_history("talker"))] == ["hi", "hello"]
+
+    monkeypatch.setattr(ai_service, "chat_pages", Contended(ai_service.chat_pages))
+    run(ai_service.save_chat("talker", "again?", "lost", 50))
+    assert ai_service.chat_stats()["dropped"] == before["dropped"] + 1
+    assert "dropped after 5 contended saves" in caplog.text
@@ -0,0 +1,84 @@
+import time
+import pytest
+from fastapi import HTTPException
+from dependencies import get_current_user
+from services.snapshot_service import rebuild_snapshot
+from utils import auth_cache
+from tests.conftest import run, login
+
+CACHES = (auth_cache.payloads, auth_cache.users, auth_cache.not_revoked, auth_cache.revoked)
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    def clear():
+        for c in CACHES:
+            c.data.clear()
+            c.hits = c.misses = 0
+    clear()
+    yield
+    clear()
+
+def other_worker():
+    """What another worker knows: nothing cached."""
+    for c in CACHES: c.data.clear()
+
+def auth(headers):
+    return run(get_current_user(headers["Authorization"]))
+
+def rejected(headers):
+    with pytest.raises(HTTPException) as e: auth(headers)
+    return e.value.detail
+
+def test_payload_cache(db):
+    headers = login(db, "pam")
+    token = headers["Authorization"].split()[1]
+    auth(headers); auth(headers)
+    assert auth_cache.payloads.stats()["hits"] == 1 and auth_cache.payloads.data[token]["sub"] == "pam"
+
+    # An expired payload is rejected from the cache and dropped
+    auth_cache.payloads.set(token, {**auth_cache.payloads.data[token], "exp": time.time() - 1})
+    assert rejected(headers) == "Token Expired"
+    assert token not in auth_cache.payloads.data
+
+def test_user_cache_and_invalidation(db):
+    headers = login(db, "uma")
+    assert auth(headers)["user"]["salary"] == 90000
+    run(db.users.update_one({"username": "uma"}, {"$set": {"salary": 120000}}))
+    assert auth(headers)["user"]["salary"] == 90000 # cached for up to USER_TTL
+    assert auth_cache.users.stats()["hits"] == 1
+    auth_cache.invalidate_user("uma")
+    assert auth(headers)["user"]["salary"] == 120000
+
+def test_unknown_user(db):
+    headers = login(db, "gone")
+    run(db.users.delete_one({"username": "gone"}))
+    assert rejected(headers) == "User Not Found"
+
+def test_revoked_token(api, db):
+    headers = login(db, "rev")
+    assert api.get("/v1/jobs/me", headers=headers).status_code == 200
+    assert api.post("/v1/auth/logout", headers=headers).status_code == 200
+    # This worker knows straight away; another one finds the blacklist entry in Mongo
+    assert rejected(headers) == "Session Revoked (Logged Out)"
+    other_worker()
+    assert rejected(headers) == "Session Revoked (Logged Out)"
+    assert auth_cache.revoked.stats()["size"] == 1
+
+def test_revocation_elsewhere_within_ttl(db):
+    headers = login(db, "nat")
+    jti = auth(headers)["jti"]
+    # Logged out on another worker: this one trusts its negative cache until NOT_REVOKED_TTL
+    run(db.token_blacklist.insert_one({"jti": jti}))
+    assert auth(headers)["user"]["username"] == "nat"
+    auth_cache.not_revoked.pop(jti) # TTL expiry
+    assert rejected(headers) == "Session Revoked (Logged Out)"
+
+def test_rebuild_reads_the_profile_fresh(db):
+    headers = login(db, "onb")
+    cached = auth(headers)["user"]
+    # Onboarding handled by another worker: this worker's cached user doc is stale
+    run(db.users.update_one({"username": "onb"}, {"$set": {"salary": 250000, "rent": 30000}}))
+    assert auth(headers)["user"]["salary"] == 90000
+    run(rebuild_snapshot(cached))
+    snap = run(db.snapshots.find_one({"username": "onb"}))
+    assert snap["profile"] == {"salary": 250000, "rent": 30000, "current_savings": 50000}
@@ -0,0 +1,67 @@
+import random
+import pytest
+
+pytest.importorskip("numpy")
+
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from services.financial_engine import EngineProfile, EngineLiability, EngineGoal, Calendar, aggregate_totals
+from services.batch_engine import MAX_PAISE, calculate_from_totals_batch, diff_against_scalar
+from services.data_service import score_snapshots, compute_health
+from utils.responses import dumps
+from benchmarks.synthetic import make_row
+
+def rows(seed, n=300):
+    """Randomized (profile, totals, liabilities, goals) rows, edge cases mixed in."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        profile, e, a, l, g = make_row(rng, expenses=rng.randint(0, 60), assets=rng.randint(0, 6),
+                                       liabilities=rng.randint(0, 3), goals=rng.randint(0, 3))
+        case = rng.randrange(8)
+        if case == 0: profile = EngineProfile(0, profile.rent, profile.current_savings)         # no salary
+        elif case == 1: profile = EngineProfile(profile.salary, profile.rent, -profile.current_savings) # overdrawn
+        elif case == 2: profile = EngineProfile(profile.salary, 0, 0); a = []                   # no assets at all
+        elif case == 3: profile = EngineProfile(MAX_PAISE * 3, profile.rent, profile.current_savings) # scalar fallback
+        elif case == 4: g = [EngineGoal("past", 1_000_000, "2001-01-01", "High"), *g]           # goal date gone by
+        elif case == 5: l = [EngineLiability("zero", "Loan", 0, 0.0, 0), *l]
+        elif case == 6: profile = EngineProfile(profile.salary, 0, profile.current_savings); e = []; l = [] # no burn
+        out.append((profile, aggregate_totals(e, a, l), l, g))
+    return out
+
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_matches_scalar(seed):
+    assert diff_against_scalar(rows(seed)) == []
+
+def test_empty_and_all_fallback():
+    assert calculate_from_totals_batch([]) == []
+    big = [r for r in rows(0) if r[0].salary >= MAX_PAISE]
+    assert big and diff_against_scalar(big) == []
+
+def shard():
+    return [{"username": f"u{i}", "rev": i, "profile": {"salary": 50000.0 * i, "rent": 12000.0, "current_savings": 1000.0 * i},
+              "totals": {"debt": 25_000_000, "emi": 900_000, "assets": 4_000_000, "liquid_assets": 1_000_000},
+              "allocation": {"Gold": {"value": 4_000_000, "count": 1}},
+              "liabilities": [{"name": "car", "outstanding_amount": 250000.0, "interest_rate": 9.0, "monthly_payment": 9000.0}]}
+             for i in range(4)]
+
+def test_rescore_shard_scores_every_snapshot():
+    snaps = shard()
+    snaps.append({"username": "broken", "profile": None}) # bad snapshot: skipped, counted
+    day, scored, failed = score_snapshots(snaps)
+    assert failed == 1 and [u for u, _, _ in scored] == ["u0", "u1", "u2", "u3"]
+    assert [h for _, _, h in scored] == [dumps(compute_health(s)) for s in snaps[:4]]
+
+def test_rescore_shard_falls_back_to_scalar(monkeypatch):
+    def boom(rows): raise ValueError("bad row")
+    monkeypatch.setattr("services.batch_engine.calculate_from_totals_batch", boom)
+    _, scored, failed = score_snapshots(shard())
+    assert failed == 0 and len(scored) == 4
+
+@pytest.mark.parametrize("today", [datetime(2026, 1, 31), datetime(2026, 12, 15), datetime(2028, 2, 29)])
+def test_calendar_matches_relativedelta(today):
+    cal = Calendar(today)
+    for m in range(0, 700, 7):
+        assert cal.label(m) == (today + relativedelta(months=m)).strftime("%b %Y")
+    assert cal.months_left("2031-06-01") == (2031 - today.year) * 12 + 6 - today.month
+    assert cal.months_left("2001-01-01") == 1 and cal.months_left("2030-02-30") == 12 and cal.months_left(None) == 12
@@ -0,0 +1,73 @@
+import math
+import random
+import pytest
+from services.debt_planner import plan_debts, months_to_zero, balance_after, MAX_MONTHS, NEVER
+
+def simulate(loans, extra, order):
+    """Month-by-month reference: every loan pays its EMI, `extra` plus freed EMIs go to the first open loan in `order`."""
+    balances = {i: loans[i][1] for i in order if loans[i][1] > 0}
+    pool, month, interest, cleared = extra, 0, 0.0, []
+    while balances:
+        month += 1
+        if month > MAX_MONTHS: return NEVER, None, tuple(cleared)
+        target = next(i for i in order if i in balances)
+        done = []
+        for i in list(balances):
+            r = loans[i][2] / 1200
+            due = balances[i] * (1 + r)
+            pay = loans[i][3] + (pool if i == target else 0)
+            interest += balances[i] * r
+            if pay >= due - 1e-6: done.append(i)
+            else: balances[i] = due - pay
+        for i in done: # freed EMIs join the pool from next month
+            del balances[i]
+            pool += loans[i][3]
+            cleared.append(loans[i][0])
+    return month, round(interest, 2), tuple(cleared)
+
+def orders(loans):
+    idx = range(len(loans))
+    return {"Avalanche": sorted(idx, key=lambda i: (-loans[i][2], loans[i][1])),
+            "Snowball": sorted(idx, key=lambda i: (loans[i][1], -loans[i][2]))}
+
+def check(loans, extra):
+    plans = plan_debts(tuple(loans), extra)
+    for name, order in orders(loans).items():
+        months, interest, cleared = simulate(loans, extra, order)
+        p = plans[name]
+        assert (p.months, p.order) == (months, cleared), (name, loans, extra)
+        if interest is None: assert p.total_interest is None
+        else: assert p.total_interest == pytest.approx(interest, rel=1e-9, abs=0.02)
+
+def test_matches_a_month_by_month_schedule():
+    rng = random.Random(11)
+    for _ in range(400):
+        loans = [(f"l{j}", round(rng.uniform(5_000, 3_000_000), 2), round(rng.choice([0, rng.uniform(6, 36)]), 2),
+                  round(rng.uniform(500, 60_000), 2)) for j in range(rng.randint(1, 5))]
+        check(loans, round(rng.choice([0, rng.uniform(0, 50_000)]), 2))
+
+@pytest.mark.parametrize("loans, extra", [
+    ([("card", 60_000, 36.0, 3_000)], 0),
+    ([("zero-rate", 12_000, 0.0, 1_000)], 0),                                 # exactly 12 months
+    ([("car", 400_000, 9.5, 12_000), ("card", 60_000, 36.0, 3_000)], 5_000),  # avalanche and snowball differ
+    ([("a", 10_000, 12.0, 0), ("b", 10_000, 12.0, 2_000)], 0),                # no EMI: paid off by b's freed EMI
+    ([("paid", 0, 10.0, 1_000), ("open", 5_000, 10.0, 1_000)], 0),            # cleared loans are skipped
+])
+def test_edge_cases(loans, extra):
+    check(loans, extra)
+
+def test_debt_traps():
+    # Payment never covers the interest
+    assert plan_debts((("trap", 100_000, 24.0, 1_000),), 0)["Avalanche"] == (NEVER, None, ())
+    # Amortizes, but not within MAX_MONTHS (was a flat 120-month cap reported as 120)
+    slow = (("home", 5_000_000, 8.0, 33_400),)
+    assert months_to_zero(5_000_000, 8 / 1200, 33_400) > MAX_MONTHS == 600
+    assert plan_debts(slow, 0)["Avalanche"].months == NEVER
+    assert plan_debts(slow, 2_000)["Avalanche"].months == months_to_zero(5_000_000, 8 / 1200, 35_400) <= MAX_MONTHS
+
+def test_closed_form_helpers():
+    assert months_to_zero(0, 0.01, 100) == 0 and months_to_zero(100, 0.01, 0) == math.inf
+    assert months_to_zero(100, 0.01, 1) == math.inf and months_to_zero(1_000, 0, 100) == 10
+    bal, r = 100_000.0, 0.01
+    for _ in range(24): bal = bal * (1 + r) - 2_500
+    assert balance_after(100_000, r, 2_500, 24) == pytest.approx(bal, rel=1e-12)
@@ -0,0 +1,54 @@
+import base64
+import pytest
+from tests.conftest import run, login
+
+def seed(db, username):
+    """Expenses over a few days, most of them on one date (so pages split inside a date)."""
+    docs = [{"username": username, "title": f"e{i}", "amount": 10.0 + i, "category": "Food" if i % 2 else "Travel",
+             "date": "2026-03-10" if i < 9 else f"2026-03-{i:02d}"} for i in range(15)]
+    docs.append({"username": "someone-else", "title": "x", "amount": 1.0, "category": "Food", "date": "2026-03-10"})
+    for d in docs: run(db.expenses.insert_one(d)) # one by one: _id order is insert order
+    rows = [d for d in docs if d["username"] == username]
+    return [str(d["_id"]) for d in sorted(rows, key=lambda d: (d["date"], d["_id"]), reverse=True)], rows
+
+def walk(api, headers, **params):
+    ids, pages, before = [], 0, None
+    while True:
+        r = api.get("/v1/finance/expenses", params={**params, **({"before": before} if before else {})}, headers=headers)
+        assert r.status_code == 200
+        body = r.json()
+        ids += [e["id"] for e in body["expenses"]]
+        pages += 1
+        before = body["next_cursor"]
+        if before is None: return ids, pages
+        assert pages <= 100, "cursor isn't advancing"
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, 15, 50])
+def test_pages_split_inside_a_date(api, db, limit):
+    headers = login(db, "hist")
+    expected, _ = seed(db, "hist")
+    ids, pages = walk(api, headers, limit=limit)
+    assert ids == expected # no gaps, no repeats, same-date rows newest _id first
+    assert pages == -(-len(expected) // limit) # the last page says so itself: no empty page after it
+
+def test_filters_with_a_cursor(api, db):
+    headers = login(db, "filt")
+    expected, rows = seed(db, "filt")
+    wanted = {str(d["_id"]) for d in rows if d["category"] == "Food" and "2026-03-10" <= d["date"] <= "2026-03-12"}
+    ids, _ = walk(api, headers, limit=2, category="Food", start="2026-03-10", end="2026-03-12")
+    assert ids == [i for i in expected if i in wanted] and len(ids) == 5
+
+    r = api.get("/v1/finance/expenses", params={"limit": 3, "fields": "amount"}, headers=headers).json()
+    assert set(r["expenses"][0]) == {"amount", "date", "id"}
+
+@pytest.mark.parametrize("params", [
+    {"before": "not a cursor!"},
+    {"before": base64.urlsafe_b64encode(b"2026-03-10").decode()},           # no _id part
+    {"before": base64.urlsafe_b64encode(b"2026-03-10\x00nothex").decode()}, # bad ObjectId
+    {"start": "2026-03-12", "end": "2026-03-10"},
+    {"fields": "title,password"},
+])
+def test_bad_queries_are_400(api, db, params):
+    headers = login(db, "bad")
+    r = api.get("/v1/finance/expenses", params=params, headers=headers)
+    assert r.status_code == 400
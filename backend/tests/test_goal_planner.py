@@ -0,0 +1,41 @@
+from services.goal_planner import MAX_MONTHS, plan_goals, waterfall_order
+
+def test_order_is_priority_then_deadline_then_input():
+    goals = [(1, 1, "Low", 1), (1, 1, "High", 24), (1, 1, "High", 6), (1, 1, "Medium", 3), (1, 1, "Medium", 3), (1, 1, "Someday", 1)]
+    assert waterfall_order(goals) == [2, 1, 5, 3, 4, 0] # unknown priorities rank as Medium
+
+def test_higher_priority_is_funded_first():
+    alloc, months = plan_goals([(1_000, 100, "Low", 10), (1_000, 100, "High", 10)], 100)
+    assert alloc == [0.0, 100.0] and months == [20, 10]
+
+def test_nearest_deadline_breaks_priority_ties():
+    alloc, months = plan_goals([(2_400, 100, "High", 24), (600, 100, "High", 6)], 100)
+    assert alloc == [0.0, 100.0] and months == [30, 6]
+
+def test_everything_fits():
+    alloc, months = plan_goals([(300, 100, "High", 3), (600, 200, "Medium", 3)], 500)
+    assert alloc == [100.0, 200.0] and months == [3, 3]
+
+def test_first_unfit_goal_gets_the_rest_and_later_goals_wait():
+    goals = [(300, 100, "High", 3), (600, 200, "Medium", 3), (100, 50, "Low", 2)]
+    alloc, months = plan_goals(goals, 150)
+    assert alloc == [100.0, 50.0, 0.0]
+    # A done at 3 (B has 150 by then); B takes the whole 150 for 450 more -> 6; C then gets 50 -> 8
+    assert months == [3, 6, 8]
+
+def test_reached_goals_take_nothing():
+    alloc, months = plan_goals([(0, 0, "High", 1), (-5, 10, "High", 1), (500, 100, "Low", 5)], 100)
+    assert alloc == [0.0, 0.0, 100.0] and months == [0, 0, 5]
+
+def test_no_surplus():
+    alloc, months = plan_goals([(500, 100, "High", 5), (0, 0, "Low", 5)], -2_000)
+    assert alloc == [0.0, 0.0] and months == [None, 0]
+
+def test_unreachable_within_max_months():
+    alloc, months = plan_goals([(10_000_000, 10, "High", 12), (1_000, 10, "Low", 12)], 1_000)
+    assert alloc == [10.0, 10.0]
+    assert months == [None, 100]
+    assert plan_goals([(MAX_MONTHS * 10, 10, "High", 1)], 10)[1] == [MAX_MONTHS]
+
+def test_empty():
+    assert plan_goals([], 1_000) == ([], [])
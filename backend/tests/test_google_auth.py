@@ -0,0 +1,104 @@
+import json
+import time
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, Response
+from jwt.algorithms import RSAAlgorithm
+from utils import google_auth
+from tests.conftest import run, serve
+
+AUDIENCE = "client-id.apps.googleusercontent.com"
+KEYS = {kid: rsa.generate_private_key(public_exponent=65537, key_size=2048) for kid in ("k1", "k2")}
+
+# Stub of Google's JWKS endpoint
+jwks = FastAPI()
+served = {"kids": ["k1"], "up": True, "requests": 0}
+
+@jwks.get("/certs")
+def certs():
+    served["requests"] += 1
+    if not served["up"]: return Response(status_code=503)
+    keys = [{**json.loads(RSAAlgorithm.to_jwk(KEYS[k].public_key())), "kid": k, "alg": "RS256", "use": "sig"} for k in served["kids"]]
+    return Response(json.dumps({"keys": keys}), media_type="application/json", headers={"Cache-Control": "public, max-age=3600"})
+
+@pytest.fixture(scope="module")
+def certs_url():
+    with serve(jwks) as url:
+        yield url + "/certs"
+
+@pytest.fixture
+def google(monkeypatch, certs_url):
+    monkeypatch.setattr(google_auth, "CERTS_URL", certs_url)
+    monkeypatch.setenv("GOOGLE_CLIENT_ID", AUDIENCE)
+    served.update(kids=["k1"], up=True, requests=0)
+    for name, value in (("_keys", {}), ("_expires", 0.0), ("_fetched", 0.0), ("_attempted", 0.0), ("_refresh", None)):
+        monkeypatch.setattr(google_auth, name, value)
+    yield served
+    run(google_auth.close())
+
+def token(kid="k1", aud=AUDIENCE, iss="https://accounts.google.com", exp=3600, email="a@example.com"):
+    now = int(time.time())
+    claims = {"iss": iss, "aud": aud, "sub": "1", "email": email, "iat": now, "exp": now + exp}
+    return jwt.encode(claims, KEYS[kid], algorithm="RS256", headers={"kid": kid})
+
+def verify(*tokens):
+    """Verifies tokens in order on one event loop; each result is the claims or the exception raised."""
+    async def go():
+        out = []
+        for t in tokens:
+            try:
+                out.append(await google_auth.verify_google_token(t, AUDIENCE))
+            except Exception as e:
+                out.append(e)
+        await google_auth.close()
+        return out
+    return run(go())
+
+def test_valid_token_is_verified_with_one_fetch(google):
+    first, second = verify(token(), token(email="b@example.com"))
+    assert first["email"] == "a@example.com" and second["email"] == "b@example.com"
+    assert google["requests"] == 1
+
+def test_expired_token(google):
+    assert isinstance(verify(token(exp=-60))[0], jwt.ExpiredSignatureError)
+
+@pytest.mark.parametrize("claims, error", [({"aud": "someone-else"}, jwt.InvalidAudienceError),
+                                           ({"iss": "https://evil.example.com"}, jwt.InvalidIssuerError)])
+def test_wrong_audience_or_issuer(google, claims, error):
+    assert isinstance(verify(token(**claims))[0], error)
+
+def test_unknown_kid_refetches_keys(google, monkeypatch):
+    monkeypatch.setattr(google_auth, "UNKNOWN_KID_INTERVAL", 0)
+    verify(token())
+    google["kids"] = ["k1", "k2"] # Google rotates in a new key
+    assert verify(token("k2"))[0]["email"] == "a@example.com"
+    assert google["requests"] == 2
+
+def test_unknown_kid_refetch_is_rate_limited(google):
+    assert verify(token(), token("k2"))[0]["email"] == "a@example.com"
+    google["kids"] = ["k1", "k2"]
+    # Within UNKNOWN_KID_INTERVAL of the last fetch: rejected without another fetch
+    assert isinstance(verify(token("k2"))[0], jwt.InvalidTokenError)
+    assert google["requests"] == 1
+
+def test_outage_without_cached_keys(google):
+    google["up"] = False
+    assert isinstance(verify(token())[0], google_auth.CertsUnavailable)
+
+def test_outage_with_cached_keys_keeps_verifying(google, monkeypatch):
+    verify(token())
+    google["up"] = False
+    monkeypatch.setattr(google_auth, "_expires", 0.0) # Cached keys have expired
+    assert verify(token(), token())[1]["email"] == "a@example.com"
+    assert google["requests"] == 2 # One failed refetch, then the stale keys are used for RETRY_AFTER
+
+def test_google_login_route(db, api, google):
+    res = api.post("/v1/auth/google-login", json={"token": token(email="new@example.com")})
+    assert res.status_code == 200 and res.json()["has_onboarded"] is False
+    assert run(db.users.count_documents({"username": "new@example.com", "auth_method": "google"})) == 1
+    assert api.post("/v1/auth/google-login", json={"token": token(aud="other")}).status_code == 400
+
+def test_google_login_route_during_outage(db, api, google):
+    google["up"] = False
+    assert api.post("/v1/auth/google-login", json={"token": token()}).status_code == 503
@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+import pytest
+from pymongo.errors import BulkWriteError
+from models import ExpenseModel, GoalModel
+from services import import_service
+from services.import_service import iter_records, import_rows, import_key
+from tests.conftest import run, login
+
+async def stream(*chunks):
+    for c in chunks: yield c
+
+def records(fmt, *chunks):
+    async def collect(): return [r async for r in iter_records(stream(*chunks), fmt)]
+    return run(collect())
+
+class Coll:
+    """insert_many stand-in: records each batch; `error(batch)` makes it raise a BulkWriteError."""
+    def __init__(self, error=None):
+        self.batches, self.error = [], error
+
+    async def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        self.batches.append(list(docs))
+        if self.error: raise BulkWriteError(self.error(docs))
+        return SimpleNamespace(inserted_ids=[object() for _ in docs])
+
+def load(coll, model, *chunks, fmt="csv", dedup=False):
+    return run(import_rows(coll, model, "imp", stream(*chunks), fmt, dedup))
+
+# --- PARSING ---
+def test_csv_records():
+    body = '﻿title,amount,category\r\n"Rent, June",25000,Bills\r\n"multi\r\nline",10,\r\n\r\nchai,"12.5",Food\r\n'.encode()
+    # Chunks split a line, a CRLF and the UTF-8 BOM
+    chunks = [body[:2], body[2:17], body[17:40], body[40:]]
+    assert records("csv", *chunks) == [
+        (1, {"title": "Rent, June", "amount": "25000", "category": "Bills"}),
+        (2, {"title": "multi\nline", "amount": "10"}), # empty cell: model default
+        (3, {"title": "chai", "amount": "12.5", "category": "Food"}),
+    ]
+
+def test_csv_bad_rows():
+    out = records("csv", b'title,amount\na,1,extra\nb\n"open,2\n')
+    assert [(row, str(e)) for row, e in out] == [(1, "Expected 2 columns, got 3"), (2, "Expected 2 columns, got 1"),
+                                                 (3, "Unterminated quoted field")]
+
+def test_multibyte_split_across_chunks():
+    body = "title,amount\n₹ chai,10\n".encode()
+    cut = body.index("₹".encode()) + 1
+    assert records("csv", body[:cut], body[cut:]) == [(1, {"title": "₹ chai", "amount": "10"})]
+
+def test_jsonl_records():
+    out = records("jsonl", b'{"title": "a", "amount": 1}\n\n[1, 2]\n{bad\n', b'{"title": "b", "amount": 2}')
+    assert out[0] == (1, {"title": "a", "amount": 1}) and out[3] == (4, {"title": "b", "amount": 2})
+    assert str(out[1][1]) == "Expected a JSON object" and isinstance(out[2][1], ValueError)
+
+# --- ROW ERRORS ---
+def test_per_row_errors_keep_counts_complete(monkeypatch):
+    monkeypatch.setattr(import_service, "MAX_ERRORS", 2)
+    coll = Coll()
+    result = load(coll, ExpenseModel, b"title,amount\nok,10\nbad,ten\n,5\nno-amount,\nfine,20.5\n")
+    assert result["inserted"] == 2 and result["failed"] == 3 and not result["truncated"]
+    assert [e["row"] for e in result["errors"]] == [2, 3] # capped at MAX_ERRORS
+    assert "amount" in result["errors"][0]["error"]
+    assert [d["amount"] for d in coll.batches[0]] == [10.0, 20.5] and all(d["username"] == "imp" for d in coll.batches[0])
+
+def test_validation_uses_the_models():
+    result = load(Coll(), GoalModel, b'{"name": "car", "target_amount": 1, "target_date": "2030-01-01", "priority": "Urgent"}\n', fmt="jsonl")
+    assert result["failed"] == 1 and result["errors"][0]["error"].startswith("priority:")
+
+def test_max_rows_truncates(monkeypatch):
+    monkeypatch.setattr(import_service, "MAX_ROWS", 3)
+    result = load(Coll(), ExpenseModel, b"title,amount\n" + b"".join(b"e%d,1\n" % i for i in range(5)))
+    assert result["inserted"] == 3 and result["truncated"]
+
+# --- BATCHING ---
+@pytest.mark.parametrize("rows, sizes", [(7, [3, 3, 1]), (6, [3, 3]), (2, [2]), (0, [])])
+def test_flush_at_the_batch_boundary(monkeypatch, rows, sizes):
+    monkeypatch.setattr(import_service, "BATCH_SIZE", 3)
+    coll = Coll()
+    result = load(coll, ExpenseModel, b"title,amount\n" + b"".join(b"e%d,1\n" % i for i in range(rows)))
+    assert [len(b) for b in coll.batches] == sizes and result["inserted"] == rows
+    # Row numbers survive the batching: the last batch holds the last rows
+    if rows: assert coll.batches[-1][-1]["title"] == f"e{rows - 1}"
+
+# --- DEDUP ---
+def test_import_key():
+    doc = {"title": "a", "amount": 1.0}
+    assert import_key({"external_id": 42}, doc, dedup=False) == "42"
+    assert import_key({"external_id": ""}, doc, dedup=False) is None
+    assert import_key({}, doc, dedup=True) == import_key({}, dict(reversed(doc.items())), dedup=True)
+    assert import_key({}, doc, dedup=True) != import_key({}, {**doc, "amount": 2.0}, dedup=True)
+
+def test_duplicate_keys_are_counted_not_failed(monkeypatch):
+    monkeypatch.setattr(import_service, "BATCH_SIZE", 3)
+    def error(docs):
+        # What Mongo reports for an unordered insert_many against the partial unique index:
+        # the first row of each batch is already there, the third breaks a server-side rule
+        errors = [{"index": 0, "code": 11000, "errmsg": "E11000 duplicate key error"},
+                  {"index": 2, "code": 121, "errmsg": "Document failed validation"}][:len(docs) - 1]
+        return {"nInserted": len(docs) - len(errors), "writeErrors": errors}
+    coll = Coll(error)
+    result = load(coll, ExpenseModel, b"title,amount,external_id\na,1,x1\nb,2,x2\nc,3,x3\nd,4,x4\nE,5,x5\n")
+    assert [d["import_key"] for d in coll.batches[0]] == ["x1", "x2", "x3"]
+    assert result == {"inserted": 2, "duplicates": 2, "failed": 1, "truncated": False,
+                      "errors": [{"row": 3, "error": "Document failed validation"}]}
+
+def test_import_route(api, db):
+    headers = {**login(db, "imp"), "Content-Type": "text/csv"}
+    r = api.post("/v1/finance/import/expenses", content=b"title,amount,date\nrent,25000,2026-01-05\nchai,12.5,2026-01-06\n", headers=headers)
+    assert r.status_code == 200 and r.json()["inserted"] == 2
+    snap = run(db.snapshots.find_one({"username": "imp"}))
+    assert [e["title"] for e in snap["expenses"]] == ["chai", "rent"]
+    assert api.post("/v1/finance/import/pets", content=b"", headers=headers).status_code == 404
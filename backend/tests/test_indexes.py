@@ -0,0 +1,6 @@
+from tests.conftest import run
+
+def test_indexes_build_over_legacy_usage_docs(db):
+    # Legacy per-call usage docs: no `day`, several per user
+    run(db.ai_usage.insert_many([{"username": "u", "created_at": i} for i in range(3)]))
+    run(db.ensure_indexes())
@@ -0,0 +1,52 @@
+import pytest
+from services.financial_engine import calculate_financial_health
+from utils import metrics
+from benchmarks.synthetic import make_rows
+from tests.conftest import login
+
+@pytest.fixture
+def admins(monkeypatch):
+    monkeypatch.setattr("dependencies.ADMIN_USERS", {"ops"})
+    monkeypatch.setattr("dependencies.METRICS_TOKEN", None)
+
+def counts():
+    return {k[0]: sum(s[:-1]) for k, s in metrics.engine_stage.series.items()}
+
+def test_each_stage_timed_once_per_run():
+    before = counts()
+    calculate_financial_health(*make_rows(1)[0])
+    after = counts()
+    ran = {k: after[k] - before.get(k, 0) for k in after if after[k] != before.get(k, 0)}
+    assert ran == {k: 1 for k in ("expense_aggregation", "aggregation", "debt", "goals", "projections", "allocation", "scoring")}
+
+def test_metrics_needs_an_admin(api, db, admins):
+    assert api.get("/metrics").status_code == 401
+    assert api.get("/metrics", headers=login(db, "mallory")).status_code == 403
+    assert api.get("/metrics/profiles/x", headers=login(db, "eve")).status_code == 403
+    r = api.get("/metrics", headers=login(db, "ops"))
+    assert r.status_code == 200 and "finai_http_request_seconds" in r.text
+
+def test_metrics_token(api, db, admins, monkeypatch):
+    monkeypatch.setattr("dependencies.METRICS_TOKEN", "scrape")
+    assert api.get("/metrics", headers={"Authorization": "Bearer scrape"}).status_code == 200
+    assert api.get("/metrics", headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert api.get("/metrics", headers=login(db, "ops")).status_code == 200
+
+def test_profiler_needs_an_admin(api, db, admins, monkeypatch):
+    monkeypatch.setattr(metrics, "PROFILING_ENABLED", True)
+    profile = {"X-Profile": "1"}
+    assert "x-profile-id" not in api.get("/v1/jobs/me", headers=profile).headers
+    assert "x-profile-id" not in api.get("/v1/jobs/me", headers={**profile, **login(db, "trudy")}).headers
+
+    admin = login(db, "ops")
+    r = api.get("/v1/jobs/me", headers={**profile, **admin})
+    assert r.status_code == 200 and r.headers["x-profile-id"]
+    assert api.get(f"/metrics/profiles/{r.headers['x-profile-id']}", headers=admin).status_code == 200
+
+@pytest.mark.parametrize("path", ["/v1/ai/advisor/cache-stats", "/v1/auth/cache-stats", "/v1/finance/scenarios/cache-stats"])
+def test_cache_stats_need_an_admin(api, db, admins, monkeypatch, path):
+    assert api.get(path).status_code == 401
+    assert api.get(path, headers=login(db, "walter")).status_code == 403
+    assert api.get(path, headers=login(db, "ops")).status_code == 200
+    monkeypatch.setattr("dependencies.METRICS_TOKEN", "scrape")
+    assert api.get(path, headers={"Authorization": "Bearer scrape"}).status_code == 200
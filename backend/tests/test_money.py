@@ -0,0 +1,61 @@
+import json
+import random
+from decimal import Decimal
+import pytest
+from models import ExpenseModel, LiabilityModel
+from utils.money import paise, rupees, MAX_PAISE
+from tests.conftest import login
+
+HALVES = [0.125, 0.375, 1.005, 1.015, 2.675, 8.345, 0.5, -2.675, -0.005, 1234567.895, 99999999999.995, 1e-9, -0.0]
+
+def old(x):
+    """What the models stored before: round(x, 2) on the float."""
+    return round(x, 2)
+
+@pytest.mark.parametrize("x", HALVES)
+def test_half_paise_round_like_round_2dp(x):
+    assert rupees(paise(x)) == old(x)
+
+def test_random_amounts_round_like_round_2dp():
+    rng = random.Random(7)
+    for _ in range(20000):
+        x = round(rng.uniform(-1e7, 1e7), rng.randint(0, 6))
+        assert rupees(paise(x)) == old(x), x
+    for _ in range(2000): # beyond FAST_LIMIT: the exact path
+        x = rng.uniform(1e13, 1e15)
+        assert rupees(paise(x)) == old(x), x
+
+def test_ints_strings_and_decimals():
+    assert paise(10) == 1000 and paise(-3) == -300 and paise(0) == 0
+    assert paise("12.5") == 1250 and paise(" 7 ") == 700 and paise("2.675") == paise(2.675) == 267
+    assert paise(Decimal("0.015")) == 2 and paise(Decimal("0.025")) == 2 # half-even on the exact value
+    assert paise(Decimal("123.456")) == 12346
+
+@pytest.mark.parametrize("bad", ["abc", "", "nan", "inf", float("nan"), float("-inf"), None, [1], True, 10 ** 17, -1e17, Decimal("1e20")])
+def test_rejected(bad):
+    with pytest.raises(ValueError): paise(bad)
+
+def test_range_edges():
+    assert paise(MAX_PAISE // 100) == MAX_PAISE // 100 * 100
+    with pytest.raises(ValueError, match="out of range"): paise(MAX_PAISE // 100 + 1)
+
+def test_models_hold_paise_and_serialize_rupees():
+    e = ExpenseModel(title="t", amount=2.675)
+    assert e.amount == 267
+    assert e.dict()["amount"] == 2.67 and json.loads(e.model_dump_json())["amount"] == 2.67
+    assert ExpenseModel(title="t", amount="19.99").dict()["amount"] == 19.99
+    assert ExpenseModel(title="t", amount=5).dict()["amount"] == 5.0
+
+def test_non_money_floats_round_after_coercion():
+    # The validator runs after coercion now, so numeric strings are rounded like floats
+    l = LiabilityModel(name="car", type="Loan", outstanding_amount=1, interest_rate="9.126", monthly_payment=1)
+    assert l.interest_rate == 9.13 and LiabilityModel(name="c", type="L", outstanding_amount=1, interest_rate=9.125, monthly_payment=1).interest_rate == 9.12
+
+def test_api_amounts(api, db):
+    headers = login(db, "money")
+    ok = api.post("/v1/finance/expenses", json={"title": "t", "amount": "1.005", "date": "2026-01-01"}, headers=headers)
+    assert ok.status_code == 200
+    assert api.get("/v1/finance/expenses", headers=headers).json()["expenses"][0]["amount"] == old(1.005)
+    for bad in (1e20, "ten", None):
+        r = api.post("/v1/finance/expenses", json={"title": "t", "amount": bad}, headers=headers)
+        assert r.status_code == 422, bad
@@ -0,0 +1,71 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from services import monte_carlo as mc
+from tests.conftest import login
+
+ALLOCATION = {"Cash": 200_000.0, "Stock": 500_000.0, "Mutual Fund": 300_000.0, "Crypto": 50_000.0}
+LOANS = [(400_000.0, 9.5, 12_000.0), (60_000.0, 36.0, 3_000.0)]
+
+def run(seed=0, **kw):
+    args = {"allocation": ALLOCATION, "salary": 120_000.0, "burn": 60_000.0, "liabilities": LOANS, "years": 10, "paths": 2000, "seed": seed}
+    return mc.simulate(**{**args, **kw})
+
+def test_seeded_and_reproducible():
+    a, b = run(seed=42), run(seed=42)
+    assert np.array_equal(a["bands"], b["bands"]) and a["prob_positive"] == b["prob_positive"]
+    assert not np.array_equal(a["bands"], run(seed=43)["bands"])
+
+def test_percentile_bands_are_ordered_and_widen():
+    bands = run()["bands"]
+    assert bands.shape == (10, len(mc.PERCENTILES))
+    assert (np.diff(bands, axis=1) >= 0).all() # p5 <= p25 <= p50 <= p75 <= p95 every year
+    spread = bands[:, -1] - bands[:, 0]
+    assert spread[-1] > spread[0] > 0
+
+def test_no_volatility_is_the_deterministic_path(monkeypatch):
+    monkeypatch.setattr(mc, "ASSET_RETURNS", {"Cash": (0.0, 0.0)})
+    monkeypatch.setattr(mc, "SALARY_GROWTH", (0.0, 0.0))
+    monkeypatch.setattr(mc, "INFLATION", 0.0)
+    sim = mc.simulate({"Cash": 1_000.0}, 100.0, 40.0, [], years=3, paths=50)
+    expected = [1_000 + 12 * y * 60 for y in (1, 2, 3)]
+    assert np.allclose(sim["bands"], np.array(expected)[:, None]) and sim["prob_positive"] == 1.0
+
+def monthly(balance, annual_rate, payment, months):
+    """Reference schedule: (EMI paid, balance after) month by month."""
+    r, out = annual_rate / 1200, []
+    for _ in range(months):
+        due = balance * (1 + r)
+        paid = min(payment, due) if balance > 0 else 0.0
+        balance = max(due - paid, 0.0) if balance > 0 else 0.0
+        out.append((paid, balance))
+    return out
+
+@pytest.mark.parametrize("loan", [(400_000.0, 9.5, 12_000.0), (12_000.0, 0.0, 1_000.0), (60_000.0, 36.0, 3_000.0), (0.0, 10.0, 500.0)])
+def test_emi_runs_off(loan):
+    months = 60
+    emi, debt = mc.emi_runoff([loan], months)
+    ref = monthly(*loan, months)
+    assert emi == pytest.approx([p for p, _ in ref], abs=1e-6)
+    assert debt == pytest.approx([b for _, b in ref], abs=1e-6)
+    assert (np.diff(debt) <= 1e-9).all()
+
+def test_emi_runoff_adds_loans_up():
+    emi, debt = mc.emi_runoff(LOANS, 36)
+    parts = [mc.emi_runoff([l], 36) for l in LOANS]
+    assert np.allclose(emi, sum(p[0] for p in parts)) and np.allclose(debt, sum(p[1] for p in parts))
+    assert emi[0] == 15_000.0 and emi[-1] == 12_000.0 # the card clears in month 31, the car runs past three years
+
+def test_debt_lowers_the_odds():
+    assert run(salary=70_000.0, liabilities=[(5_000_000.0, 12.0, 10_000.0)])["prob_positive"] < run()["prob_positive"]
+
+def test_projection_clamps_and_labels():
+    out = mc.projection({}, 50_000.0, 30_000.0, [], years=99, paths=1)
+    assert out["years"] == mc.MAX_YEARS and out["paths"] == 100 and len(out["bands"]) == mc.MAX_YEARS
+    assert set(out["bands"][0]) == {"year", "month", "p5", "p25", "p50", "p75", "p95"}
+    assert list(out["assumptions"]["asset_returns"]) == ["Cash"]
+
+def test_projection_route(api, db):
+    r = api.get("/v1/finance/projection", params={"years": 2, "paths": 200, "seed": 7}, headers=login(db, "mc"))
+    assert r.status_code == 200 and r.json()["seed"] == 7 and len(r.json()["bands"]) == 2
@@ -0,0 +1,109 @@
+import time
+import asyncio
+import pytest
+from services import rate_limiter as rl
+from tests.conftest import run, login
+
+DAY = rl.DAY
+# Today's day number (D * DAY is its midnight, UTC): the TTL index drops usage docs of past days,
+# in mongomock too, so the injected clock stays around the real date
+D = int(time.time() // DAY)
+
+class Clock:
+    def __init__(self, t): self.t = t
+    def __call__(self): return self.t
+
+@pytest.fixture
+def clock(monkeypatch, db):
+    """Fresh limiter state on an injected clock (and mongomock behind ai_usage)."""
+    c = Clock(D * DAY + DAY / 2)
+    monkeypatch.setattr(rl, "clock", c)
+    monkeypatch.setattr(rl, "TIERS", {"free": 10, "plus": 100, "pro": 0})
+    worker()
+    monkeypatch.setattr(rl, "_loads", {})
+    monkeypatch.setattr(rl, "stats", dict.fromkeys(rl.stats, 0))
+    return c
+
+def worker(state=None):
+    """Switches the limiter's in-process state: each (counters, pending) pair is one worker."""
+    state = state or ({}, {})
+    rl._counters, rl._pending = state
+    return state
+
+def use(user, n=1):
+    return run(_use(user, n))
+
+async def _use(user, n):
+    return [await rl.acquire(user) for _ in range(n)]
+
+USER = {"username": "quota"}
+
+def test_daily_limit(clock):
+    quotas = use(USER, 11)
+    assert [q.allowed for q in quotas] == [True] * 10 + [False]
+    assert quotas[0] == rl.Quota(True, 10, 9, DAY // 2) and quotas[-1].remaining == 0
+
+def test_yesterday_weighted_by_what_is_left_of_the_window(clock):
+    use(USER, 10)
+    clock.t = (D + 1) * DAY + DAY / 4 # yesterday's 10 uses count as 7.5
+    q = run(rl.peek(USER))
+    assert q.allowed and q.remaining == 2 and q.reset == 3 * DAY // 4
+    assert [q.allowed for q in use(USER, 3)] == [True, True, False]
+    clock.t = (D + 1) * DAY + 3 * DAY / 4 # now they count as 2.5
+    assert run(rl.peek(USER)).remaining == 5
+    clock.t = (D + 3) * DAY # two days on: nothing carries over
+    assert run(rl.peek(USER)).remaining == 10
+
+def test_tiers(clock):
+    assert rl.parse_tiers(" plus : 50 ,pro:0,broken, :3") == {"free": rl.AI_DAILY_LIMIT, "plus": 50, "pro": 0}
+    assert rl.limit_for({"tier": "plus"}) == 100 and rl.limit_for({"tier": "gold"}) == 10 and rl.limit_for({}) == 10
+    assert [q.allowed for q in use({"username": "p", "tier": "plus"}, 101)][-2:] == [True, False]
+    uncapped = use({"username": "u", "tier": "pro"}, 50)
+    assert all(q.allowed and q.limit == 0 and q.remaining == -1 for q in uncapped)
+
+def test_concurrent_first_checks_share_one_seed(clock):
+    async def burst(): return await asyncio.gather(*(rl.acquire(USER) for _ in range(5)))
+    assert all(q.allowed for q in run(burst()))
+    assert rl.stats["loads"] == 1 and rl._counters["quota"].curr == 5
+
+def test_flush_and_seed_merge_across_workers(clock, db):
+    a = worker()
+    use(USER, 3)
+    run(rl.flush())
+    b = worker()
+    use(USER, 4) # seeded with a's 3 flushed uses
+    assert rl._counters["quota"].curr == 7
+    run(rl.flush())
+    worker(a)
+    use(USER)
+    run(rl.flush()) # a pulls back b's uses with its own
+    assert rl._counters["quota"].curr == 8
+    assert run(db.ai_usage.find_one({"username": "quota", "day": D}))["count"] == 8
+    assert [q.allowed for q in use(USER, 3)] == [True, True, False]
+
+def test_seed_reads_yesterday(clock, db):
+    run(db.ai_usage.insert_one({"username": "quota", "day": D - 1, "count": 8}))
+    # Half of yesterday is still inside the window: 4 of its uses count
+    assert run(rl.peek(USER)).remaining == 6
+
+def test_failed_flush_keeps_the_uses(clock, monkeypatch):
+    use(USER, 2)
+    async def down(*a, **k): raise ConnectionError("mongo down")
+    monkeypatch.setattr(rl.ai_usage, "find_one_and_update", down)
+    run(rl.flush())
+    assert rl._pending == {("quota", D): 2}
+
+def test_stale_counters_are_dropped_on_flush(clock):
+    use(USER)
+    run(rl.flush())
+    clock.t = (D + 2) * DAY
+    run(rl.flush())
+    assert "quota" not in rl._counters
+
+def test_rate_limit_headers(api, db, clock):
+    headers = login(db, "hdr")
+    use({"username": "hdr"}, 3)
+    r = api.get("/v1/ai/advisor/quota", headers=headers)
+    assert r.status_code == 200
+    assert (r.headers["X-RateLimit-Limit"], r.headers["X-RateLimit-Remaining"], r.headers["X-RateLimit-Reset"]) == ("10", "7", str(DAY // 2))
+    assert rl.headers(rl.Quota(True, 0, -1, 5)) == {"X-RateLimit-Limit": "0", "X-RateLimit-Remaining": "-1", "X-RateLimit-Reset": "5"}
@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+from dataclasses import replace
+import pytest
+from services.financial_engine import EngineProfile, EngineLiability, EngineGoal, calculate_from_totals, expense_summary
+from services.scenario_service import Inputs, ScenarioError, evaluate, apply
+from tests.conftest import login
+
+def inputs(salary=9_000_000, rent=2_000_000):
+    liabilities = [EngineLiability("car", "Loan", 40_000_000, 9.5, 1_200_000), EngineLiability("card", "CC", 6_000_000, 36.0, 300_000)]
+    summary = expense_summary({})
+    totals = {"total_expense": summary["monthly_burn"], "expense_summary": summary, "total_debt": 46_000_000, "total_emi": 1_500_000,
+              "asset_value": 23_000_000, "liquid_value": 8_000_000, "allocation": {"Gold": 15_000_000, "Bank": 8_000_000}}
+    return Inputs(EngineProfile(salary, rent, 5_000_000), totals, liabilities, [EngineGoal("trip", 10_000_000, "2030-01-01", "Medium")], {})
+
+def base_of(s):
+    _, keys, results, _ = evaluate(s)
+    return SimpleNamespace(keys=keys, results=results)
+
+def change(type, **fields):
+    return SimpleNamespace(type=type, **fields)
+
+def test_no_changes_match_the_engine():
+    s = inputs()
+    health = evaluate(s)[0]
+    assert health == calculate_from_totals(s.profile, s.totals, s.liabilities, s.goals)
+    again, _, _, rerun = evaluate(apply(s, []), base_of(s))
+    assert again == health and rerun == []
+
+@pytest.mark.parametrize("salary", [9_000_000, 3_500_000, 1_000_000]) # surplus, roughly zero, deficit
+def test_extra_payment_adds_exactly_its_amount(salary):
+    s = inputs(salary)
+    base = evaluate(s)[0]["debt_strategy"]["recommended_extra_payment"]
+    for c in (1, 1_000_000, 123_456):
+        health = evaluate(apply(s, [change("extra_payment", amount=c)]), base_of(s))[0]
+        assert health["debt_strategy"]["recommended_extra_payment"] - base == pytest.approx(c / 100, abs=1e-6)
+
+def test_goal_reruns_only_goal_planning():
+    s = inputs()
+    goal = change("goal", name="car", target_amount=80_000_000, target_date="2029-01-01", priority="High")
+    health, _, _, rerun = evaluate(apply(s, [goal]), base_of(s))
+    assert rerun == ["goals"]
+    assert [g["name"] for g in health["analyzed_goals"]] == ["trip", "car"]
+
+def test_extra_payment_needs_debt_and_a_positive_amount():
+    s = inputs()
+    for amount in (0, -1_000_000):
+        with pytest.raises(ScenarioError, match="positive"): apply(s, [change("extra_payment", amount=amount)])
+    debt_free = replace(s, liabilities=[], totals={**s.totals, "total_debt": 0, "total_emi": 0})
+    with pytest.raises(ScenarioError, match="No debt"): apply(debt_free, [change("extra_payment", amount=1_000_000)])
+
+def test_extra_payment_route_rejects_a_debt_free_user(api, db):
+    headers = login(db, "freebird")
+    body = {"scenarios": [{"name": "prepay", "changes": [{"type": "extra_payment", "amount": 5000}]}]}
+    r = api.post("/v1/finance/scenarios", json=body, headers=headers)
+    assert r.status_code == 400 and "No debt" in r.text
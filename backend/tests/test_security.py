@@ -0,0 +1,43 @@
+import threading
+import pytest
+from cryptography.fernet import Fernet, MultiFernet
+from utils import security
+from tests.conftest import run
+
+@pytest.fixture
+def keys(monkeypatch):
+    new, old = Fernet(Fernet.generate_key()), Fernet(Fernet.generate_key())
+    monkeypatch.setattr(security, "cipher", MultiFernet([new, old]))
+    security._cache.clear()
+    yield new, old
+    security._cache.clear()
+
+@pytest.fixture
+def fill_threads(monkeypatch):
+    threads, fill = [], security._fill
+    def record(out, misses):
+        threads.append(threading.current_thread())
+        fill(out, misses)
+    monkeypatch.setattr(security, "_fill", record)
+    return threads
+
+def test_page_of_misses_is_decrypted_off_the_loop(keys, fill_threads):
+    new, old = keys
+    texts = [security.encrypt_text(f"m{i}") for i in range(40)] + [old.encrypt(b"legacy").decode(), "garbage", ""]
+    assert run(security.decrypt_page(texts)) == [f"m{i}" for i in range(40)] + ["legacy", "[Encrypted Message]", ""]
+    assert fill_threads and fill_threads[0] is not threading.main_thread()
+
+def test_small_batches_and_cache_hits_stay_inline(keys, fill_threads):
+    texts = [security.encrypt_text(f"m{i}") for i in range(security.OFFLOAD_THRESHOLD - 1)]
+    assert run(security.decrypt_page(texts)) == [f"m{i}" for i in range(len(texts))]
+    assert fill_threads == [threading.main_thread()]
+    # Second read is all cache hits: nothing left to decrypt
+    assert run(security.decrypt_page(texts * 5)) == [f"m{i}" for i in range(len(texts))] * 5
+    assert len(fill_threads) == 1
+
+def test_rotation_keeps_the_plaintext_cached(keys):
+    _, old = keys
+    legacy = old.encrypt(b"hello").decode()
+    assert security.decrypt_many([legacy]) == ["hello"]
+    rotated = security.rotate_text(legacy)
+    assert rotated != legacy and security.decrypt_many([rotated, legacy]) == ["hello", "hello"]
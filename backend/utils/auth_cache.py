@@ -0,0 +1,54 @@
+import os
+from cachetools import TTLCache
+
+# Per-worker caches. A revoke or profile change on one worker reaches the others
+# after at most *_TTL seconds, which is the staleness bound for multi-worker deploys.
+MAXSIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+PAYLOAD_TTL = int(os.getenv("AUTH_PAYLOAD_TTL", "300"))
+USER_TTL = int(os.getenv("AUTH_USER_TTL", "60"))
+NOT_REVOKED_TTL = int(os.getenv("AUTH_NOT_REVOKED_TTL", "30"))
+REVOKED_TTL = 3600 # Same as the token lifetime / token_blacklist TTL index
+
+_MISSING = object()
+
+class CountedCache:
+    """Bounded TTL cache that counts hits and misses."""
+    def __init__(self, maxsize, ttl):
+        self.data = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def pop(self, key):
+        self.data.pop(key, None)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.data), "maxsize": self.data.maxsize, "ttl": self.data.ttl}
+
+payloads = CountedCache(MAXSIZE, PAYLOAD_TTL)        # raw token -> decoded JWT payload
+users = CountedCache(MAXSIZE, USER_TTL)              # username -> user document
+not_revoked = CountedCache(MAXSIZE, NOT_REVOKED_TTL) # jti -> True (negative blacklist cache)
+revoked = CountedCache(MAXSIZE, REVOKED_TTL)         # jti -> True
+
+def revoke(jti, token=None):
+    """Called by /logout so this worker rejects the token immediately."""
+    not_revoked.pop(jti)
+    revoked.set(jti, True)
+    if token: payloads.pop(token)
+
+def invalidate_user(username):
+    """Called after profile writes (e.g. /onboard) so the next request reloads the user."""
+    users.pop(username)
+
+def stats():
+    return {"payloads": payloads.stats(), "users": users.stats(), "not_revoked": not_revoked.stats(), "revoked": revoked.stats()}
@@ -0,0 +1,98 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import jwt
+
+# 🚀 UPGRADE: Google ID tokens verified locally. Google's signing keys (JWKS) are cached for
+# as long as its Cache-Control allows and refreshed in the background shortly before they
+# expire, so a sign-in costs one RSA signature check and no network round trip.
+CERTS_URL = os.getenv("GOOGLE_CERTS_URL", "https://www.googleapis.com/oauth2/v3/certs")
+ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+DEFAULT_TTL = 3600         # When the response has no max-age
+REFRESH_AHEAD = 300        # Seconds before expiry that a background refresh starts
+RETRY_AFTER = 30           # Back-off while Google is unreachable and stale keys are in use
+UNKNOWN_KID_INTERVAL = 60  # Min seconds between refetches triggered by an unseen key id
+
+log = logging.getLogger(__name__)
+_keys = {}        # kid -> PyJWK
+_expires = 0.0
+_fetched = 0.0
+_attempted = 0.0  # Last fetch start, successful or not
+_refresh = None   # In-flight fetch, shared by concurrent callers
+_client = None
+stats = {"fetches": 0, "errors": 0}
+
+class CertsUnavailable(Exception):
+    """Google's keys could not be fetched and none are cached."""
+
+def max_age(cache_control):
+    m = re.search(r"max-age=(\d+)", cache_control or "")
+    return int(m.group(1)) if m else DEFAULT_TTL
+
+async def _fetch():
+    global _keys, _expires, _fetched, _client
+    if _client is None:
+        import httpx # Only needed once someone signs in with Google
+        _client = httpx.AsyncClient(timeout=5.0)
+    try:
+        res = await _client.get(CERTS_URL)
+        res.raise_for_status()
+        keys = {k["kid"]: jwt.PyJWK(k) for k in res.json()["keys"] if k.get("kid")}
+    except Exception as e:
+        stats["errors"] += 1
+        raise CertsUnavailable(str(e)) from e
+    # A cached copy upstream may already be part-way through its lifetime (Age header)
+    ttl = max_age(res.headers.get("cache-control")) - int(res.headers.get("age", 0) or 0)
+    _keys, _fetched, _expires = keys, time.time(), time.time() + max(0, ttl)
+    stats["fetches"] += 1
+
+def _log_failure(task):
+    if not task.cancelled() and task.exception():
+        log.warning("⚠️ Google certs refresh failed: %s", task.exception())
+
+def _start_refresh():
+    global _refresh, _attempted
+    if _refresh is None or _refresh.done():
+        _attempted = time.time()
+        _refresh = asyncio.ensure_future(_fetch())
+        _refresh.add_done_callback(_log_failure)
+    return _refresh
+
+async def signing_key(kid):
+    global _expires
+    now = time.time()
+    if now >= _expires:
+        try:
+            await _start_refresh()
+        except CertsUnavailable:
+            if not _keys: raise
+            # Keep verifying with the last keys (Google rotates with days of overlap) and
+            # don't make every sign-in wait on a failing fetch
+            _expires = time.time() + RETRY_AFTER
+    elif now >= _expires - REFRESH_AHEAD and now - _attempted >= RETRY_AFTER:
+        _start_refresh()
+
+    key = _keys.get(kid)
+    if key is None and time.time() - _fetched >= UNKNOWN_KID_INTERVAL:
+        # Probably a freshly rotated key; refetch (rate-limited so bogus kids can't force fetches)
+        await _start_refresh()
+        key = _keys.get(kid)
+    return key
+
+async def verify_google_token(token: str, audience: str):
+    """Claims of a Google ID token; raises jwt.InvalidTokenError for any invalid token."""
+    kid = jwt.get_unverified_header(token).get("kid")
+    key = await signing_key(kid)
+    if key is None: raise jwt.InvalidTokenError("Unknown signing key")
+    return jwt.decode(token, key.key, algorithms=["RS256"], audience=audience, issuer=ISSUERS)
+
+async def close():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def cert_stats():
+    return {**stats, "keys": len(_keys), "expires_in": max(0, int(_expires - time.time()))}
@@ -0,0 +1,190 @@
+import os
+import sys
+import time
+import uuid
+import threading
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from contextlib import nullcontext
+from pymongo import monitoring
+
+# Prometheus-style histograms kept in process and rendered as text on GET /metrics.
+# METRICS_ENABLED=0 turns every timer into a no-op.
+ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILES_KEPT = 20
+
+class Histogram:
+    """Cumulative-bucket histogram per label set (le buckets in seconds)."""
+    def __init__(self, name, help, labels, buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)):
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.series = {} # label values -> [bucket counts..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, seconds, *values):
+        with self.lock:
+            s = self.series.get(values)
+            if s is None: s = self.series[values] = [0] * (len(self.buckets) + 2)
+            s[bisect_left(self.buckets, seconds)] += 1
+            s[-1] += seconds
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock: series = {k: list(v) for k, v in self.series.items()}
+        for values, s in sorted(series.items()):
+            base = ",".join(f'{l}="{_escape(v)}"' for l, v in zip(self.labels, values))
+            sep = "," if base else ""
+            total = 0
+            for le, n in zip(list(self.buckets) + ["+Inf"], s[:-1]):
+                total += n
+                out.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {total}')
+            labels = f"{{{base}}}" if base else ""
+            out.append(f"{self.name}_sum{labels} {s[-1]:.6f}")
+            out.append(f"{self.name}_count{labels} {total}")
+        return "\n".join(out)
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+engine_stage = Histogram("finai_engine_stage_seconds", "Financial engine time per stage", ("stage",))
+mongo_command = Histogram("finai_mongo_command_seconds", "MongoDB command latency", ("collection", "command", "outcome"))
+llm_request = Histogram("finai_llm_request_seconds", "LLM provider latency (stream: until the last token)", ("mode", "outcome"))
+llm_first_token = Histogram("finai_llm_first_token_seconds", "Streaming LLM time to first token", ())
+http_request = Histogram("finai_http_request_seconds", "HTTP request latency by route", ("method", "route", "status"))
+HISTOGRAMS = [engine_stage, mongo_command, llm_request, llm_first_token, http_request]
+
+class _Timer:
+    __slots__ = ("hist", "values", "start")
+    def __init__(self, hist, values):
+        self.hist, self.values = hist, values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.start, *self.values)
+
+_NOOP = nullcontext()
+
+def timer(hist, *values):
+    return _Timer(hist, values) if ENABLED else _NOOP
+
+def stage(name):
+    return timer(engine_stage, name)
+
+def render():
+    return "\n".join(h.render() for h in HISTOGRAMS) + "\n"
+
+# --- MONGO ---
+class CommandTimer(monitoring.CommandListener):
+    """Per-collection command timings from the driver's own round-trip measurement."""
+    def __init__(self):
+        self.pending = {}
+
+    def started(self, event):
+        # The collection is the value of the command's first key (e.g. {"find": "expenses"})
+        coll = event.command.get(event.command_name)
+        self.pending[(event.connection_id, event.request_id)] = coll if isinstance(coll, str) else "-"
+
+    def _done(self, event, outcome):
+        coll = self.pending.pop((event.connection_id, event.request_id), "-")
+        mongo_command.observe(event.duration_micros / 1e6, coll, event.command_name, outcome)
+
+    def succeeded(self, event):
+        self._done(event, "ok")
+
+    def failed(self, event):
+        self._done(event, "error")
+
+def mongo_listeners():
+    return [CommandTimer()] if ENABLED else []
+
+# --- SAMPLING PROFILER ---
+_profiles = OrderedDict() # id -> folded stacks text, newest last
+
+class Sampler:
+    """
+    Samples every thread's Python stack each PROFILE_INTERVAL (the event loop plus the
+    threadpool that runs engine work); output is flamegraph 'folded' text, one root per thread.
+    Other requests in flight on the same worker show up too.
+    """
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.stacks = Counter()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self.stop_event.wait(PROFILE_INTERVAL):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me: continue
+                stack = []
+                while frame is not None:
+                    stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop_event.set()
+        self.thread.join()
+
+    def save(self):
+        _profiles[self.id] = "\n".join(f"{s} {n}" for s, n in self.stacks.most_common())
+        while len(_profiles) > PROFILES_KEPT: _profiles.popitem(last=False)
+
+def get_profile(profile_id):
+    return _profiles.get(profile_id)
+
+# --- HTTP ---
+class MetricsMiddleware:
+    """
+    ASGI middleware: per-route latency (until the last body chunk, so streams are timed in
+    full) and, with PROFILING_ENABLED=1, a sampled profile for requests sent with
+    "X-Profile: 1" that `authorize` (awaited with the Authorization header) accepts; it raises
+    to refuse, and the request is then served unprofiled. The response carries X-Profile-Id;
+    stacks are at /metrics/profiles/{id}.
+    """
+    def __init__(self, app, authorize):
+        self.app, self.authorize = app, authorize
+
+    async def _may_profile(self, headers):
+        if (b"x-profile", b"1") not in headers: return False
+        authorization = next((v.decode("latin-1") for k, v in headers if k == b"authorization"), None)
+        try:
+            await self.authorize(authorization)
+        except Exception:
+            return False
+        return True
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (ENABLED or PROFILING_ENABLED):
+            return await self.app(scope, receive, send)
+
+        start, status = time.perf_counter(), [500]
+        sampler = None
+        if PROFILING_ENABLED and await self._may_profile(scope.get("headers", [])):
+            sampler = Sampler().__enter__()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if sampler: message.setdefault("headers", []).append((b"x-profile-id", sampler.id.encode()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if sampler:
+                sampler.__exit__()
+                sampler.save()
+            if ENABLED:
+                route = getattr(scope.get("route"), "path", "unmatched")
+                http_request.observe(time.perf_counter() - start, scope["method"], route, str(status[0]))
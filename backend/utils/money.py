@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+# 🚀 UPGRADE: Money as integer paise. Amounts are converted once, exactly (floats and Decimals
+# via their exact integer ratio, never through str()), and everything after that is int math.
+# Rounding is half-even on the exact value, which is what round(x, 2) did to model inputs.
+MAX_PAISE = 2 ** 63 - 1 # int64: what Mongo and numpy columns hold
+FAST_LIMIT = 1e13       # Below this a float's spacing is far under a paisa
+
+def _round_half_even(num, den):
+    q, r = divmod(num, den)
+    if 2 * r > den or (2 * r == den and q & 1): q += 1
+    return q
+
+def paise(value) -> int:
+    """
+    Exact paise for a rupee amount (int, float, Decimal or numeric string). Raises ValueError
+    for anything else, NaN/infinity and amounts outside int64.
+    """
+    t = type(value)
+    if t is str: # CSV cells: parsed like the float fields they used to be
+        try:
+            value, t = float(value), float
+        except ValueError:
+            raise ValueError(f"Not an amount: {value!r}") from None
+    if t is int:
+        p = value * 100
+    elif t is float and -FAST_LIMIT < value < FAST_LIMIT:
+        p = round(value * 100)
+        # Already a 2dp amount (everything we store) maps straight back; otherwise round exactly
+        if p / 100 != value:
+            num, den = value.as_integer_ratio()
+            p = _round_half_even(num * 100, den)
+    elif t is float or isinstance(value, Decimal):
+        try:
+            num, den = value.as_integer_ratio()
+        except (ValueError, OverflowError):
+            raise ValueError(f"Not an amount: {value!r}") from None
+        p = _round_half_even(num * 100, den)
+    else:
+        raise ValueError(f"Not an amount: {value!r}")
+    if not -MAX_PAISE <= p <= MAX_PAISE: raise ValueError("Amount out of range")
+    return p
+
+def rupees(p: int) -> float:
+    """Rupee float for the API (int / int is correctly rounded, same as float(Decimal))."""
+    return p / 100
@@ -0,0 +1,113 @@
+import os
+import asyncio
+import logging
+import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+
+# 🚀 UPGRADE: Password hashing on its own bounded pool. bcrypt/argon2 release the GIL, so a few
+# threads hash in parallel without taking the shared threadpool that serves dashboard work;
+# past HASH_MAX_PENDING queued jobs new logins are turned away (503) instead of piling up.
+SCHEME = os.getenv("PASSWORD_HASH", "bcrypt") # bcrypt | argon2 (new and rehashed passwords)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", "64"))
+
+log = logging.getLogger(__name__)
+_pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="hash")
+_pending = 0
+stats = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0}
+
+class HashingBusy(Exception):
+    """The hashing queue is full; the caller should retry shortly."""
+
+_argon2 = None
+
+def argon2_hasher():
+    """
+    argon2-cffi is optional and imported on first use (PASSWORD_HASH=argon2 or an argon2
+    hash to verify); raises ImportError when it isn't installed.
+    """
+    global _argon2
+    if _argon2 is None:
+        from argon2 import PasswordHasher
+        # OWASP baseline (19 MiB, 2 passes): cheaper per login than bcrypt 12 at comparable strength
+        _argon2 = PasswordHasher(
+            time_cost=int(os.getenv("ARGON2_TIME_COST", "2")),
+            memory_cost=int(os.getenv("ARGON2_MEMORY_KIB", "19456")),
+            parallelism=1,
+        )
+    return _argon2
+
+if SCHEME == "argon2":
+    try:
+        argon2_hasher()
+    except ImportError:
+        raise RuntimeError("PASSWORD_HASH=argon2 needs the argon2-cffi package")
+
+# --- SYNC (runs on the pool) ---
+def _bcrypt_secret(password: str) -> bytes:
+    # bcrypt only reads 72 bytes; passlib truncated silently and bcrypt>=5 raises instead
+    return password.encode()[:72]
+
+def _hash(password: str) -> str:
+    if SCHEME == "argon2": return argon2_hasher().hash(password)
+    return bcrypt.hashpw(_bcrypt_secret(password), bcrypt.gensalt(BCRYPT_ROUNDS)).decode()
+
+def needs_rehash(hashed: str) -> bool:
+    """True when `hashed` wasn't made with the current scheme and parameters."""
+    if SCHEME == "argon2":
+        return not hashed.startswith("$argon2") or argon2_hasher().check_needs_rehash(hashed)
+    return not hashed.startswith("$2b$") or int(hashed.split("$")[2]) != BCRYPT_ROUNDS
+
+def _check(password: str, hashed: str) -> bool:
+    if hashed.startswith("$argon2"):
+        try:
+            hasher = argon2_hasher()
+        except ImportError:
+            log.error("argon2 password hash found but argon2-cffi is not installed")
+            return False
+        from argon2.exceptions import VerificationError, InvalidHashError
+        try:
+            return hasher.verify(hashed, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    try:
+        return bcrypt.checkpw(_bcrypt_secret(password), hashed.encode())
+    except ValueError: # not a bcrypt hash
+        return False
+
+def _verify(password: str, hashed: str):
+    """(ok, replacement hash or None); the rehash rides on the same pool job."""
+    if not _check(password, hashed): return False, None
+    return True, _hash(password) if needs_rehash(hashed) else None
+
+# --- ASYNC API ---
+async def _submit(fn, *args):
+    global _pending
+    if _pending >= MAX_PENDING:
+        stats["rejected"] += 1
+        raise HashingBusy()
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool, fn, *args)
+    finally:
+        _pending -= 1
+
+async def hash_password(password: str) -> str:
+    hashed = await _submit(_hash, password)
+    stats["hashed"] += 1
+    return hashed
+
+async def verify_password(password: str, hashed: str):
+    """
+    Checks a password against a stored hash of any supported scheme. Returns (ok, new_hash);
+    new_hash is set when the stored one is outdated (other scheme, rounds or argon2 cost)
+    and should replace it.
+    """
+    ok, new_hash = await _submit(_verify, password, hashed)
+    stats["verified"] += 1
+    if new_hash: stats["rehashed"] += 1
+    return ok, new_hash
+
+def hashing_stats():
+    return {**stats, "pending": _pending, "workers": WORKERS, "max_pending": MAX_PENDING, "scheme": SCHEME}
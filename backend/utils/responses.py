@@ -0,0 +1,19 @@
+import orjson
+from decimal import Decimal
+
+# 🚀 UPGRADE: orjson encoding. Hot routes return bytes from `dumps` directly, which also skips
+# FastAPI's jsonable_encoder pass (engine output is already plain floats/strings).
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _default(obj):
+    if isinstance(obj, Decimal): return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def dumps(data) -> bytes:
+    return orjson.dumps(data, default=_default, option=OPTIONS)
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match check (weak comparison, lists and "*" allowed)."""
+    if not if_none_match or not etag: return False
+    if if_none_match.strip() == "*": return True
+    return any(t.strip().removeprefix("W/") == etag for t in if_none_match.split(","))
@@ -1,19 +1,90 @@
 import os
-from cryptography.fernet import Fernet
-from dotenv import load_dotenv
+import asyncio
+import hashlib
+import threading
+from cachetools import LRUCache
+from cryptography.fernet import Fernet, MultiFernet
+import config  # noqa: F401 -- loads .env first: ENCRYPTION_KEYS may come from it
 
-load_dotenv()
+# 🚀 UPGRADE: Key rotation. ENCRYPTION_KEYS="new,old,..." encrypts with the first key and
+# decrypts with any of them, so old messages stay readable without re-encrypting storage.
+keys = [k.strip() for k in (os.getenv("ENCRYPTION_KEYS") or os.getenv("ENCRYPTION_KEY") or "").split(",") if k.strip()]
+cipher = MultiFernet([Fernet(k.encode()) for k in keys]) if keys else None
 
-key = os.getenv("ENCRYPTION_KEY")
-cipher = Fernet(key.encode()) if key else None
+# Plaintext LRU keyed by ciphertext digest. Ciphertexts never change under rotation,
+# so adding a key does not invalidate it.
+DECRYPT_CACHE_SIZE = int(os.getenv("DECRYPT_CACHE_SIZE", "10000"))
+# FIX: Cache misses worth a thread hop off the event loop (a Fernet decrypt costs tens of µs);
+# chat pages hold up to 50 messages, the advisor's history 6. The misses go to one thread, not
+# split over several: Fernet holds the GIL, and a full page of misses is ~2 ms of work, less
+# than what extra hops would add.
+OFFLOAD_THRESHOLD = 8
+_cache = LRUCache(maxsize=DECRYPT_CACHE_SIZE)
+_lock = threading.Lock()
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+def _decrypt_one(text: str):
+    try:
+        return cipher.decrypt(text.encode()).decode()
+    except:
+        return None
 
 def encrypt_text(text: str) -> str:
     if not text or not cipher: return text
     return cipher.encrypt(text.encode()).decode()
 
 def decrypt_text(text: str) -> str:
+    return decrypt_many([text])[0]
+
+def _lookup(texts):
+    """(plaintexts with None for misses, {ciphertext: (digest, [positions])} of the misses)."""
+    out, misses = [], {}
+    with _lock:
+        for i, text in enumerate(texts):
+            if not text:
+                out.append(text)
+                continue
+            key = _digest(text)
+            plain = _cache.get(key)
+            out.append(plain)
+            if plain is None: misses.setdefault(text, (key, []))[1].append(i)
+    return out, misses
+
+def _fill(out, misses):
+    plains = [_decrypt_one(t) for t in misses]
+    with _lock:
+        for text, plain in zip(misses, plains):
+            key, slots = misses[text]
+            if plain is None:
+                plain = "[Encrypted Message]"
+            else:
+                _cache[key] = plain
+            for i in slots: out[i] = plain
+
+def decrypt_many(texts):
+    """Decrypts a batch of messages: cache hits first, each distinct miss once."""
+    if not cipher: return list(texts)
+    out, misses = _lookup(texts)
+    if misses: _fill(out, misses)
+    return out
+
+async def decrypt_page(texts):
+    """`decrypt_many` for request handlers: enough cache misses are decrypted on a worker thread."""
+    if not cipher: return list(texts)
+    out, misses = _lookup(texts)
+    if len(misses) >= OFFLOAD_THRESHOLD:
+        await asyncio.to_thread(_fill, out, misses)
+    elif misses:
+        _fill(out, misses)
+    return out
+
+def rotate_text(text: str) -> str:
+    """Re-encrypts under the primary key (for lazy migrations); the plaintext stays cached."""
     if not text or not cipher: return text
-    try:
-        return cipher.decrypt(text.encode()).decode()
-    except:
-        return "[Encrypted Message]"
\ No newline at end of file
+    rotated = cipher.rotate(text.encode()).decode()
+    with _lock:
+        plain = _cache.get(_digest(text))
+        if plain is not None: _cache[_digest(rotated)] = plain
+    return rotated
@@ -14,8 +14,8 @@ const Advisor = () => {
             try {
                 // Correct endpoint: /ai/advisor/history (baseURL handles /v1)
                 const res = await api.get('/ai/advisor/history');
-                if (res.data && Array.isArray(res.data)) {
-                    setChatLog(res.data);
+                if (res.data && Array.isArray(res.data.messages)) {
+                    setChatLog(res.data.messages);
                 }
             } catch (err) {
                 console.error("Failed to load history", err);
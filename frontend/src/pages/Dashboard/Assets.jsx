@@ -53,6 +53,12 @@ const Assets = ({ data, onAdd, onDelete }) => {
                             <span>Target: ₹{g.target_amount}</span>
                             <span>Save: <span className="text-white font-bold">₹{Math.round(g.required_monthly)}/mo</span></span>
                         </div>
+                        {g.funded_pct !== undefined && (
+                            <div className="flex justify-between text-xs text-slate-400 mt-1">
+                                <span>Funded: {g.funded_pct}%</span>
+                                <span>Done by: {g.completion_date}</span>
+                            </div>
+                        )}
                         <button onClick={() => onDelete('goals', g.id)} className="text-xs text-red-400 mt-2">Delete</button>
                     </div>
                 ))}
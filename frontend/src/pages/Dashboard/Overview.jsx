@@ -13,7 +13,7 @@ const Overview = ({ data, onAddExpense, onDelete, onViewChange }) => {
     const strategy = health.debt_strategy || {};
     const projections = health.projections || [];
 
-    const totalSpent = expenses.reduce((acc, curr) => acc + (curr.amount || 0), 0);
+    const totalSpent = health.expenses?.current_month ?? expenses.reduce((acc, curr) => acc + (curr.amount || 0), 0);
     const isOverspending = (health.surplus || 0) < 0;
 
     // 🚀 NEW: Find first risky goal
@@ -44,7 +44,7 @@ const Overview = ({ data, onAddExpense, onDelete, onViewChange }) => {
                         <div className="bg-red-500/20 p-2 rounded-full text-red-400 animate-pulse"><AlertTriangle size={20} /></div>
                         <div>
                             <h3 className="text-white font-bold text-sm">Goal At Risk: {riskyGoal.name}</h3>
-                            <p className="text-red-300/70 text-xs">You are short by ₹{Math.round(riskyGoal.required_monthly - Math.max(0, health.surplus)).toLocaleString()}/mo.</p>
+                            <p className="text-red-300/70 text-xs">You are short by ₹{Math.round(riskyGoal.required_monthly - (riskyGoal.allocated_monthly ?? Math.max(0, health.surplus))).toLocaleString()}/mo.</p>
                         </div>
                     </div>
                     <ArrowRight size={16} className="text-red-400" />
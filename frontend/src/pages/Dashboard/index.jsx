@@ -34,7 +34,8 @@ const Dashboard = () => {
 
     const fetchData = async () => {
         try {
-            const res = await api.get('/finance/data');
+            // Only the 5 newest expenses are shown here; history is paged from /finance/expenses
+            const res = await api.get('/finance/data', { params: { recent: 5 } });
             if (res.data) setData(res.data);
         } catch (err) { console.error("Fetch Error", err); }
     };